@@ -0,0 +1,4 @@
+"""
+Utilidades para medir el rendimiento de la API sobre una base de datos de
+prueba desechable. Se ejecutan con los comandos `bench_*` de cada app.
+"""
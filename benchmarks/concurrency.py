@@ -0,0 +1,95 @@
+# benchmarks/concurrency.py
+"""
+Compara la concurrencia de WSGI (pool de hilos) y ASGI (event loop) ante muchos
+clientes lentos. El "cliente lento" se simula en el envío del cuerpo: en WSGI
+el hilo del worker queda bloqueado escribiendo, en ASGI el `send` cede el
+event loop mientras el cliente lee.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import RequestFactory, override_settings
+
+from .stats import Recorder
+
+
+def run_wsgi(path, authorization, clients, requests_per_client, threads, client_delay):
+    handler = WSGIHandler()
+    factory = RequestFactory()
+    recorder = Recorder()
+
+    def serve():
+        environ = factory.get(path, HTTP_AUTHORIZATION=authorization).environ
+        statuses = []
+        body = handler(environ, lambda status, headers: statuses.append(status))
+        for _chunk in body:
+            time.sleep(client_delay)  # el worker queda ocupado mientras el cliente lee
+        assert statuses[0].startswith('200'), statuses[0]
+
+    def client(executor):
+        for _ in range(requests_per_client):
+            started = time.perf_counter()
+            executor.submit(serve).result()
+            recorder.record('wsgi', time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor, ThreadPoolExecutor(max_workers=clients) as client_pool:
+        for future in [client_pool.submit(client, executor) for _ in range(clients)]:
+            future.result()
+    return recorder, time.perf_counter() - started
+
+
+def run_asgi(path, authorization, clients, requests_per_client, client_delay):
+    recorder = Recorder()
+
+    async def serve(handler):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'headers': [(b'host', b'testserver'), (b'authorization', authorization.encode())],
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        }
+        disconnected = asyncio.get_running_loop().create_future()
+        received = False
+        statuses = []
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            return await disconnected
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+            elif message['type'] == 'http.response.body':
+                await asyncio.sleep(client_delay)  # el cliente lee sin bloquear el event loop
+
+        await handler(scope, receive, send)
+        assert statuses == [200], statuses
+
+    async def client(handler):
+        for _ in range(requests_per_client):
+            started = time.perf_counter()
+            await serve(handler)
+            recorder.record('asgi', time.perf_counter() - started)
+
+    async def main():
+        handler = ASGIHandler()
+        await asyncio.gather(*(client(handler) for _ in range(clients)))
+
+    started = time.perf_counter()
+    with override_settings(ROOT_URLCONF='reactions.asgi_urls'):
+        asyncio.run(main())
+    return recorder, time.perf_counter() - started
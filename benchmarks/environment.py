@@ -0,0 +1,24 @@
+# benchmarks/environment.py
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Crea una base de datos de prueba con las migraciones aplicadas y la elimina
+    al terminar, para que los benchmarks nunca siembren datos en la base real.
+    También prepara el entorno de pruebas (ALLOWED_HOSTS, DEBUG=False, etc.)
+    para poder usar el cliente de pruebas de Django. Los trabajos de
+    orders/jobs.py corren en línea, como en la suite de pruebas.
+    """
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with override_settings(ORDERS_JOB_BACKEND='orders.jobs.InlineJobBackend'):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
@@ -0,0 +1,88 @@
+# benchmarks/factories.py
+import json
+import random
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+from orders.models import Order, OrderItem, default_time_estimated
+from services.models import Service
+from users.models import User
+
+USERS_FIXTURE = settings.BASE_DIR / 'users' / 'fixtures' / 'default_users.json'
+SERVICES_FIXTURE = settings.BASE_DIR / 'services' / 'fixtures' / 'default_services.json'
+# Contraseña de los solicitantes de `default_users.json` (ver README)
+APPLICANT_PASSWORD = 'charchazopalquelee'
+
+
+def _load_fixture(path):
+    with open(path, encoding='utf-8') as fixture:
+        return [entry['fields'] for entry in json.load(fixture)]
+
+
+@dataclass
+class Dataset:
+    applicants: list = field(default_factory=list)
+    suppliers: list = field(default_factory=list)
+    recipients: list = field(default_factory=list)
+    services: list = field(default_factory=list)
+
+
+def user_templates():
+    """Usuarios de `default_users.json` agrupados por `user_type`."""
+    templates = {}
+    for fields in _load_fixture(USERS_FIXTURE):
+        templates.setdefault(fields['user_type'], []).append(fields)
+    return templates
+
+
+def seed(applicants=50, suppliers=10, recipients=50, orders=1_000, budget=10_000_000, batch_size=5_000):
+    """
+    Siembra usuarios clonados de `default_users.json` (mismas contraseñas que
+    documenta el README), los servicios de `default_services.json` y un
+    historial de órdenes repartido al azar entre ellos.
+    """
+    templates = user_templates()
+    dataset = Dataset()
+
+    def clone(user_type, count):
+        users = []
+        for i in range(count):
+            template = templates[user_type][i % len(templates[user_type])]
+            local, _, domain = template['username'].partition('@')
+            users.append(User(
+                username=f'{local}+bench{i}@{domain}',
+                password=template['password'],
+                user_type=user_type,
+                budget=budget if user_type == 'applicant' else template['budget'],
+            ))
+        return User.objects.bulk_create(users, batch_size=batch_size)
+
+    dataset.applicants = clone('applicant', applicants)
+    dataset.suppliers = clone('supplier', suppliers)
+    dataset.recipients = clone('recipient', recipients)
+    dataset.services = Service.objects.bulk_create(Service(**fields) for fields in _load_fixture(SERVICES_FIXTURE))
+
+    remaining = orders
+    statuses = ['in_progress', 'completed', 'cancelled']
+    while remaining > 0:
+        batch = Order.objects.bulk_create(
+            Order(
+                applicant=random.choice(dataset.applicants),
+                supplier=random.choice(dataset.suppliers),
+                recipient=random.choice(dataset.recipients),
+                status=random.choice(statuses),
+                time_estimated=default_time_estimated(),
+            )
+            for _ in range(min(remaining, batch_size))
+        )
+        OrderItem.objects.bulk_create(
+            (
+                OrderItem(order=order, service=service, quantity=random.randint(1, 3), unit_price=service.price)
+                for order in batch
+                for service in random.sample(dataset.services, random.randint(1, len(dataset.services)))
+            ),
+            batch_size=batch_size,
+        )
+        remaining -= len(batch)
+    return dataset
@@ -0,0 +1,71 @@
+# benchmarks/lifecycle.py
+import itertools
+import time
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from .factories import APPLICANT_PASSWORD
+from .stats import Recorder
+
+
+class LifecycleBenchmark:
+    """
+    Recorre el ciclo de vida de una orden a través de la API con el cliente de
+    pruebas de Django: login, creación, listados, cancelación y completado.
+    Cada petición registra su latencia y la cantidad de consultas SQL.
+    """
+    def __init__(self, dataset, client=None):
+        self.dataset = dataset
+        self.client = client or Client()
+        self.recorder = Recorder()
+        self.tokens = {
+            user.username: f'Bearer {user.get_token().access_token}'
+            for user in dataset.applicants + dataset.suppliers
+        }
+
+    def request(self, name, method, url, user, data=None, expected=200):
+        headers = {'HTTP_AUTHORIZATION': self.tokens[user.username]} if user else {}
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(self.client, method)(url, data, content_type='application/json', **headers)
+            elapsed = time.perf_counter() - started
+        if response.status_code != expected:
+            raise AssertionError(f'{name}: status {response.status_code} (esperado {expected}): {response.content[:200]!r}')
+        self.recorder.record(name, elapsed, len(queries))
+        return response
+
+    def place_order(self, applicant, recipient):
+        services = [{'service_id': service.id, 'quantity': 1} for service in self.dataset.services]
+        response = self.request('orders.create', 'post', '/api/orders/', applicant, {
+            'recipient_id': recipient.id,
+            'services': services,
+        }, expected=201)
+        return response.json()
+
+    def run(self, iterations, logins=20):
+        applicants = itertools.cycle(self.dataset.applicants)
+        recipients = itertools.cycle(self.dataset.recipients)
+        suppliers = {supplier.username: supplier for supplier in self.dataset.suppliers}
+
+        for applicant in itertools.islice(applicants, logins):
+            self.request('login', 'post', '/api/login/', None, {
+                'username': applicant.username,
+                'password': APPLICANT_PASSWORD,
+            })
+
+        for _ in range(iterations):
+            applicant = next(applicants)
+            to_cancel = self.place_order(applicant, next(recipients))
+            to_complete = self.place_order(applicant, next(recipients))
+            supplier = suppliers[to_complete['supplier_username']]
+
+            self.request('orders.in_progress_orders', 'get', '/api/orders/in_progress_orders/', supplier)
+            self.request('orders.canceled_or_completed_orders', 'get', '/api/orders/canceled_or_completed_orders/', supplier)
+            self.request('orders.current_orders', 'get', '/api/orders/current_orders/', applicant)
+            self.request('orders.no_current_orders', 'get', '/api/orders/no_current_orders/', applicant)
+            self.request('orders.cancel_order', 'put', f"/api/orders/{to_cancel['id']}/cancel_order/", applicant)
+            self.request('orders.complete_order', 'put', f"/api/orders/{to_complete['id']}/complete_order/", supplier)
+
+        return self.recorder.summary()
@@ -0,0 +1,102 @@
+# benchmarks/scheduling.py
+"""
+Simulación de eventos discretos para comparar políticas de asignación de
+proveedores por tiempo de espera en cola, sin base de datos.
+
+Cada proveedor atiende sus órdenes de a una y en orden de llegada. Las
+órdenes llegan como un proceso de Poisson con la tasa que da la utilización
+pedida, y duran `default_time_estimated()` minutos. La elección usa
+`spread_loads` de orders/assignment.py, igual que los motores reales, sobre
+el contador de cada política:
+
+- `order_count`: órdenes históricas (LoadIndex/Database/LockingSupplierAssigner).
+- `capacity`: minutos pendientes (CapacitySupplierAssigner), que se suman al
+  asignar y se descuentan al completar, como `outstanding_minutes`.
+"""
+import heapq
+import random
+import statistics
+
+from orders.assignment import spread_loads
+from orders.models import default_time_estimated
+from .stats import percentile
+
+POLICIES = ('order_count', 'capacity')
+
+
+def workload(orders, suppliers, utilisation, seed):
+    """Lista de `(minuto de llegada, minutos estimados)`, igual para todas las políticas."""
+    random.seed(seed)
+    minutes = [default_time_estimated() for _ in range(orders)]
+    rate = utilisation * suppliers / statistics.fmean(minutes)  # llegadas por minuto
+    arrivals = []
+    now = 0.0
+    for _ in range(orders):
+        now += random.expovariate(rate)
+        arrivals.append(now)
+    return list(zip(arrivals, minutes))
+
+
+def simulate(policy, jobs, history):
+    """
+    Reparte `jobs` con la política dada partiendo de los `order_count`
+    históricos de `history` (`{supplier_id: order_count}`). Devuelve las
+    esperas en cola y las latencias hasta completar, en minutos.
+    """
+    free_at = dict.fromkeys(history, 0.0)
+    loads = dict(history) if policy == 'order_count' else dict.fromkeys(history, 0)
+    completions = []  # (minuto de término, proveedor, minutos)
+    waits, latencies = [], []
+    for arrival, minutes in jobs:
+        # Completar lo que terminó antes de esta llegada descuenta los minutos pendientes
+        while completions and completions[0][0] <= arrival:
+            _finished, supplier_id, done = heapq.heappop(completions)
+            if policy == 'capacity':
+                loads[supplier_id] -= done
+        [supplier_id] = spread_loads(loads, 1, costs=[minutes] if policy == 'capacity' else None)
+        loads[supplier_id] += minutes if policy == 'capacity' else 1
+
+        start = max(arrival, free_at[supplier_id])
+        free_at[supplier_id] = start + minutes
+        heapq.heappush(completions, (free_at[supplier_id], supplier_id, minutes))
+        waits.append(start - arrival)
+        latencies.append(free_at[supplier_id] - arrival)
+    return waits, latencies
+
+
+def summarize(waits, latencies):
+    return {
+        'orders': len(waits),
+        'wait_p50_min': percentile(waits, 0.50),
+        'wait_p95_min': percentile(waits, 0.95),
+        'wait_p99_min': percentile(waits, 0.99),
+        'wait_mean_min': statistics.fmean(waits),
+        'latency_p50_min': percentile(latencies, 0.50),
+        'latency_p95_min': percentile(latencies, 0.95),
+    }
+
+
+def compare(suppliers=10, orders=5000, utilisation=0.85, history=200, seed=0):
+    """
+    Corre todas las políticas sobre la misma carga. `history` es el máximo de
+    órdenes históricas de un proveedor: cada uno parte con una cantidad al azar
+    entre 0 y ese valor, como en un sistema con proveedores antiguos y nuevos.
+    """
+    jobs = workload(orders, suppliers, utilisation, seed)
+    rng = random.Random(seed)
+    counts = {supplier_id: rng.randint(0, history) for supplier_id in range(suppliers)}
+    results = {}
+    for policy in POLICIES:
+        random.seed(seed)  # mismos desempates en cada corrida
+        results[policy] = summarize(*simulate(policy, jobs, counts))
+    return results
+
+
+def format_table(results):
+    lines = [f"{'política':<14}{'n':>7}{'espera p50':>12}{'p95':>10}{'p99':>10}{'media':>10}{'latencia p95':>14}"]
+    for policy, row in results.items():
+        lines.append(
+            f"{policy:<14}{row['orders']:>7}{row['wait_p50_min']:>12.1f}{row['wait_p95_min']:>10.1f}"
+            f"{row['wait_p99_min']:>10.1f}{row['wait_mean_min']:>10.1f}{row['latency_p95_min']:>14.1f}"
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,65 @@
+# benchmarks/stats.py
+import json
+import math
+import statistics
+from collections import defaultdict
+
+
+def percentile(values, fraction):
+    """Percentil por rango más cercano sobre una lista no vacía."""
+    ordered = sorted(values)
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+class Recorder:
+    """Acumula latencias (segundos) y cantidad de consultas por endpoint."""
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+
+    def record(self, name, seconds, queries=None):
+        self.latencies[name].append(seconds)
+        if queries is not None:
+            self.queries[name].append(queries)
+
+    def summary(self):
+        summary = {}
+        for name, latencies in self.latencies.items():
+            queries = self.queries.get(name) or [0]
+            summary[name] = {
+                'requests': len(latencies),
+                'p50_ms': percentile(latencies, 0.50) * 1000,
+                'p95_ms': percentile(latencies, 0.95) * 1000,
+                'p99_ms': percentile(latencies, 0.99) * 1000,
+                'mean_ms': statistics.fmean(latencies) * 1000,
+                'throughput_rps': len(latencies) / sum(latencies) if sum(latencies) else 0.0,
+                'queries_mean': statistics.fmean(queries),
+                'queries_max': max(queries),
+            }
+        return summary
+
+
+def format_table(summary, baseline=None):
+    """Tabla de texto con las métricas; si hay línea base, agrega la variación del p95."""
+    lines = [f"{'endpoint':<38}{'n':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'rps':>10}{'queries':>9}"]
+    for name, row in summary.items():
+        line = (
+            f"{name:<38}{row['requests']:>6}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+            f"{row['p99_ms']:>10.2f}{row['throughput_rps']:>10.1f}{row['queries_mean']:>9.1f}"
+        )
+        previous = (baseline or {}).get(name)
+        if previous and previous['p95_ms']:
+            line += f"  p95 {100 * (row['p95_ms'] - previous['p95_ms']) / previous['p95_ms']:+.1f}%"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def save_results(path, metadata, summary):
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump({'meta': metadata, 'endpoints': summary}, output, indent=2, sort_keys=True)
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as baseline:
+        return json.load(baseline)['endpoints']
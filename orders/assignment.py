@@ -0,0 +1,373 @@
+# orders/assignment.py
+import heapq
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Subquery, Value, When
+from django.db.models.functions import Greatest
+from django.utils.module_loading import import_string
+
+from users.models import User
+
+
+class SupplierAssigner:
+    """
+    Interfaz común para los motores de asignación de proveedores.
+
+    `assign()` elige un proveedor y le suma la orden (en la base de datos y en el
+    estado propio del motor); `release()` deshace esa suma cuando la orden se
+    cancela. Ambos métodos deben llamarse dentro de la transacción del pedido.
+
+    Todos los motores mantienen `order_count` y `outstanding_minutes` (minutos
+    estimados de las órdenes en progreso) de cada proveedor; `load_field` indica
+    cuál de los dos usa el motor para decidir.
+    """
+    load_field = 'order_count'
+
+    def pick(self):
+        """Devuelve el proveedor con menos carga (o None) sin modificar nada."""
+        raise NotImplementedError
+
+    def assign(self, minutes=0):
+        """Asigna una orden de `minutes` minutos estimados al proveedor elegido."""
+        supplier = self.pick()
+        if supplier is None:
+            return None
+        User.objects.filter(pk=supplier.pk).update(
+            order_count=F('order_count') + 1,
+            outstanding_minutes=F('outstanding_minutes') + minutes,
+        )
+        self.supplier_loaded(supplier.pk, 1)
+        return supplier
+
+    def assign_many(self, count, minutes=None):
+        """
+        Reparte `count` órdenes entre los proveedores en una sola pasada, siempre
+        hacia el menos cargado en ese momento. `minutes` son los minutos
+        estimados de cada orden. Devuelve la lista de proveedores (uno por orden)
+        o una lista vacía si no hay proveedores.
+        """
+        picks = spread_loads(self.supplier_loads(), count)
+        loads = increment_loads(picks, minutes)
+        for supplier_id, delta in loads.items():
+            self.supplier_loaded(supplier_id, delta)
+        return suppliers_for(picks)
+
+    def supplier_loads(self):
+        """`{supplier_id: carga}` de todos los proveedores, según `load_field`."""
+        return dict(User.objects.filter(user_type='supplier').values_list('pk', self.load_field))
+
+    def guard(self):
+        """
+        Contexto que envuelve la transacción completa del pedido. Los motores que
+        necesitan serializar asignaciones concurrentes lo sobrescriben.
+        """
+        return nullcontext()
+
+    def release(self, supplier_id, minutes=0):
+        released = User.objects.filter(pk=supplier_id, order_count__gt=0).update(
+            order_count=F('order_count') - 1,
+            outstanding_minutes=Greatest(F('outstanding_minutes') - minutes, 0),
+        )
+        if released:
+            self.supplier_loaded(supplier_id, -1)
+
+    def release_many(self, loads, minutes=None):
+        """
+        Deshace varias asignaciones a la vez; `loads` es `{supplier_id: órdenes}`
+        y `minutes`, `{supplier_id: minutos estimados}`.
+        """
+        if not loads:
+            return
+        User.objects.filter(pk__in=loads).update(
+            order_count=Greatest(F('order_count') - _per_supplier(loads), 0),
+            outstanding_minutes=Greatest(F('outstanding_minutes') - _per_supplier(minutes or {}), 0),
+        )
+        for supplier_id, delta in loads.items():
+            self.supplier_loaded(supplier_id, -delta)
+
+    def supplier_loaded(self, supplier_id, delta):
+        """Notifica que la carga de un proveedor cambió en `delta` órdenes."""
+
+    def supplier_saved(self, supplier):
+        """Notifica que se creó o guardó un proveedor."""
+
+    def reset(self):
+        """Descarta cualquier estado en memoria."""
+
+
+def spread_loads(loads, count, costs=None):
+    """
+    Elige `count` veces al proveedor menos cargado de `loads`, sumándole cada
+    elección (1, o el costo correspondiente de `costs`) antes de la siguiente.
+    Los empates se rompen al azar.
+    """
+    if not loads:
+        return []
+    heap = [(load, random.random(), supplier_id) for supplier_id, load in loads.items()]
+    heapq.heapify(heap)
+    picks = []
+    for cost in costs or [1] * count:
+        load, _tiebreak, supplier_id = heap[0]
+        picks.append(supplier_id)
+        heapq.heapreplace(heap, (load + cost, random.random(), supplier_id))
+    return picks
+
+
+def _per_supplier(loads):
+    return Case(
+        *[When(pk=supplier_id, then=Value(delta)) for supplier_id, delta in loads.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def increment_loads(picks, minutes=None):
+    """
+    Suma las elecciones a `order_count` (y los minutos estimados de cada orden
+    a `outstanding_minutes`) de cada proveedor con un solo UPDATE.
+    """
+    loads = Counter(picks)
+    if loads:
+        outstanding = Counter()
+        for supplier_id, order_minutes in zip(picks, minutes or []):
+            outstanding[supplier_id] += order_minutes
+        User.objects.filter(pk__in=loads).update(
+            order_count=F('order_count') + _per_supplier(loads),
+            outstanding_minutes=F('outstanding_minutes') + _per_supplier(outstanding),
+        )
+    return loads
+
+
+def suppliers_for(picks):
+    """Instancias de los proveedores elegidos, en el mismo orden y con una consulta."""
+    suppliers = User.objects.in_bulk(set(picks))
+    return [suppliers[supplier_id] for supplier_id in picks]
+
+
+class DatabaseSupplierAssigner(SupplierAssigner):
+    """
+    Motor sin estado: resuelve el proveedor menos cargado con una consulta.
+    """
+    def pick(self):
+        suppliers = User.objects.filter(user_type='supplier')
+        min_load = suppliers.order_by(self.load_field).values(self.load_field)[:1]
+        # Si hay empate en el mínimo se escoge uno al azar
+        return suppliers.filter(**{self.load_field: Subquery(min_load)}).order_by('?').first()
+
+
+class LockingSupplierAssigner(DatabaseSupplierAssigner):
+    """
+    Motor seguro ante concurrencia para varios procesos.
+
+    En bases de datos con `SELECT ... FOR UPDATE SKIP LOCKED` (PostgreSQL,
+    MySQL 8) bloquea la fila del proveedor elegido hasta el final de la
+    transacción y las peticiones concurrentes saltan a otro proveedor en vez de
+    leer el mismo mínimo; si todos están tomados, espera al menos cargado. En SQLite, que no lo soporta, `guard()` serializa las
+    transacciones de asignación del proceso con un lock (reentrante, para
+    poder envolver la colocación en una transacción más amplia).
+    """
+    _serial_lock = threading.RLock()
+
+    def guard(self):
+        if connection.features.has_select_for_update_skip_locked:
+            return nullcontext()
+        return self._serial_lock
+
+    def pick(self):
+        if not connection.features.has_select_for_update_skip_locked:
+            return super().pick()
+        suppliers = User.objects.filter(user_type='supplier').order_by(self.load_field, '?')
+        supplier = suppliers.select_for_update(skip_locked=True).first()
+        if supplier is None:
+            # Todas las filas están tomadas (más colocaciones simultáneas que proveedores):
+            # esperar al menos cargado en vez de responder que no hay proveedores
+            supplier = suppliers.select_for_update().first()
+        return supplier
+
+    def supplier_loads(self):
+        if not connection.features.has_select_for_update_skip_locked:
+            return super().supplier_loads()
+        # Un lote reparte sobre todos los proveedores, así que se bloquean todas sus filas
+        suppliers = User.objects.select_for_update().filter(user_type='supplier').order_by('pk')
+        return dict(suppliers.values_list('pk', self.load_field))
+
+
+class CapacitySupplierAssigner(LockingSupplierAssigner):
+    """
+    Motor por capacidad: asigna al proveedor que antes queda libre, es decir,
+    al de menos `outstanding_minutes` (la suma de `time_estimated` de sus
+    órdenes en progreso), en vez de al de menos órdenes históricas. Un
+    proveedor con pocas órdenes pero horas de trabajo en cola deja de recibir
+    pedidos hasta ponerse al día.
+
+    El contador se mantiene con `F()` al asignar, cancelar y completar, así que
+    elegir no agrega nada por petición. Hereda el bloqueo de
+    `LockingSupplierAssigner`.
+    """
+    load_field = 'outstanding_minutes'
+
+    def assign_many(self, count, minutes=None):
+        minutes = minutes or [0] * count
+        # Cada orden suma sus minutos a la carga antes de elegir la siguiente
+        picks = spread_loads(self.supplier_loads(), count, costs=minutes)
+        increment_loads(picks, minutes)
+        return suppliers_for(picks)
+
+
+class _Bucket:
+    """Conjunto con borrado y elección aleatoria en O(1)."""
+    def __init__(self):
+        self.items = []
+        self.positions = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, item):
+        self.positions[item] = len(self.items)
+        self.items.append(item)
+
+    def remove(self, item):
+        index = self.positions.pop(item)
+        last = self.items.pop()
+        if last != item:
+            self.items[index] = last
+            self.positions[last] = index
+
+    def choice(self):
+        return random.choice(self.items)
+
+
+class LoadIndexSupplierAssigner(SupplierAssigner):
+    """
+    Motor con un índice en memoria de proveedores agrupados por `order_count`.
+
+    Los grupos se ordenan con un heap de cargas, de modo que elegir al proveedor
+    menos cargado (con desempate aleatorio) cuesta O(log n) y no recorre la tabla
+    de usuarios. El índice es por proceso: se carga desde la base de datos en el
+    primer uso y se vuelve a sincronizar cada `ORDERS_SUPPLIER_INDEX_TTL` segundos
+    para absorber cambios hechos por otros procesos. La base de datos sigue
+    siendo la fuente de verdad, ya que los contadores se actualizan con `F()`.
+
+    Los cambios de carga se aplican al índice recién al confirmar la transacción
+    (`on_commit`): si el pedido se deshace, el índice tampoco cambia.
+    """
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else getattr(settings, 'ORDERS_SUPPLIER_INDEX_TTL', 300)
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._loads = {}
+            self._buckets = {}
+            self._heap = []
+            self._loaded_at = None
+
+    def _ensure_loaded(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return
+        self.reset()
+        for supplier_id, order_count in User.objects.filter(user_type='supplier').values_list('pk', 'order_count'):
+            self._place(supplier_id, order_count)
+        self._loaded_at = time.monotonic()
+
+    def _place(self, supplier_id, order_count):
+        bucket = self._buckets.get(order_count)
+        if bucket is None:
+            bucket = self._buckets[order_count] = _Bucket()
+            heapq.heappush(self._heap, order_count)
+        bucket.add(supplier_id)
+        self._loads[supplier_id] = order_count
+
+    def _forget(self, supplier_id):
+        order_count = self._loads.pop(supplier_id, None)
+        if order_count is None:
+            return
+        bucket = self._buckets[order_count]
+        bucket.remove(supplier_id)
+        if not bucket:
+            # La entrada del heap queda obsoleta y se descarta al llegar a la cima
+            del self._buckets[order_count]
+
+    def _least_loaded(self):
+        while self._heap:
+            bucket = self._buckets.get(self._heap[0])
+            if bucket:
+                return bucket.choice()
+            heapq.heappop(self._heap)
+        return None
+
+    def _shift(self, supplier_id, delta):
+        order_count = self._loads.get(supplier_id)
+        if order_count is None:
+            return
+        self._forget(supplier_id)
+        self._place(supplier_id, max(order_count + delta, 0))
+
+    def pick(self):
+        while True:
+            with self._lock:
+                self._ensure_loaded()
+                supplier_id = self._least_loaded()
+            if supplier_id is None:
+                return None
+            supplier = User.objects.filter(pk=supplier_id, user_type='supplier').first()
+            if supplier is not None:
+                return supplier
+            # El proveedor ya no existe: sacarlo del índice y volver a intentar
+            with self._lock:
+                self._forget(supplier_id)
+
+    def assign_many(self, count, minutes=None):
+        with self._lock:
+            self._ensure_loaded()
+            picks = []
+            for _ in range(count):
+                supplier_id = self._least_loaded()
+                if supplier_id is None:
+                    break
+                # Cada elección cuenta para la siguiente del lote; se deshace abajo y se aplica al confirmar
+                self._shift(supplier_id, 1)
+                picks.append(supplier_id)
+            for supplier_id in picks:
+                self._shift(supplier_id, -1)
+        suppliers = User.objects.filter(user_type='supplier').in_bulk(set(picks))
+        if len(suppliers) < len(set(picks)):
+            # Algún proveedor del índice ya no existe: resincronizar y repartir desde la base de datos
+            self.reset()
+            return super().assign_many(count, minutes)
+        for supplier_id, delta in increment_loads(picks, minutes).items():
+            self.supplier_loaded(supplier_id, delta)
+        return [suppliers[supplier_id] for supplier_id in picks]
+
+    def supplier_loaded(self, supplier_id, delta):
+        def shift():
+            with self._lock:
+                self._shift(supplier_id, delta)
+        # Fuera de una transacción se aplica de inmediato
+        transaction.on_commit(shift)
+
+    def supplier_saved(self, supplier):
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            self._forget(supplier.pk)
+            if supplier.user_type == 'supplier':
+                self._place(supplier.pk, supplier.order_count)
+
+
+@lru_cache(maxsize=None)
+def get_supplier_assigner():
+    """
+    Devuelve la instancia (compartida por el proceso) del motor configurado en
+    `ORDERS_SUPPLIER_ASSIGNER`.
+    """
+    return import_string(settings.ORDERS_SUPPLIER_ASSIGNER)()
@@ -0,0 +1,76 @@
+# orders/async_views.py
+import json
+
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.request import Request
+
+from reactions.db import read_from_replica
+from reactions.pagination import AsyncOrderHistoryPagination
+from users.authentication import async_token_required
+from .events import get_event_hub
+from .models import Order
+from .serializers import OrderSerializer
+
+
+async def paginated_orders(request, orders):
+    """Serializa una página del historial; los relacionados ya vienen precargados."""
+    paginator = AsyncOrderHistoryPagination()
+    with read_from_replica():
+        page = await paginator.apaginate_queryset(orders, Request(request))
+    return JsonResponse(paginator.get_paginated_data(OrderSerializer(page, many=True).data))
+
+
+@async_token_required(user_type='supplier')
+async def in_progress_orders(request):
+    orders = Order.objects.with_details().filter(supplier_id=request.user.pk, status='in_progress')
+    return await paginated_orders(request, orders)
+
+
+@async_token_required(user_type='supplier')
+async def canceled_or_completed_orders(request):
+    orders = Order.objects.with_details().filter(supplier_id=request.user.pk).exclude(status='in_progress')
+    return await paginated_orders(request, orders)
+
+
+@async_token_required(user_type='applicant')
+async def current_orders(request):
+    orders = Order.objects.with_details().filter(applicant_id=request.user.pk, status='in_progress')
+    return await paginated_orders(request, orders)
+
+
+@async_token_required(user_type='applicant')
+async def no_current_orders(request):
+    orders = Order.objects.with_details().filter(applicant_id=request.user.pk).exclude(status='in_progress')
+    return await paginated_orders(request, orders)
+
+
+@async_token_required()
+async def order_events(request):
+    """
+    Stream SSE con los cambios de estado de las órdenes del usuario. Al
+    reconectar, el navegador envía `Last-Event-ID` y se reenvía lo pendiente.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id') or 0
+    try:
+        last_event_id = int(last_event_id)
+    except ValueError:
+        return JsonResponse({'error': 'Last-Event-ID inválido.'}, status=400)
+
+    async def stream(user_id, last_event_id):
+        hub = get_event_hub()
+        yield 'retry: 3000\n\n'
+        while True:
+            events = await hub.await_events(user_id, last_event_id, settings.ORDERS_EVENTS_SSE_KEEPALIVE)
+            if not events:
+                # Comentario keep-alive para que los proxies no cierren la conexión
+                yield ': keep-alive\n\n'
+                continue
+            for event in events:
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            last_event_id = events[-1]['id']
+
+    response = StreamingHttpResponse(stream(request.user.pk, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,90 @@
+# orders/events.py
+import asyncio
+import itertools
+import threading
+import time
+from collections import defaultdict, deque
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+class InMemoryEventBackend:
+    """
+    Pub/sub en memoria del proceso, sin broker externo.
+
+    Cada usuario tiene un buffer acotado con sus últimos eventos, identificados
+    por un número creciente. Los suscriptores piden "los eventos posteriores a
+    `last_event_id`" y esperan bloqueando (long-poll bajo WSGI) o con `await`
+    (SSE bajo ASGI) hasta que llegue uno nuevo o venza el timeout.
+    """
+    def __init__(self, history=None):
+        self.history = history or getattr(settings, 'ORDERS_EVENTS_HISTORY', 100)
+        self._condition = threading.Condition()
+        self._ids = itertools.count(1)
+        self._events = defaultdict(lambda: deque(maxlen=self.history))
+        self._async_waiters = set()
+
+    def publish(self, user_ids, payload):
+        with self._condition:
+            event_id = next(self._ids)
+            for user_id in user_ids:
+                self._events[user_id].append({'id': event_id, **payload})
+            self._condition.notify_all()
+            waiters = list(self._async_waiters)
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+        return event_id
+
+    def events_since(self, user_id, last_event_id=0):
+        with self._condition:
+            return [event for event in self._events.get(user_id, ()) if event['id'] > last_event_id]
+
+    def wait(self, user_id, last_event_id=0, timeout=0):
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                events = self.events_since(user_id, last_event_id)
+                remaining = deadline - time.monotonic()
+                if events or remaining <= 0:
+                    return events
+                self._condition.wait(remaining)
+
+    async def await_events(self, user_id, last_event_id=0, timeout=0):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            waiter = (loop, asyncio.Event())
+            with self._condition:
+                self._async_waiters.add(waiter)
+            try:
+                # Se revisa después de registrarse para no perder un evento publicado en medio
+                events = self.events_since(user_id, last_event_id)
+                remaining = deadline - loop.time()
+                if events or remaining <= 0:
+                    return events
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            finally:
+                with self._condition:
+                    self._async_waiters.discard(waiter)
+
+
+@lru_cache(maxsize=None)
+def get_event_hub():
+    """Instancia compartida del backend configurado en `ORDERS_EVENT_BACKEND`."""
+    return import_string(settings.ORDERS_EVENT_BACKEND)()
+
+
+def publish_order_event(order, event_type):
+    """
+    Publica un cambio de la orden a su solicitante, proveedor y recipient, una
+    vez confirmada la transacción en curso.
+    """
+    user_ids = {order.applicant_id, order.supplier_id, order.recipient_id} - {None}
+    payload = {'type': event_type, 'order_id': order.pk, 'status': order.status}
+    transaction.on_commit(lambda: get_event_hub().publish(user_ids, payload))
@@ -0,0 +1,136 @@
+# orders/export.py
+import csv
+import json
+from datetime import datetime, time
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Order, items_prefetch
+
+CSV_COLUMNS = [
+    'order_id', 'status', 'created_at', 'completed_at', 'applicant', 'supplier', 'recipient',
+    'total_price', 'rating', 'item_id', 'service_id', 'service_name', 'quantity', 'unit_price',
+]
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class ExportFilterError(ValueError):
+    """Filtro de exportación inválido."""
+
+
+def _parse_bound(value, end_of_day=False):
+    """Acepta una fecha (`2024-05-01`) o una fecha y hora ISO 8601."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ExportFilterError(f"Fecha inválida: {value}")
+        moment = datetime.combine(day, time.max if end_of_day else time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def export_queryset(created_from=None, created_to=None, status=None, supplier=None):
+    """
+    Órdenes a exportar, en orden de id. Los filtros vienen como texto (query
+    params u opciones de consola) y se validan aquí.
+    """
+    orders = Order.objects.select_related('applicant', 'supplier', 'recipient').order_by('id')
+    try:
+        if created_from:
+            orders = orders.filter(created_at__gte=_parse_bound(created_from))
+        if created_to:
+            orders = orders.filter(created_at__lte=_parse_bound(created_to, end_of_day=True))
+        if status:
+            statuses = status.split(',')
+            valid = {choice for choice, _label in Order._meta.get_field('status').choices}
+            if not set(statuses) <= valid:
+                raise ExportFilterError(f"Estado inválido: {status}")
+            orders = orders.filter(status__in=statuses)
+        if supplier:
+            orders = orders.filter(supplier_id=int(supplier))
+    except (TypeError, ValueError) as exc:
+        raise ExportFilterError(str(exc)) from exc
+    return orders
+
+
+def iter_orders(orders, chunk_size=None):
+    """
+    Recorre las órdenes por bloques de `chunk_size` con sus ítems precargados
+    bloque a bloque, de modo que la memoria no depende del total exportado.
+    """
+    chunk_size = chunk_size or settings.ORDERS_EXPORT_CHUNK_SIZE
+    return orders.prefetch_related(items_prefetch()).iterator(chunk_size=chunk_size)
+
+
+def _username(user):
+    return user.username if user is not None else None
+
+
+def _isoformat(moment):
+    return moment.isoformat() if moment is not None else None
+
+
+def order_record(order):
+    return {
+        'order_id': order.pk,
+        'status': order.status,
+        'created_at': _isoformat(order.created_at),
+        'completed_at': _isoformat(order.completed_at),
+        'applicant': _username(order.applicant),
+        'supplier': _username(order.supplier),
+        'recipient': _username(order.recipient),
+        'total_price': order.total_price,
+        'rating': order.rating,
+    }
+
+
+def item_record(item):
+    return {
+        'item_id': item.pk,
+        'service_id': item.service_id,
+        'service_name': item.service.name,
+        'quantity': item.quantity,
+        'unit_price': item.unit_price,
+    }
+
+
+class _Echo:
+    """Pseudo-archivo para que `csv.writer` devuelva cada línea en vez de acumularla."""
+    def write(self, value):
+        return value
+
+
+def csv_lines(orders):
+    """Una línea por ítem (las órdenes sin ítems salen en una línea con las columnas del ítem vacías)."""
+    writer = csv.DictWriter(_Echo(), fieldnames=CSV_COLUMNS)
+    yield writer.writeheader()
+    for order in orders:
+        record = order_record(order)
+        items = order.items.all()
+        if not items:
+            yield writer.writerow(record)
+        for item in items:
+            yield writer.writerow({**record, **item_record(item)})
+
+
+def ndjson_lines(orders):
+    """Una línea JSON por orden, con sus ítems anidados."""
+    for order in orders:
+        record = order_record(order)
+        record['items'] = [item_record(item) for item in order.items.all()]
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def export_lines(export_format, orders):
+    if export_format == 'csv':
+        return csv_lines(orders)
+    if export_format == 'ndjson':
+        return ndjson_lines(orders)
+    raise ExportFilterError(f"Formato inválido: {export_format}")
@@ -0,0 +1,50 @@
+# orders/fanout.py
+from collections import defaultdict
+
+from django.db import transaction
+
+from services.counters import apply_service_usage, combine_usage, units_by_service, usage_from_items
+from users.stats import record_cancelled, record_completed, record_placed
+from .jobs import job
+from .models import Order, OrderItem
+
+
+def _usage_by_order(order_ids):
+    items_by_order = defaultdict(list)
+    for order_id, service_id, quantity in OrderItem.objects.filter(order_id__in=order_ids).values_list(
+        'order_id', 'service_id', 'quantity',
+    ):
+        items_by_order[order_id].append((service_id, quantity))
+    return {order_id: usage_from_items(items) for order_id, items in items_by_order.items()}
+
+
+def _units_by_applicant(orders, usage_by_order):
+    usages = defaultdict(list)
+    for order in orders:
+        usages[order.applicant_id].append(usage_by_order.get(order.pk, {}))
+    return {applicant_id: units_by_service(combine_usage(usage)) for applicant_id, usage in usages.items()}
+
+
+@job('orders.fanout')
+def order_fanout(event, order_ids):
+    """
+    Efectos secundarios no críticos de un cambio de estado de órdenes: la
+    popularidad de los servicios y los resúmenes de usuarios. Corre en una
+    transacción propia, así que un reintento nunca aplica la mitad del trabajo.
+    """
+    with transaction.atomic():
+        orders = list(Order.objects.filter(pk__in=order_ids).only(
+            'id', 'applicant_id', 'supplier_id', 'total_price', 'created_at', 'completed_at',
+        ))
+        if event == 'completed':
+            record_completed(orders)
+            return
+
+        usage_by_order = _usage_by_order(order_ids)
+        sign = 1 if event == 'placed' else -1
+        apply_service_usage(combine_usage(usage_by_order.values()), sign=sign)
+        units = _units_by_applicant(orders, usage_by_order)
+        if event == 'placed':
+            record_placed(orders, units)
+        else:
+            record_cancelled(orders, units)
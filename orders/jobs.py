@@ -0,0 +1,178 @@
+# orders/jobs.py
+"""
+Cola de trabajos en proceso para efectos secundarios que no necesitan correr
+dentro de la petición (contadores, estadísticas, notificaciones).
+
+Los trabajos se registran por nombre con `@job` y se encolan con `enqueue()`.
+El backend se elige con `ORDERS_JOB_BACKEND`:
+
+- `ThreadPoolJobBackend`: encola al confirmar la transacción y ejecuta en un
+  pool de hilos del proceso, con reintentos y espera exponencial.
+- `DatabaseJobBackend`: guarda el trabajo en la tabla `QueuedJob` dentro de la
+  misma transacción que lo origina (no se pierde si el proceso cae); lo
+  ejecuta el comando `run_jobs`.
+- `InlineJobBackend`: ejecuta al confirmar la transacción en el mismo hilo,
+  con los mismos reintentos (la petición espera entre intentos); pensado para
+  pruebas, desarrollo y SQLite.
+
+No depende de Redis ni Celery. Los argumentos deben ser serializables a JSON.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+class Job:
+    def __init__(self, func, name, retries):
+        self.func = func
+        self.name = name
+        self.retries = retries
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+
+def job(name, retries=None):
+    """Registra una función como trabajo encolable bajo `name`."""
+    def decorator(func):
+        _registry[name] = Job(func, name, retries if retries is not None else settings.ORDERS_JOB_RETRIES)
+        return func
+    return decorator
+
+
+def get_job(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f"No hay un trabajo registrado como {name!r}.")
+
+
+def enqueue(name, **kwargs):
+    """Encola el trabajo `name`; solo corre si la transacción en curso se confirma."""
+    get_job(name)  # Falla temprano con nombres desconocidos
+    get_job_backend().enqueue(name, kwargs)
+
+
+def backoff(attempt):
+    """Segundos de espera antes del intento `attempt` (1 = primer reintento)."""
+    return settings.ORDERS_JOB_BACKOFF * 2 ** (attempt - 1)
+
+
+def run_job(name, kwargs):
+    """Ejecuta `name` con reintentos y espera exponencial; los fallos se registran, no se propagan."""
+    registered = get_job(name)
+    attempt = 0
+    while True:
+        try:
+            registered(**kwargs)
+            return
+        except Exception:
+            attempt += 1
+            if attempt > registered.retries:
+                logger.exception("El trabajo %s falló tras %s intentos", name, attempt)
+                return
+            logger.warning("El trabajo %s falló; reintento %s", name, attempt, exc_info=True)
+            time.sleep(backoff(attempt))
+            close_old_connections()
+
+
+class InlineJobBackend:
+    def enqueue(self, name, kwargs):
+        # robust: la transacción ya se confirmó, un fallo del trabajo no debe convertirse en un 500
+        transaction.on_commit(lambda: self.run(name, kwargs), robust=True)
+
+    def run(self, name, kwargs):
+        run_job(name, kwargs)
+
+
+class ThreadPoolJobBackend:
+    def __init__(self, workers=None):
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers or settings.ORDERS_JOB_WORKERS, thread_name_prefix='orders-jobs',
+        )
+
+    def enqueue(self, name, kwargs):
+        transaction.on_commit(lambda: self.executor.submit(self.run, name, kwargs))
+
+    def run(self, name, kwargs):
+        try:
+            run_job(name, kwargs)
+        finally:
+            # Cada hilo del pool tiene su propia conexión: no dejarla abierta entre trabajos
+            connection.close()
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+
+class DatabaseJobBackend:
+    def enqueue(self, name, kwargs):
+        from .models import QueuedJob
+        # Sin on_commit: la fila es parte de la transacción que origina el trabajo
+        QueuedJob.objects.create(name=name, payload=kwargs)
+
+    def claim(self, limit):
+        """Toma hasta `limit` trabajos vencidos; con SKIP LOCKED varios workers no se pisan."""
+        from .models import QueuedJob
+        pending = QueuedJob.objects.filter(status='pending', run_after__lte=timezone.now()).order_by('run_after', 'pk')
+        if connection.features.has_select_for_update_skip_locked:
+            pending = pending.select_for_update(skip_locked=True)
+        return list(pending[:limit])
+
+    def run_pending(self, limit=100):
+        """Ejecuta un lote de trabajos pendientes y devuelve cuántos procesó."""
+        with transaction.atomic():
+            claimed = self.claim(limit)
+            for queued in claimed:
+                self.run(queued)
+        return len(claimed)
+
+    def run(self, queued):
+        registered = _registry.get(queued.name)
+        try:
+            # Savepoint por trabajo: un fallo no deshace a los demás del lote
+            with transaction.atomic():
+                get_job(queued.name)(**queued.payload)
+        except Exception as exc:
+            queued.attempts += 1
+            queued.last_error = repr(exc)
+            retries = registered.retries if registered is not None else 0
+            if queued.attempts > retries:
+                queued.status = 'failed'
+                logger.exception("El trabajo %s (#%s) falló tras %s intentos", queued.name, queued.pk, queued.attempts)
+            else:
+                queued.run_after = timezone.now() + timedelta(seconds=backoff(queued.attempts))
+            queued.save(update_fields=['attempts', 'last_error', 'status', 'run_after'])
+        else:
+            queued.delete()
+
+
+_backend_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_job_backend():
+    """Instancia compartida del backend configurado en `ORDERS_JOB_BACKEND`."""
+    return import_string(settings.ORDERS_JOB_BACKEND)()
+
+
+def reset_job_backend():
+    """Descarta el backend actual (esperando a que el pool termine lo encolado)."""
+    with _backend_lock:
+        if get_job_backend.cache_info().currsize:
+            backend = get_job_backend()
+            if hasattr(backend, 'shutdown'):
+                backend.shutdown()
+        get_job_backend.cache_clear()
@@ -0,0 +1,37 @@
+# orders/management/commands/bench_asgi.py
+from django.core.management.base import BaseCommand
+
+from benchmarks.concurrency import run_asgi, run_wsgi
+from benchmarks.environment import benchmark_database
+from benchmarks.factories import seed
+from benchmarks.stats import format_table
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara WSGI (vistas sync en un pool de hilos) con ASGI (vistas async) "
+        "sirviendo /api/orders/in_progress_orders/ a muchos clientes lentos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=100, help="Clientes concurrentes.")
+        parser.add_argument('--requests', type=int, default=5, help="Peticiones por cliente.")
+        parser.add_argument('--threads', type=int, default=8, help="Tamaño del pool de hilos WSGI.")
+        parser.add_argument('--client-delay', type=float, default=0.25, help="Segundos que tarda cada cliente en leer la respuesta.")
+        parser.add_argument('--orders', type=int, default=500)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            dataset = seed(suppliers=1, orders=options['orders'])
+            authorization = f'Bearer {dataset.suppliers[0].get_token().access_token}'
+            path = '/api/orders/in_progress_orders/'
+            args = (path, authorization, options['clients'], options['requests'])
+
+            wsgi, wsgi_elapsed = run_wsgi(*args, options['threads'], options['client_delay'])
+            asgi, asgi_elapsed = run_asgi(*args, options['client_delay'])
+
+        summary = {**wsgi.summary(), **asgi.summary()}
+        self.stdout.write(format_table(summary))
+        total = options['clients'] * options['requests']
+        self.stdout.write(f'wsgi ({options["threads"]} hilos): {total / wsgi_elapsed:.1f} req/s en total')
+        self.stdout.write(f'asgi: {total / asgi_elapsed:.1f} req/s en total')
@@ -0,0 +1,35 @@
+# orders/management/commands/bench_assignment.py
+import json
+
+from django.core.management.base import BaseCommand
+
+from benchmarks.scheduling import compare, format_table
+
+
+class Command(BaseCommand):
+    help = (
+        "Simula la cola de trabajo de los proveedores y compara los tiempos de "
+        "espera al asignar por órdenes históricas (order_count) y por minutos "
+        "pendientes (capacity). No usa la base de datos; los tiempos son en minutos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--suppliers', type=int, default=10)
+        parser.add_argument('--orders', type=int, default=5000)
+        parser.add_argument('--utilisation', type=float, default=0.85, help="Fracción del tiempo que los proveedores pasan ocupados.")
+        parser.add_argument('--history', type=int, default=200, help="Máximo de órdenes históricas con que parte cada proveedor.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Archivo JSON donde guardar los resultados.")
+
+    def handle(self, *args, **options):
+        params = {key: options[key] for key in ('suppliers', 'orders', 'utilisation', 'history', 'seed')}
+        results = compare(**params)
+
+        self.stdout.write(format_table(results))
+        baseline, capacity = results['order_count']['wait_p95_min'], results['capacity']['wait_p95_min']
+        if baseline:
+            self.stdout.write(f"espera p95 con capacity: {100 * (capacity - baseline) / baseline:+.1f}% respecto de order_count")
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump({'meta': params, 'policies': results}, output, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
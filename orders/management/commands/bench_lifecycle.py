@@ -0,0 +1,65 @@
+# orders/management/commands/bench_lifecycle.py
+import platform
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+
+from benchmarks.environment import benchmark_database
+from reactions.db import database_profile
+from benchmarks.factories import seed
+from benchmarks.lifecycle import LifecycleBenchmark
+from benchmarks.stats import format_table, load_baseline, save_results
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark del ciclo de vida de órdenes (login, creación, listados, "
+        "cancelación y completado) sobre una base de datos de prueba sembrada. "
+        "Reporta p50/p95/p99, throughput y consultas por endpoint y guarda el "
+        "resultado en JSON para compararlo con una línea base. Para comparar "
+        "perfiles de base de datos, correrlo con REACTIONS_DB_PROFILE=sqlite y "
+        "con REACTIONS_DB_PROFILE=postgres, pasando la primera corrida como --baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--applicants', type=int, default=50)
+        parser.add_argument('--suppliers', type=int, default=10)
+        parser.add_argument('--recipients', type=int, default=50)
+        parser.add_argument('--orders', type=int, default=1_000, help="Órdenes históricas sembradas.")
+        parser.add_argument('--iterations', type=int, default=100, help="Ciclos completos a ejecutar.")
+        parser.add_argument('--logins', type=int, default=20)
+        parser.add_argument('--output', default='bench_lifecycle.json')
+        parser.add_argument('--baseline', help="JSON de una corrida anterior para comparar.")
+
+    def handle(self, *args, **options):
+        volumes = {key: options[key] for key in ('applicants', 'suppliers', 'recipients', 'orders', 'iterations', 'logins')}
+        # Sin throttling de login: el benchmark hace muchas peticiones desde la misma IP
+        no_throttle = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'login_ip': None, 'login_username': None}}
+
+        with benchmark_database(), override_settings(REST_FRAMEWORK=no_throttle):
+            dataset = seed(
+                applicants=options['applicants'],
+                suppliers=options['suppliers'],
+                recipients=options['recipients'],
+                orders=options['orders'],
+            )
+            summary = LifecycleBenchmark(dataset).run(options['iterations'], logins=options['logins'])
+            metadata = {
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'database': connection.vendor,
+                'database_profile': database_profile(),
+                'database_options': {
+                    key: value for key, value in connection.settings_dict.items()
+                    if key in ('CONN_MAX_AGE', 'OPTIONS')
+                },
+                'python': platform.python_version(),
+                'volumes': volumes,
+            }
+
+        baseline = load_baseline(options['baseline']) if options['baseline'] else None
+        self.stdout.write(format_table(summary, baseline))
+        save_results(options['output'], metadata, summary)
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
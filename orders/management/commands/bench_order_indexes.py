@@ -0,0 +1,93 @@
+# orders/management/commands/bench_order_indexes.py
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from benchmarks.environment import benchmark_database
+from orders.models import Order, default_time_estimated
+from users.models import User
+
+STATUSES = ['in_progress', 'completed', 'cancelled']
+
+
+class Command(BaseCommand):
+    help = (
+        "Siembra una base de datos de prueba desechable con órdenes y muestra el plan "
+        "de ejecución y el tiempo de cada patrón de consulta con y sin los índices "
+        "compuestos de Order y User."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1_000_000)
+        parser.add_argument('--suppliers', type=int, default=200)
+        parser.add_argument('--applicants', type=int, default=2_000)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=20, help="Ejecuciones por patrón para medir el tiempo.")
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            self.seed(options)
+            patterns = self.patterns()
+            indexes = [(Order, index) for index in Order._meta.indexes if index.name != 'order_created_id_idx']
+            indexes += [(User, index) for index in User._meta.indexes]
+
+            with connection.schema_editor() as editor:
+                for model, index in indexes:
+                    editor.remove_index(model, index)
+            self.report('SIN índices compuestos', patterns, options['repeat'])
+
+            with connection.schema_editor() as editor:
+                for model, index in indexes:
+                    editor.add_index(model, index)
+            self.report('CON índices compuestos', patterns, options['repeat'])
+
+    def seed(self, options):
+        started = time.perf_counter()
+        suppliers = User.objects.bulk_create(
+            User(username=f'bench-supplier-{i}', user_type='supplier', order_count=random.randint(0, 500))
+            for i in range(options['suppliers'])
+        )
+        applicants = User.objects.bulk_create(
+            User(username=f'bench-applicant-{i}', user_type='applicant') for i in range(options['applicants'])
+        )
+        self.supplier_id = suppliers[0].pk
+        self.applicant_id = applicants[0].pk
+
+        remaining = options['orders']
+        while remaining > 0:
+            batch = min(remaining, options['batch_size'])
+            Order.objects.bulk_create(
+                Order(
+                    applicant=random.choice(applicants),
+                    supplier=random.choice(suppliers),
+                    status=random.choices(STATUSES, weights=[1, 8, 1])[0],
+                    time_estimated=default_time_estimated(),
+                )
+                for _ in range(batch)
+            )
+            remaining -= batch
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.stdout.write(f"Sembradas {options['orders']} órdenes en {time.perf_counter() - started:.1f}s")
+
+    def patterns(self):
+        history = ('-created_at', '-id')
+        return {
+            'in_progress_orders': Order.objects.filter(supplier_id=self.supplier_id, status='in_progress').order_by(*history)[:20],
+            'canceled_or_completed_orders': Order.objects.filter(supplier_id=self.supplier_id).exclude(status='in_progress').order_by(*history)[:20],
+            'current_orders': Order.objects.filter(applicant_id=self.applicant_id, status='in_progress').order_by(*history)[:20],
+            'no_current_orders': Order.objects.filter(applicant_id=self.applicant_id).exclude(status='in_progress').order_by(*history)[:20],
+            'least_loaded_supplier': User.objects.filter(user_type='supplier').order_by('order_count')[:1],
+        }
+
+    def report(self, title, patterns, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {title}'))
+        for name, queryset in patterns.items():
+            started = time.perf_counter()
+            for _ in range(repeat):
+                list(queryset.all())
+            elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+            self.stdout.write(self.style.SUCCESS(f'{name}: {elapsed_ms:.2f} ms'))
+            self.stdout.write(queryset.explain())
@@ -0,0 +1,37 @@
+# orders/management/commands/export_orders.py
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.export import FORMATS, ExportFilterError, export_lines, export_queryset, iter_orders
+
+
+class Command(BaseCommand):
+    help = "Exporta órdenes con sus ítems en CSV o NDJSON, por bloques y sin cargar todo en memoria."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', dest='export_format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--output', help="Archivo de salida (por defecto, la salida estándar).")
+        parser.add_argument('--from', dest='created_from', help="Fecha mínima de creación (YYYY-MM-DD o ISO 8601).")
+        parser.add_argument('--to', dest='created_to', help="Fecha máxima de creación (YYYY-MM-DD o ISO 8601).")
+        parser.add_argument('--status', help="Estados separados por coma.")
+        parser.add_argument('--supplier', help="Id del proveedor.")
+        parser.add_argument('--chunk-size', type=int, help="Órdenes por bloque (por defecto ORDERS_EXPORT_CHUNK_SIZE).")
+
+    def handle(self, *args, **options):
+        try:
+            orders = export_queryset(
+                created_from=options['created_from'],
+                created_to=options['created_to'],
+                status=options['status'],
+                supplier=options['supplier'],
+            )
+        except ExportFilterError as exc:
+            raise CommandError(str(exc))
+
+        lines = export_lines(options['export_format'], iter_orders(orders, options['chunk_size']))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(lines)
+            self.stderr.write(self.style.SUCCESS(f"Exportación escrita en {options['output']}."))
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,15 @@
+# orders/management/commands/purge_idempotency_keys.py
+from django.core.management.base import BaseCommand
+
+from orders.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Elimina por lotes las Idempotency-Key más antiguas que ORDERS_IDEMPOTENCY_TTL."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10_000, help="Claves por DELETE.")
+
+    def handle(self, *args, **options):
+        deleted = purge_expired(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{deleted} claves de idempotencia eliminadas."))
@@ -0,0 +1,30 @@
+# orders/management/commands/run_jobs.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.jobs import DatabaseJobBackend
+
+
+class Command(BaseCommand):
+    help = "Ejecuta los trabajos encolados en la base de datos (ORDERS_JOB_BACKEND = DatabaseJobBackend)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Procesa lo pendiente y termina.")
+        parser.add_argument('--batch-size', type=int, default=100, help="Trabajos tomados por transacción.")
+        parser.add_argument('--interval', type=float, default=1.0, help="Segundos de espera cuando no hay trabajos.")
+
+    def handle(self, *args, **options):
+        backend = DatabaseJobBackend()
+        processed = 0
+        try:
+            while True:
+                claimed = backend.run_pending(options['batch_size'])
+                processed += claimed
+                if not claimed:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"{processed} trabajos procesados."))
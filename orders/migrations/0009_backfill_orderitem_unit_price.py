@@ -0,0 +1,31 @@
+from django.db import migrations
+from django.db.models import Max, OuterRef, Subquery
+
+BATCH_SIZE = 5000
+
+
+def backfill_unit_price(apps, schema_editor):
+    """
+    Completa `unit_price` de los ítems existentes con el precio actual del
+    servicio (el histórico no quedó guardado), por rangos de ids para no
+    bloquear la tabla completa en una sola sentencia.
+    """
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    Service = apps.get_model('services', 'Service')
+    last_id = OrderItem.objects.aggregate(last=Max('id'))['last'] or 0
+    price = Subquery(Service.objects.filter(pk=OuterRef('service_id')).values('price')[:1])
+    for start in range(0, last_id, BATCH_SIZE):
+        OrderItem.objects.filter(id__gt=start, id__lte=start + BATCH_SIZE, unit_price=0).update(unit_price=price)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('orders', '0008_orderitem_unit_price'),
+        ('services', '0004_service_quantity_total'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_unit_price, migrations.RunPython.noop),
+    ]
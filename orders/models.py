@@ -1,5 +1,6 @@
 # orders/models.py
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
 from django.conf import settings  # Para importar el modelo de User
 from services.models import Service
 from django.utils import timezone
@@ -9,6 +10,19 @@ import random
 def default_time_estimated():
     return random.randint(10, 120)
 
+def items_prefetch():
+    """Prefetch de los ítems con su servicio, tal como los serializa OrderSerializer."""
+    return models.Prefetch('items', queryset=OrderItem.objects.select_related('service'))
+
+class OrderQuerySet(models.QuerySet):
+    def with_details(self):
+        """
+        Carga en bloque todo lo que toca OrderSerializer (solicitante, proveedor,
+        ítems y servicios), de modo que serializar n órdenes cuesta un número
+        constante de consultas.
+        """
+        return self.select_related('applicant', 'supplier').prefetch_related(items_prefetch())
+
 class Order(models.Model):
     applicant = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='applicant_orders')
     supplier = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='supplier_orders')
@@ -26,45 +40,167 @@ class Order(models.Model):
     total_price = models.PositiveIntegerField(default=0)
     is_rated = models.BooleanField(default=False)
 
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Respaldan el orden de la paginación por cursor del historial
+            models.Index(fields=['created_at', 'id'], name='order_created_id_idx'),
+            # Historial por proveedor/solicitante filtrado por estado
+            models.Index(fields=['supplier', 'status', 'created_at'], name='order_supplier_status_idx'),
+            models.Index(fields=['applicant', 'status', 'created_at'], name='order_applicant_status_idx'),
+            # Órdenes vigentes: índices parciales más pequeños donde el backend los soporta
+            models.Index(
+                fields=['supplier', 'created_at'],
+                condition=models.Q(status='in_progress'),
+                name='order_supplier_active_idx',
+            ),
+            models.Index(
+                fields=['applicant', 'created_at'],
+                condition=models.Q(status='in_progress'),
+                name='order_applicant_active_idx',
+            ),
+        ]
+
     def __str__(self):
         return f"Order #{self.id} by {self.applicant.username}"
     
     def assign_supplier(self):
         """
-        Asigna automáticamente el proveedor con menos órdenes completadas.
+        Asigna automáticamente el proveedor con menos órdenes usando el motor
+        configurado en `ORDERS_SUPPLIER_ASSIGNER`.
         """
-        from users.models import User
-        available_suppliers = User.objects.filter(user_type='supplier').order_by('order_count')
-        if available_suppliers.exists():
-            self.supplier = available_suppliers.first()
-            self.save()
+        from .assignment import get_supplier_assigner
+        assigner = get_supplier_assigner()
+        with assigner.guard(), transaction.atomic():
+            supplier = assigner.assign(minutes=self.time_estimated)
+            if supplier is not None:
+                self.supplier = supplier
+                self.save()
 
     def cancel(self):
-        """Método para que el solicitante cancele un pedido."""
-        self.status = 'cancelled'
-        self.save()
+        """Método para que el solicitante cancele un pedido.
+        La orden deja de contar en la carga del proveedor asignado; la
+        popularidad de sus servicios y las estadísticas se ajustan en la cola de
+        trabajos (ver orders/fanout.py). Como `complete()`, el cambio de estado
+        es un UPDATE condicionado, así que si otra petición lo completó o
+        canceló antes devuelve False sin liberar nada."""
+        from .assignment import get_supplier_assigner
+        from .events import publish_order_event
+        from .jobs import enqueue
+        assigner = get_supplier_assigner()
+        now = timezone.now()
+        with assigner.guard(), transaction.atomic():
+            cancelled = Order.objects.filter(pk=self.pk, status__in=['pending', 'in_progress']).update(
+                status='cancelled', updated_at=now,
+            )
+            if not cancelled:
+                return False
+            self.status, self.updated_at = 'cancelled', now
+            if self.supplier_id:
+                assigner.release(self.supplier_id, self.time_estimated)
+            enqueue('orders.fanout', event='cancelled', order_ids=[self.pk])
+            publish_order_event(self, 'order.cancelled')
+        return True
 
     def complete(self):
         """Método para que el proveedor marque un pedido como completado.
-        Restar presupuesto del solicitante y sumar al proveedor."""
-        total_price = sum(item.service.price * item.quantity for item in self.items.all())
-
-        if self.supplier:
-            self.supplier.budget += total_price
-            self.supplier.save()
+        El proveedor recibe el `total_price` guardado al crear el pedido (ya
+        descontado al solicitante), no el precio actual de los servicios.
+        El cambio de estado es un UPDATE condicionado a `in_progress`, así que
+        si otra petición lo completó o canceló antes devuelve False sin liquidar
+        nada."""
+        from .assignment import get_supplier_assigner
+        from .events import publish_order_event
+        from .jobs import enqueue
+        from .transitions import settle_completions
+        now = timezone.now()
+        with get_supplier_assigner().guard(), transaction.atomic():
+            settled = Order.objects.filter(pk=self.pk, status='in_progress').update(
+                status='completed', completed_at=now, updated_at=now,
+            )
+            if not settled:
+                return False
+            self.status, self.completed_at, self.updated_at = 'completed', now, now
+            settle_completions([self])
+            enqueue('orders.fanout', event='completed', order_ids=[self.pk])
+            publish_order_event(self, 'order.completed')
+        return True
 
-        if self.recipient:
-            self.order_count += 1
-            self.recipient.save()
-
-        self.status = 'completed'
-        self.completed_at = timezone.now()
-        self.save()
+    def rate(self, rating):
+        """Método para que el solicitante califique un pedido completado.
+        Actualiza el promedio del proveedor de forma incremental, sin recorrer
+        sus órdenes. Devuelve False si el pedido ya estaba calificado."""
+        from django.db.models import F, Value
+        from django.db.models.functions import Coalesce
+        from users.models import User
+        with transaction.atomic():
+            # El UPDATE condicionado a is_rated evita calificar dos veces aunque lleguen peticiones simultáneas
+            marked = Order.objects.filter(pk=self.pk, status='completed', is_rated=False).update(
+                rating=rating, is_rated=True, updated_at=timezone.now(),
+            )
+            if not marked:
+                return False
+            if self.supplier_id:
+                # Media móvil en una sola sentencia; el UPDATE bloquea la fila del proveedor
+                User.objects.filter(pk=self.supplier_id).update(
+                    rating=(Coalesce(F('rating'), Value(0.0)) * F('rating_count') + rating) / (F('rating_count') + 1.0),
+                    rating_count=F('rating_count') + 1,
+                )
+        self.rating = rating
+        self.is_rated = True
+        return True
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, related_name='items', on_delete=models.CASCADE)
     service = models.ForeignKey(Service, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)  # Cantidad de este tipo de servicio en el pedido
+    unit_price = models.PositiveIntegerField(default=0)  # Precio del servicio al momento de crear el pedido
+
+    def __str__(self):
+        return f"{self.quantity} x {self.service.name} (Order #{self.order.id})"
+
+class IdempotencyKey(models.Model):
+    """
+    Respuesta guardada de un POST con cabecera `Idempotency-Key`, para que los
+    reintentos del cliente reciban el primer resultado sin volver a crear el
+    pedido (ver orders/idempotency.py).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)  # sha256 del método, la ruta y el cuerpo
+    status_code = models.PositiveSmallIntegerField()
+    response_body = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_unique'),
+        ]
+        indexes = [
+            # Purga por antigüedad
+            models.Index(fields=['created_at'], name='idempotency_created_idx'),
+        ]
+
+
+class QueuedJob(models.Model):
+    """Trabajo pendiente del backend durable de orders/jobs.py."""
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=(
+        ('pending', 'Pending'),
+        ('failed', 'Failed'),
+    ), default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Los workers toman los pendientes vencidos en orden
+            models.Index(fields=['status', 'run_after'], name='queued_job_due_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.quantity} x {self.service.name} (Order #{self.order.id})"
\ No newline at end of file
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,242 @@
+# orders/placement.py
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, prefetch_related_objects
+
+from services.catalog import get_services
+from users.models import User
+from .assignment import get_supplier_assigner
+from .events import publish_order_event
+from .jobs import enqueue
+from .models import Order, OrderItem, default_time_estimated, items_prefetch
+
+
+class OrderPlacementError(Exception):
+    """
+    Error de negocio al crear un pedido. La vista lo traduce a una respuesta HTTP.
+    """
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def place_order(applicant, services_data, recipient_id):
+    """
+    Crea un pedido completo para el solicitante.
+
+    Los servicios se resuelven desde el catálogo en memoria, los ítems se insertan con
+    `bulk_create` y los contadores y presupuestos se actualizan con expresiones
+    `F()` dentro de una única transacción, por lo que el número de consultas no
+    depende de la cantidad de ítems y nunca queda un pedido a medio construir.
+
+    Todo el proceso corre dentro de `guard()` del motor de asignación, que en
+    los motores que lo requieren serializa las colocaciones concurrentes.
+    """
+    assigner = get_supplier_assigner()
+    with assigner.guard():
+        return _place_order(assigner, applicant, services_data, recipient_id)
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _check_services_data(services_data):
+    if not services_data:
+        raise OrderPlacementError("Se requiere al menos un servicio.")
+    if not isinstance(services_data, list) or not all(isinstance(service_data, dict) for service_data in services_data):
+        raise OrderPlacementError("Los servicios deben ser una lista de objetos.")
+
+    for service_data in services_data:
+        if not _is_id(service_data.get('service_id')):
+            raise OrderPlacementError("Cada servicio requiere un service_id numérico.")
+        quantity = service_data.get('quantity', 1)
+        if not _is_id(quantity) or quantity < 0:
+            raise OrderPlacementError("La cantidad debe ser un número entero mayor o igual a 0.")
+
+    # Validación para asegurarse de que al menos un servicio tenga cantidad > 0
+    if all(service_data.get('quantity', 0) == 0 for service_data in services_data):
+        raise OrderPlacementError("Debe haber al menos un servicio con cantidad mayor que 0.")
+
+
+def _build_items(services_data, services):
+    """Arma los ítems (sin orden) y calcula su precio total con los servicios ya resueltos."""
+    items = []
+    total_price = 0
+    for service_data in services_data:
+        service = services.get(service_data['service_id'])
+        if service is None:
+            raise OrderPlacementError(f"El servicio con id {service_data['service_id']} no existe.", status_code=404)
+
+        quantity = service_data.get('quantity', 1)
+        total_price += service.price * quantity  # Sumar el precio al total
+        items.append(OrderItem(service=service, quantity=quantity, unit_price=service.price))
+    return items, total_price
+
+
+def _place_order(assigner, applicant, services_data, recipient_id):
+    _check_services_data(services_data)
+
+    # Validar el recipient; igual que en los lotes, el id debe ser un entero
+    recipient = User.objects.filter(id=recipient_id).first() if _is_id(recipient_id) else None
+    if recipient is None:
+        raise OrderPlacementError("El recipient no existe.", status_code=404)
+
+    # Resolver los servicios y sus precios desde el catálogo en memoria
+    services = get_services({service_data['service_id'] for service_data in services_data})
+    items, total_price = _build_items(services_data, services)
+
+    with transaction.atomic():
+        # Cada quinto pedido del solicitante es gratis (contando el pedido actual)
+        applicant_order_count = Order.objects.filter(applicant=applicant).count() + 1
+        if applicant_order_count % 5 == 0:
+            total_price = 0  # Orden gratis
+
+        # Descontar el presupuesto solo si alcanza; la condición evita pisar escrituras concurrentes
+        charged = User.objects.filter(pk=applicant.pk, budget__gte=total_price).update(
+            budget=F('budget') - total_price,
+            order_count=F('order_count') + 1,
+        )
+        if not charged:
+            raise OrderPlacementError("El precio total excede tu presupuesto disponible.")
+
+        # Asignar el proveedor con menos demanda; el motor también incrementa su
+        # order_count y sus minutos pendientes
+        time_estimated = default_time_estimated()
+        supplier = assigner.assign(minutes=time_estimated)
+        if supplier is None:
+            raise OrderPlacementError("No hay proveedores disponibles.")
+
+        order = Order.objects.create(
+            applicant=applicant,
+            supplier=supplier,
+            recipient=recipient,
+            total_price=total_price,
+            time_estimated=time_estimated,
+        )
+        for item in items:
+            item.order = order
+        OrderItem.objects.bulk_create(items)
+
+        # Popularidad de los servicios y estadísticas: fuera de la petición, al confirmar
+        enqueue('orders.fanout', event='placed', order_ids=[order.pk])
+        publish_order_event(order, 'order.created')
+
+    prefetch_related_objects([order], items_prefetch())
+    return order
+
+
+def place_order_batch(applicant, entries):
+    """
+    Crea varios pedidos del mismo solicitante en una sola transacción.
+
+    Cada entrada tiene la forma `{'recipient_id': ..., 'services': [...]}`. Las
+    entradas inválidas (recipient o servicio inexistente, sin cantidades) se
+    informan individualmente y no detienen al resto; en cambio, el presupuesto
+    se revisa una sola vez contra el total del lote y, si no alcanza o no hay
+    proveedores, no se crea ningún pedido. Devuelve una lista con, por cada
+    entrada, la orden creada o el `OrderPlacementError` correspondiente.
+
+    El número de consultas es constante: recipients y servicios se validan en
+    bloque, los proveedores se reparten con `assign_many()` y las órdenes e
+    ítems se insertan con `bulk_create`.
+    """
+    max_size = settings.ORDERS_BATCH_MAX_SIZE
+    if not entries:
+        raise OrderPlacementError("Se requiere al menos un pedido.")
+    if len(entries) > max_size:
+        raise OrderPlacementError(f"Un lote admite como máximo {max_size} pedidos.")
+
+    assigner = get_supplier_assigner()
+    with assigner.guard():
+        return _place_order_batch(assigner, applicant, entries)
+
+
+def _place_order_batch(assigner, applicant, entries):
+    # Primero la forma de cada entrada, para que una mal formada no impida resolver las demás
+    results = []
+    checked = []  # (posición, entrada)
+    for entry in entries:
+        try:
+            _check_services_data(entry.get('services'))
+        except OrderPlacementError as exc:
+            results.append(exc)
+            continue
+        checked.append((len(results), entry))
+        results.append(None)
+
+    recipients = User.objects.in_bulk({
+        entry.get('recipient_id') for _position, entry in checked if _is_id(entry.get('recipient_id'))
+    })
+    services = get_services({
+        service_data['service_id'] for _position, entry in checked for service_data in entry['services']
+    })
+
+    valid = []  # (posición, recipient, ítems, total)
+    for position, entry in checked:
+        recipient_id = entry.get('recipient_id')
+        try:
+            recipient = recipients.get(recipient_id) if _is_id(recipient_id) else None
+            if recipient is None:
+                raise OrderPlacementError("El recipient no existe.", status_code=404)
+            items, total_price = _build_items(entry['services'], services)
+        except OrderPlacementError as exc:
+            results[position] = exc
+            continue
+        valid.append((position, recipient, items, total_price))
+
+    if not valid:
+        return results
+
+    with transaction.atomic():
+        # Regla del quinto pedido gratis, aplicada en el orden de las entradas del lote
+        previous_orders = Order.objects.filter(applicant=applicant).count()
+        totals = [
+            0 if (previous_orders + number) % 5 == 0 else total_price
+            for number, (_position, _recipient, _items, total_price) in enumerate(valid, start=1)
+        ]
+        grand_total = sum(totals)
+
+        charged = User.objects.filter(pk=applicant.pk, budget__gte=grand_total).update(
+            budget=F('budget') - grand_total,
+            order_count=F('order_count') + len(valid),
+        )
+        if not charged:
+            raise OrderPlacementError("El precio total del lote excede tu presupuesto disponible.")
+
+        minutes = [default_time_estimated() for _ in valid]
+        suppliers = assigner.assign_many(len(valid), minutes)
+        if not suppliers:
+            raise OrderPlacementError("No hay proveedores disponibles.")
+
+        orders = [
+            Order(
+                applicant=applicant, supplier=supplier, recipient=recipient,
+                total_price=total_price, time_estimated=time_estimated,
+            )
+            for (_position, recipient, _items, _total), supplier, total_price, time_estimated
+            in zip(valid, suppliers, totals, minutes)
+        ]
+        if connection.features.can_return_rows_from_bulk_insert:
+            Order.objects.bulk_create(orders)
+        else:
+            # Sin RETURNING no hay ids para los ítems: se insertan una a una
+            for order in orders:
+                order.save()
+
+        all_items = []
+        for order, (_position, _recipient, items, _total) in zip(orders, valid):
+            for item in items:
+                item.order = order
+            all_items += items
+        OrderItem.objects.bulk_create(all_items)
+
+        enqueue('orders.fanout', event='placed', order_ids=[order.pk for order in orders])
+        for order in orders:
+            publish_order_event(order, 'order.created')
+
+    prefetch_related_objects(orders, items_prefetch())
+    for order, (position, *_rest) in zip(orders, valid):
+        results[position] = order
+    return results
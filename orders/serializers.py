@@ -1,5 +1,6 @@
 # orders/serializers.py
 from rest_framework import serializers
+from reactions.instrumentation import TimedListSerializer, TimedSerializerMixin
 from .models import Order, OrderItem
 
 class OrderRateSerializer(serializers.Serializer):
@@ -10,9 +11,9 @@ class OrderItemSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = OrderItem
-        fields = ['id', 'service_name', 'quantity', 'service']
+        fields = ['id', 'service_name', 'quantity', 'unit_price', 'service']
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
     applicant_username = serializers.ReadOnlyField(source='applicant.username')
     supplier_username = serializers.ReadOnlyField(source='supplier.username')
@@ -20,3 +21,4 @@ class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = ['id', 'applicant_username', 'supplier_username', 'status', 'time_estimated', 'created_at', 'updated_at', 'completed_at', 'items', 'total_price', 'is_rated']
+        list_serializer_class = TimedListSerializer
@@ -0,0 +1,37 @@
+# orders/signals.py
+from django.core.signals import setting_changed
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from users.models import User
+from .assignment import get_supplier_assigner
+from .events import get_event_hub
+from .jobs import reset_job_backend
+
+
+@receiver(post_save, sender=User)
+def sync_supplier_index(sender, instance, update_fields=None, **kwargs):
+    """
+    Mantiene el índice de carga del motor de asignación al día cuando se crea
+    un proveedor o se guarda su `order_count`/`user_type` directamente.
+    """
+    if update_fields is None or {'order_count', 'user_type'} & set(update_fields):
+        get_supplier_assigner().supplier_saved(instance)
+
+
+@receiver(setting_changed)
+def reset_supplier_assigner(setting, **kwargs):
+    if setting in ('ORDERS_SUPPLIER_ASSIGNER', 'ORDERS_SUPPLIER_INDEX_TTL'):
+        get_supplier_assigner.cache_clear()
+
+
+@receiver(setting_changed)
+def reset_event_hub(setting, **kwargs):
+    if setting in ('ORDERS_EVENT_BACKEND', 'ORDERS_EVENTS_HISTORY'):
+        get_event_hub.cache_clear()
+
+
+@receiver(setting_changed)
+def reset_jobs(setting, **kwargs):
+    if setting in ('ORDERS_JOB_BACKEND', 'ORDERS_JOB_WORKERS'):
+        reset_job_backend()
@@ -1,3 +1,1067 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+
+from services.models import Service
+from users.models import User, UserStats
+from .assignment import LockingSupplierAssigner, get_supplier_assigner
+from .events import InMemoryEventBackend, get_event_hub
+from .jobs import DatabaseJobBackend, InlineJobBackend, ThreadPoolJobBackend, job
+from .models import IdempotencyKey, Order, OrderItem, QueuedJob
+
+flaky_calls = []
+
+
+@job('tests.flaky', retries=2)
+def flaky(fail_times):
+    flaky_calls.append(fail_times)
+    if len(flaky_calls) <= fail_times:
+        raise RuntimeError("falla transitoria")
+
+
+class OrderCreateTests(APITestCase):
+    def setUp(self):
+        self.applicant = User.objects.create(username='applicant', user_type='applicant', budget=100000)
+        self.recipient = User.objects.create(username='recipient', user_type='recipient')
+        self.supplier = User.objects.create(username='supplier', user_type='supplier')
+        self.services = [Service.objects.create(name='charchazo', price=10) for _ in range(10)]
+        self.client.force_authenticate(self.applicant)
+        get_supplier_assigner().reset()
+
+    def place(self, services):
+        return self.client.post('/api/orders/', {
+            'recipient_id': self.recipient.id,
+            'services': [{'service_id': service.id, 'quantity': 2} for service in services],
+        }, format='json')
+
+    def test_create_charges_applicant_and_assigns_supplier(self):
+        response = self.place(self.services[:3])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['total_price'], 60)
+        self.assertEqual(len(response.data['items']), 3)
+        self.applicant.refresh_from_db()
+        self.supplier.refresh_from_db()
+        self.assertEqual(self.applicant.budget, 100000 - 60)
+        self.assertEqual(self.applicant.order_count, 1)
+        self.assertEqual(self.supplier.order_count, 1)
+
+    def test_query_count_does_not_grow_with_items(self):
+        self.place(self.services[:1])  # calentar cachés de sesión/contenttypes
+
+        with CaptureQueriesContext(connection) as one_item:
+            self.place(self.services[:1])
+        with CaptureQueriesContext(connection) as ten_items:
+            self.place(self.services)
+
+        self.assertEqual(len(one_item), len(ten_items))
+
+    def test_unknown_service_leaves_no_partial_order(self):
+        response = self.client.post('/api/orders/', {
+            'recipient_id': self.recipient.id,
+            'services': [{'service_id': self.services[0].id, 'quantity': 1}, {'service_id': 9999, 'quantity': 1}],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Order.objects.exists())
+
+    def test_budget_exceeded_rolls_back(self):
+        self.applicant.budget = 5
+        self.applicant.save()
+
+        response = self.place(self.services[:1])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+        self.supplier.refresh_from_db()
+        self.assertEqual(self.supplier.order_count, 0)
+
+
+class OrderCompletionTests(APITestCase):
+    def setUp(self):
+        get_supplier_assigner().reset()
+        self.applicant = User.objects.create(username='applicant', user_type='applicant', budget=1000)
+        self.recipient = User.objects.create(username='recipient', user_type='recipient')
+        self.supplier = User.objects.create(username='supplier', user_type='supplier', budget=0)
+        self.service = Service.objects.create(name='charchazo', price=10)
+
+    def place(self):
+        self.client.force_authenticate(self.applicant)
+        return self.client.post('/api/orders/', {
+            'recipient_id': self.recipient.id,
+            'services': [{'service_id': self.service.id, 'quantity': 3}],
+        }, format='json').data
+
+    def complete(self, order_id):
+        self.client.force_authenticate(self.supplier)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(f'/api/orders/{order_id}/complete_order/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries if 'FROM "services_service"' in query['sql'] and 'UPDATE' not in query['sql'] and 'JOIN' not in query['sql']])
+
+    def test_items_snapshot_price_and_completion_pays_stored_total(self):
+        order = self.place()
+        self.assertEqual(order['items'][0]['unit_price'], 10)
+        Service.objects.filter(pk=self.service.pk).update(price=99)
+
+        self.complete(order['id'])
+
+        self.supplier.refresh_from_db()
+        self.assertEqual(self.supplier.budget, 30)
+
+    def test_stale_instance_does_not_settle_twice(self):
+        order_id = self.place()['id']
+        first, second = Order.objects.get(pk=order_id), Order.objects.get(pk=order_id)
+
+        self.assertTrue(first.complete())
+        self.assertFalse(second.complete())
+
+        self.supplier.refresh_from_db()
+        self.recipient.refresh_from_db()
+        self.assertEqual((self.supplier.budget, self.supplier.completed_count), (30, 1))
+        self.assertEqual(self.recipient.order_count, 1)
+
+    def test_outstanding_minutes_follow_in_progress_orders(self):
+        first, second, third = (self.place()['id'] for _ in range(3))
+        minutes = dict(Order.objects.values_list('id', 'time_estimated'))
+        self.supplier.refresh_from_db()
+        self.assertEqual(self.supplier.outstanding_minutes, sum(minutes.values()))
+
+        self.complete(first)
+        self.client.force_authenticate(self.applicant)
+        self.client.put(f'/api/orders/{second}/cancel_order/')
+
+        self.supplier.refresh_from_db()
+        self.assertEqual(self.supplier.outstanding_minutes, minutes[third])
+
+    def test_stale_cancel_after_completion_changes_nothing(self):
+        order_id = self.place()['id']
+        stale = Order.objects.get(pk=order_id)
+        self.complete(order_id)
+
+        self.assertFalse(stale.cancel())
+
+        self.supplier.refresh_from_db()
+        self.assertEqual(Order.objects.get(pk=order_id).status, 'completed')
+        self.assertEqual((self.supplier.order_count, self.supplier.budget), (1, 30))
+
+    def test_free_order_pays_nothing(self):
+        Order.objects.bulk_create([Order(applicant=self.applicant, status='completed') for _ in range(4)])
+        order = self.place()
+        self.assertEqual(order['total_price'], 0)
+
+        self.complete(order['id'])
+
+        self.supplier.refresh_from_db()
+        self.assertEqual(self.supplier.budget, 0)
+
+
+class OrderRatingTests(APITestCase):
+    def setUp(self):
+        self.applicant = User.objects.create(username='applicant', user_type='applicant')
+        self.supplier = User.objects.create(username='supplier', user_type='supplier')
+        self.orders = [
+            Order.objects.create(applicant=self.applicant, supplier=self.supplier, status='completed')
+            for _ in range(3)
+        ]
+        self.client.force_authenticate(self.applicant)
+
+    def rate(self, order, rating):
+        return self.client.put(f'/api/orders/{order.pk}/rate_order/', {'rating': rating}, format='json')
+
+    def test_running_mean_and_double_rating_guard(self):
+        for order, rating in zip(self.orders, [5, 4, 2]):
+            self.assertEqual(self.rate(order, rating).status_code, 200)
+        again = self.rate(self.orders[0], 1)
+
+        self.assertEqual(again.status_code, 400)
+        self.supplier.refresh_from_db()
+        self.assertEqual(self.supplier.rating_count, 3)
+        self.assertAlmostEqual(self.supplier.rating, 11 / 3)
+
+    def test_rejects_invalid_ratings_and_open_orders(self):
+        open_order = Order.objects.create(applicant=self.applicant, supplier=self.supplier)
+
+        self.assertEqual(self.rate(self.orders[0], 6).status_code, 400)
+        self.assertEqual(self.rate(open_order, 3).status_code, 400)
+        self.client.force_authenticate(User.objects.create(username='other', user_type='applicant'))
+        self.assertEqual(self.rate(self.orders[0], 3).status_code, 403)
+        self.assertFalse(Order.objects.filter(is_rated=True).exists())
+
+    def test_reconcile_command_repairs_drift(self):
+        self.rate(self.orders[0], 4)
+        self.rate(self.orders[1], 1)
+        User.objects.filter(pk=self.supplier.pk).update(rating=5.0, rating_count=9)
+
+        call_command('reconcile_ratings', batch_size=1, stdout=StringIO())
+
+        self.supplier.refresh_from_db()
+        self.assertEqual((self.supplier.rating, self.supplier.rating_count), (2.5, 2))
+
+
+class OrderExportTests(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create(username='finanzas', user_type='applicant', is_staff=True)
+        self.applicant = User.objects.create(username='applicant', user_type='applicant')
+        self.suppliers = [User.objects.create(username=f'supplier{i}', user_type='supplier') for i in range(2)]
+        self.services = [Service.objects.create(name='charchazo', price=10), Service.objects.create(name='abrazo', price=5)]
+        for index in range(6):
+            order = Order.objects.create(
+                applicant=self.applicant, supplier=self.suppliers[index % 2], total_price=15,
+                status='completed' if index < 4 else 'in_progress',
+            )
+            OrderItem.objects.bulk_create([OrderItem(order=order, service=service, unit_price=service.price) for service in self.services])
+        self.client.force_authenticate(self.staff)
+
+    def export(self, query):
+        response = self.client.get(f'/api/orders/export/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_has_one_line_per_item(self):
+        lines = self.export(f'status=completed&supplier={self.suppliers[0].pk}').splitlines()
+
+        self.assertTrue(lines[0].startswith('order_id,status'))
+        self.assertEqual(len(lines), 1 + 2 * 2)
+        self.assertIn('charchazo', lines[1])
+
+    def test_ndjson_nests_items_and_streams_in_chunks(self):
+        with self.settings(ORDERS_EXPORT_CHUNK_SIZE=2), CaptureQueriesContext(connection) as queries:
+            records = [json.loads(line) for line in self.export('export_format=ndjson').splitlines()]
+            query_count = len(queries)
+
+        self.assertEqual([record['order_id'] for record in records], sorted(record['order_id'] for record in records))
+        self.assertEqual(len(records), 6)
+        self.assertEqual([item['unit_price'] for item in records[0]['items']], [10, 5])
+        # Una consulta de órdenes por bloque más el prefetch de ítems de cada bloque
+        self.assertLessEqual(query_count, 2 * 3 + 2)
+
+    def test_rejects_bad_filters_and_non_staff(self):
+        self.assertEqual(self.client.get('/api/orders/export/?created_from=ayer').status_code, 400)
+        self.assertEqual(self.client.get('/api/orders/export/?export_format=xml').status_code, 400)
+        self.client.force_authenticate(self.applicant)
+        self.assertEqual(self.client.get('/api/orders/export/').status_code, 403)
+
+    def test_command_writes_filtered_export(self):
+        output = StringIO()
+        call_command('export_orders', format='ndjson', status='in_progress', chunk_size=1, stdout=output)
+
+        self.assertEqual(len(output.getvalue().splitlines()), 2)
+
+
+class IdempotencyKeyTests(APITestCase):
+    def setUp(self):
+        get_supplier_assigner().reset()
+        self.applicant = User.objects.create(username='applicant', user_type='applicant', budget=1000)
+        self.recipient = User.objects.create(username='recipient', user_type='recipient')
+        self.supplier = User.objects.create(username='supplier', user_type='supplier')
+        self.service = Service.objects.create(name='charchazo', price=10)
+        self.client.force_authenticate(self.applicant)
+
+    def post(self, key, quantity=1):
+        return self.client.post('/api/orders/', {
+            'recipient_id': self.recipient.id,
+            'services': [{'service_id': self.service.id, 'quantity': quantity}],
+        }, format='json', headers={'Idempotency-Key': key})
+
+    def test_retry_replays_first_response_without_charging_again(self):
+        first = self.post('retry-1')
+        with CaptureQueriesContext(connection) as queries:
+            retry = self.post('retry-1')
+
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data, json.loads(json.dumps(first.data)))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        # Una lectura de la clave (más la sesión/usuario que ya cuesta cualquier petición)
+        self.assertEqual(len([query for query in queries if 'orders_idempotencykey' in query['sql']]), 1)
+        self.assertEqual(Order.objects.count(), 1)
+        self.applicant.refresh_from_db()
+        self.assertEqual(self.applicant.budget, 990)
+
+    def test_reused_key_with_other_payload_and_errors(self):
+        self.post('retry-2')
+        mismatch = self.post('retry-2', quantity=5)
+        failed = self.post('retry-3', quantity=500)
+        failed_retry = self.post('retry-3', quantity=500)
+
+        self.assertEqual(mismatch.status_code, 422)
+        self.assertEqual((failed.status_code, failed_retry.status_code), (400, 400))
+        self.assertEqual(failed_retry['Idempotent-Replayed'], 'true')
+
+    def test_expired_keys_are_purged_and_reusable(self):
+        self.post('old')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+
+        again = self.post('old')
+        self.assertNotIn('Idempotent-Replayed', again)
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        call_command('purge_idempotency_keys', batch_size=1, stdout=StringIO())
+
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class OrderBatchTests(APITestCase):
+    def setUp(self):
+        get_supplier_assigner().reset()
+        self.applicant = User.objects.create(username='applicant', user_type='applicant', budget=100000)
+        self.recipients = [User.objects.create(username=f'recipient{i}', user_type='recipient') for i in range(3)]
+        self.suppliers = [User.objects.create(username=f'supplier{i}', user_type='supplier') for i in range(3)]
+        self.service = Service.objects.create(name='charchazo', price=10)
+        self.client.force_authenticate(self.applicant)
+
+    def entry(self, recipient_id=None, service_id=None):
+        return {
+            'recipient_id': recipient_id or self.recipients[0].id,
+            'services': [{'service_id': service_id or self.service.id, 'quantity': 2}],
+        }
+
+    def post(self, entries):
+        return self.client.post('/api/orders/batch/', {'orders': entries}, format='json')
+
+    def test_batch_reports_each_entry_and_applies_free_rule(self):
+        entries = [self.entry() for _ in range(11)]
+        entries[3] = self.entry(recipient_id=9999)
+        entries[7] = self.entry(service_id=9999)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post(entries)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 9)
+        self.assertEqual([result['status'] for result in response.data['results']], [201] * 3 + [404] + [201] * 3 + [404] + [201] * 3)
+        # El quinto pedido válido sale gratis; los otros ocho cuestan 20
+        totals = [result['order']['total_price'] for result in response.data['results'] if result['status'] == 201]
+        self.assertEqual(totals, [20, 20, 20, 20, 0, 20, 20, 20, 20])
+        self.applicant.refresh_from_db()
+        self.assertEqual((self.applicant.budget, self.applicant.order_count), (100000 - 160, 9))
+        self.assertEqual(sorted(User.objects.filter(user_type='supplier').values_list('order_count', flat=True)), [3, 3, 3])
+        self.assertEqual(Service.objects.get().order_count, 9)
+
+    def test_malformed_entries_are_reported_individually(self):
+        entries = [
+            self.entry(),
+            {'recipient_id': self.recipients[0].id, 'services': [{'quantity': 2}]},
+            {'recipient_id': self.recipients[0].id, 'services': [{'service_id': self.service.id, 'quantity': '2'}]},
+            {'recipient_id': self.recipients[0].id, 'services': [{'service_id': self.service.id, 'quantity': -1}]},
+            {'recipient_id': 'x', 'services': [{'service_id': self.service.id, 'quantity': 1}]},
+            {'recipient_id': self.recipients[0].id, 'services': 'charchazo'},
+        ]
+
+        response = self.post(entries)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([result['status'] for result in response.data['results']], [201, 400, 400, 400, 404, 400])
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_single_and_batch_validate_recipient_the_same_way(self):
+        entry = self.entry(recipient_id=str(self.recipients[0].id))
+
+        single = self.client.post('/api/orders/', entry, format='json')
+        batch = self.post([entry])
+
+        self.assertEqual(single.status_code, 404)
+        self.assertEqual(batch.data['results'][0]['status'], 404)
+        self.assertFalse(Order.objects.exists())
+
+    def test_non_object_bodies_are_rejected(self):
+        for url in ('/api/orders/', '/api/orders/batch/'):
+            with self.subTest(url=url):
+                response = self.client.post(url, [self.entry()], format='json')
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_budget_is_checked_against_the_whole_batch(self):
+        self.applicant.budget = 50
+        self.applicant.save()
+
+        response = self.post([self.entry() for _ in range(3)])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        self.post([self.entry()])  # calentar cachés
+
+        with CaptureQueriesContext(connection) as few:
+            self.post([self.entry(recipient.id) for recipient in self.recipients])
+        with CaptureQueriesContext(connection) as many:
+            self.post([self.entry(recipient.id) for recipient in self.recipients] * 10)
+
+        self.assertEqual(len(few), len(many))
+
+    @override_settings(ORDERS_SUPPLIER_ASSIGNER='orders.assignment.DatabaseSupplierAssigner')
+    def test_database_assigner_spreads_batch(self):
+        User.objects.filter(pk=self.suppliers[0].pk).update(order_count=4)
+
+        self.post([self.entry() for _ in range(6)])
+
+        self.assertEqual(list(User.objects.filter(user_type='supplier').order_by('pk').values_list('order_count', flat=True)), [4, 3, 3])
+
+
+class BulkTransitionTests(APITestCase):
+    def setUp(self):
+        get_supplier_assigner().reset()
+        self.applicant = User.objects.create(username='applicant', user_type='applicant')
+        self.recipient = User.objects.create(username='recipient', user_type='recipient')
+        self.supplier = User.objects.create(username='supplier', user_type='supplier', order_count=4, budget=0)
+        self.other_supplier = User.objects.create(username='other', user_type='supplier')
+        self.service = Service.objects.create(name='charchazo', price=10, order_count=4, quantity_total=8)
+        self.orders = [self.make_order(self.supplier) for _ in range(4)]
+
+    def make_order(self, supplier, status='in_progress'):
+        order = Order.objects.create(
+            applicant=self.applicant, supplier=supplier, recipient=self.recipient, status=status, total_price=20,
+        )
+        OrderItem.objects.create(order=order, service=self.service, quantity=2, unit_price=10)
+        return order
+
+    def post(self, user, url, ids):
+        self.client.force_authenticate(user)
+        return self.client.post(url, {'ids': ids}, format='json')
+
+    def test_bulk_complete_settles_in_one_pass(self):
+        foreign = self.make_order(self.other_supplier)
+        done = self.make_order(self.supplier, status='completed')
+        ids = [order.id for order in self.orders] + [foreign.id, done.id, 9999]
+
+        response = self.post(self.supplier, '/api/orders/bulk_complete/', ids)
+
+        self.assertEqual(response.data['updated'], 4)
+        self.assertEqual([result['status'] for result in response.data['results']], [200] * 4 + [403, 400, 404])
+        self.supplier.refresh_from_db()
+        self.recipient.refresh_from_db()
+        self.assertEqual(self.supplier.budget, 4 * 20)
+        self.assertEqual(self.recipient.order_count, 4)
+        self.assertEqual(Order.objects.filter(status='completed', completed_at__isnull=False).count(), 4)
+
+    def test_bulk_complete_query_count_is_constant(self):
+        with CaptureQueriesContext(connection) as one:
+            self.post(self.supplier, '/api/orders/bulk_complete/', [self.orders[0].id])
+        with CaptureQueriesContext(connection) as many:
+            self.post(self.supplier, '/api/orders/bulk_complete/', [order.id for order in self.orders[1:]])
+
+        self.assertEqual(len(one), len(many))
+
+    def test_bulk_cancel_releases_suppliers_and_services(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post(self.applicant, '/api/orders/bulk_cancel/', [order.id for order in self.orders[:3]])
+        again = self.post(self.applicant, '/api/orders/bulk_cancel/', [self.orders[0].id])
+
+        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual(again.data['results'][0]['status'], 400)
+        self.supplier.refresh_from_db()
+        self.service.refresh_from_db()
+        self.assertEqual(self.supplier.order_count, 1)
+        self.assertEqual((self.service.order_count, self.service.quantity_total), (1, 2))
+
+    def test_bulk_cancel_rejects_strangers_and_bad_payloads(self):
+        response = self.post(self.other_supplier, '/api/orders/bulk_cancel/', [self.orders[0].id])
+        invalid = self.post(self.applicant, '/api/orders/bulk_cancel/', 'todos')
+
+        self.assertEqual(response.data['results'][0]['status'], 403)
+        self.assertEqual(invalid.status_code, 400)
+        self.assertFalse(Order.objects.exclude(status='in_progress').exists())
+
+    def test_bulk_ids_must_be_integers(self):
+        order_id = self.orders[0].id
+        for ids in ([order_id + 0.9], [True], [str(order_id)]):
+            with self.subTest(ids=ids):
+                response = self.post(self.applicant, '/api/orders/bulk_cancel/', ids)
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exclude(status='in_progress').exists())
+
+    def test_bulk_body_must_be_an_object(self):
+        self.client.force_authenticate(self.applicant)
+        response = self.client.post('/api/orders/bulk_cancel/', [self.orders[0].id], format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exclude(status='in_progress').exists())
+
+
+class SupplierAssignmentTests(TestCase):
+    def setUp(self):
+        get_supplier_assigner().reset()
+        self.applicant = User.objects.create(username='applicant', user_type='applicant')
+        self.suppliers = [
+            User.objects.create(username='supplier1', user_type='supplier'),
+            User.objects.create(username='supplier2', user_type='supplier'),
+            User.objects.create(username='supplier3', user_type='supplier', order_count=5),
+        ]
+
+    def order_counts(self):
+        return [User.objects.get(pk=supplier.pk).order_count for supplier in self.suppliers]
+
+    def assert_balances_least_loaded(self):
+        assigner = get_supplier_assigner()
+        picked = set()
+        for _ in range(4):
+            # Cada asignación se confirma antes de la siguiente, como pedidos separados
+            with self.captureOnCommitCallbacks(execute=True):
+                picked.add(assigner.assign().pk)
+
+        self.assertEqual(picked, {self.suppliers[0].pk, self.suppliers[1].pk})
+        self.assertEqual(self.order_counts(), [2, 2, 5])
+
+    def test_load_index_assigns_least_loaded(self):
+        self.assert_balances_least_loaded()
+
+    @override_settings(ORDERS_SUPPLIER_ASSIGNER='orders.assignment.DatabaseSupplierAssigner')
+    def test_database_fallback_assigns_least_loaded(self):
+        self.assert_balances_least_loaded()
+
+    def test_locking_pick_waits_when_every_row_is_skipped(self):
+        select_for_update = QuerySet.select_for_update
+
+        def all_rows_locked(queryset, *args, skip_locked=False, **kwargs):
+            # Como si otras colocaciones tuvieran tomadas todas las filas de proveedores
+            return queryset.none() if skip_locked else select_for_update(queryset, *args, **kwargs)
+
+        with mock.patch.object(connection.features, 'has_select_for_update_skip_locked', True), \
+                mock.patch.object(QuerySet, 'select_for_update', all_rows_locked), transaction.atomic():
+            supplier = LockingSupplierAssigner().pick()
+
+        self.assertIn(supplier, self.suppliers[:2])
+
+    def test_load_index_pick_does_not_scan_suppliers(self):
+        assigner = get_supplier_assigner()
+        assigner.pick()  # carga inicial del índice
+
+        with CaptureQueriesContext(connection) as queries:
+            assigner.pick()
+
+        self.assertEqual(len(queries), 1)
+
+    @override_settings(ORDERS_SUPPLIER_ASSIGNER='orders.assignment.CapacitySupplierAssigner')
+    def test_capacity_assigns_earliest_free_supplier(self):
+        # supplier3 tiene más órdenes históricas, pero ningún minuto en cola
+        for supplier, minutes in zip(self.suppliers, [300, 90, 0]):
+            User.objects.filter(pk=supplier.pk).update(outstanding_minutes=minutes)
+        assigner = get_supplier_assigner()
+
+        picked = [assigner.assign(minutes=60) for _ in range(3)]
+
+        self.assertEqual(picked, [self.suppliers[2], self.suppliers[2], self.suppliers[1]])
+        self.assertEqual(
+            [User.objects.get(pk=supplier.pk).outstanding_minutes for supplier in self.suppliers], [300, 150, 120],
+        )
+
+    @override_settings(ORDERS_SUPPLIER_ASSIGNER='orders.assignment.CapacitySupplierAssigner')
+    def test_capacity_batch_spreads_by_minutes(self):
+        for supplier, minutes in zip(self.suppliers, [0, 50, 200]):
+            User.objects.filter(pk=supplier.pk).update(outstanding_minutes=minutes)
+
+        picked = get_supplier_assigner().assign_many(3, [100, 30, 30])
+
+        self.assertEqual(picked, [self.suppliers[0], self.suppliers[1], self.suppliers[1]])
+        self.assertEqual(
+            [User.objects.get(pk=supplier.pk).outstanding_minutes for supplier in self.suppliers], [100, 110, 200],
+        )
+        self.assertEqual(self.order_counts(), [1, 2, 5])
+
+    def test_load_index_ignores_rolled_back_assignments(self):
+        assigner = get_supplier_assigner()
+        for _ in range(3):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                assigner.assign()
+                raise RuntimeError("el pedido se deshace")
+
+        self.assertEqual(self.order_counts(), [0, 0, 5])
+        self.assertEqual(assigner._loads, {supplier.pk: supplier.order_count for supplier in self.suppliers})
+
+    def test_new_supplier_enters_index(self):
+        get_supplier_assigner().pick()
+        newcomer = User.objects.create(username='supplier4', user_type='supplier')
+        with self.captureOnCommitCallbacks(execute=True):
+            for supplier in self.suppliers[:2]:
+                User.objects.filter(pk=supplier.pk).update(order_count=1)
+                get_supplier_assigner().supplier_loaded(supplier.pk, 1)
+
+        self.assertEqual(get_supplier_assigner().pick(), newcomer)
+
+    def test_assign_supplier_and_cancel_go_through_engine(self):
+        order = Order.objects.create(applicant=self.applicant)
+        order.assign_supplier()
+        self.assertIn(order.supplier, self.suppliers[:2])
+        self.assertEqual(sorted(self.order_counts()), [0, 1, 5])
+
+        order.cancel()
+        self.assertEqual(self.order_counts(), [0, 0, 5])
+
+
+@override_settings(ORDERS_JOB_BACKOFF=0)
+class JobQueueTests(APITestCase):
+    def setUp(self):
+        flaky_calls.clear()
+
+    def test_thread_pool_retries_until_success(self):
+        backend = ThreadPoolJobBackend(workers=1)
+        with self.assertLogs('orders.jobs', 'WARNING') as logs:
+            backend.executor.submit(backend.run, 'tests.flaky', {'fail_times': 2}).result()
+        backend.shutdown()
+
+        self.assertEqual(len(flaky_calls), 3)
+        self.assertEqual(len(logs.records), 2)
+
+    def test_inline_backend_retries_and_never_raises_after_commit(self):
+        backend = InlineJobBackend()
+        with self.assertLogs('orders.jobs', 'WARNING') as logs:
+            with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+                backend.enqueue('tests.flaky', {'fail_times': 1})
+            self.assertEqual(len(flaky_calls), 2)
+
+            flaky_calls.clear()
+            with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+                backend.enqueue('tests.flaky', {'fail_times': 5})
+
+        self.assertEqual(len(flaky_calls), 3)
+        self.assertEqual(logs.records[-1].levelname, 'ERROR')
+
+    @override_settings(ORDERS_JOB_BACKEND='orders.jobs.DatabaseJobBackend')
+    def test_database_backend_stores_job_until_worker_runs_it(self):
+        applicant = User.objects.create(username='applicant', user_type='applicant', budget=1000)
+        recipient = User.objects.create(username='recipient', user_type='recipient')
+        User.objects.create(username='supplier', user_type='supplier')
+        service = Service.objects.create(name='charchazo', price=10)
+        get_supplier_assigner().reset()
+        self.client.force_authenticate(applicant)
+
+        self.client.post('/api/orders/', {
+            'recipient_id': recipient.id, 'services': [{'service_id': service.id, 'quantity': 3}],
+        }, format='json')
+        self.assertEqual(QueuedJob.objects.get().name, 'orders.fanout')
+        self.assertEqual(Service.objects.get().quantity_total, 0)
+
+        call_command('run_jobs', once=True, stdout=StringIO())
+
+        self.assertFalse(QueuedJob.objects.exists())
+        self.assertEqual(Service.objects.get().quantity_total, 3)
+
+    def test_database_backend_reschedules_then_marks_failed(self):
+        backend = DatabaseJobBackend()
+        backend.enqueue('tests.flaky', {'fail_times': 5})
+
+        with self.assertLogs('orders.jobs', 'ERROR'):
+            self.assertEqual(backend.run_pending(), 1)
+            backend.run_pending()
+            backend.run_pending()
+        queued = QueuedJob.objects.get()
+        self.assertEqual((queued.status, queued.attempts), ('failed', 3))
+        self.assertIn('falla transitoria', queued.last_error)
+        self.assertEqual(backend.run_pending(), 0)
+
+
+class OrderListQueryTests(APITestCase):
+    def setUp(self):
+        self.applicant = User.objects.create(username='applicant', user_type='applicant')
+        self.supplier = User.objects.create(username='supplier', user_type='supplier')
+        self.services = [Service.objects.create(name='charchazo', price=10), Service.objects.create(name='abrazo', price=5)]
+
+    def make_orders(self, count, status='in_progress'):
+        for _ in range(count):
+            order = Order.objects.create(applicant=self.applicant, supplier=self.supplier, status=status)
+            OrderItem.objects.bulk_create([OrderItem(order=order, service=service) for service in self.services])
+
+    def count_queries(self, user, url):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assert_constant_queries(self, user, url, status='in_progress'):
+        self.make_orders(1, status)
+        few = self.count_queries(user, url)
+        self.make_orders(10, status)
+        many = self.count_queries(user, url)
+        self.assertEqual(few, many)
+
+    def test_in_progress_orders(self):
+        self.assert_constant_queries(self.supplier, '/api/orders/in_progress_orders/')
+
+    def test_canceled_or_completed_orders(self):
+        self.assert_constant_queries(self.supplier, '/api/orders/canceled_or_completed_orders/', 'completed')
+
+    def test_current_orders(self):
+        self.assert_constant_queries(self.applicant, '/api/orders/current_orders/')
+
+    def test_no_current_orders(self):
+        self.assert_constant_queries(self.applicant, '/api/orders/no_current_orders/', 'cancelled')
+
+    def test_list(self):
+        self.assert_constant_queries(self.applicant, '/api/orders/')
+
+    def test_retrieve(self):
+        self.make_orders(1)
+        order = Order.objects.get()
+        self.assertEqual(self.count_queries(self.applicant, f'/api/orders/{order.pk}/'), 2)
+
+
+class OrderPaginationTests(APITestCase):
+    def setUp(self):
+        self.applicant = User.objects.create(username='applicant', user_type='applicant')
+        self.supplier = User.objects.create(username='supplier', user_type='supplier')
+        self.orders = [Order.objects.create(applicant=self.applicant, supplier=self.supplier) for _ in range(7)]
+        self.client.force_authenticate(self.supplier)
+
+    def test_cursor_walks_history_newest_first(self):
+        seen = []
+        url = '/api/orders/in_progress_orders/?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 3)
+            seen += [order['id'] for order in response.data['results']]
+            url = response.data['next']
+
+        self.assertEqual(seen, [order.id for order in reversed(self.orders)])
+
+    @override_settings(ORDERS_PAGE_SIZE=2)
+    def test_default_page_size_comes_from_settings(self):
+        response = self.client.get('/api/orders/in_progress_orders/')
+
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+
+@override_settings(ROOT_URLCONF='reactions.asgi_urls')
+class AsyncReadViewTests(APITestCase):
+    def setUp(self):
+        self.applicant = User.objects.create(username='applicant', user_type='applicant', budget=777)
+        self.supplier = User.objects.create(username='supplier', user_type='supplier')
+        service = Service.objects.create(name='charchazo', price=10)
+        for _ in range(3):
+            order = Order.objects.create(applicant=self.applicant, supplier=self.supplier)
+            OrderItem.objects.create(order=order, service=service, quantity=2)
+
+    def auth(self, user):
+        return {'headers': {'Authorization': f'Bearer {user.get_token().access_token}'}}
+
+    async def test_history_matches_sync_view(self):
+        response = await self.async_client.get('/api/orders/in_progress_orders/?page_size=2', **self.auth(self.supplier))
+
+        self.assertEqual(response.status_code, 200)
+        with override_settings(ROOT_URLCONF='reactions.urls'):
+            expected = await self.async_client.get('/api/orders/in_progress_orders/?page_size=2', **self.auth(self.supplier))
+        payload, expected = response.json(), expected.json()
+        self.assertEqual(payload['results'], expected['results'])
+        self.assertEqual(len(payload['results']), 2)
+
+        following = await self.async_client.get(payload['next'], **self.auth(self.supplier))
+        self.assertEqual(len(following.json()['results']), 1)
+
+    async def test_previous_link_walks_back_like_sync_view(self):
+        first = await self.async_client.get('/api/orders/in_progress_orders/?page_size=1', **self.auth(self.supplier))
+        second = await self.async_client.get(first.json()['next'], **self.auth(self.supplier))
+        back = await self.async_client.get(second.json()['previous'], **self.auth(self.supplier))
+        with override_settings(ROOT_URLCONF='reactions.urls'):
+            expected = await self.async_client.get(second.json()['previous'], **self.auth(self.supplier))
+
+        self.assertEqual(back.json()['results'], first.json()['results'])
+        self.assertEqual(back.json(), expected.json())
+
+    async def test_permissions_and_authentication(self):
+        forbidden = await self.async_client.get('/api/orders/in_progress_orders/', **self.auth(self.applicant))
+        anonymous = await self.async_client.get('/api/orders/current_orders/')
+
+        self.assertEqual(forbidden.status_code, 403)
+        self.assertEqual(anonymous.status_code, 401)
+
+    async def test_user_detail_loads_full_row(self):
+        response = await self.async_client.get(f'/api/users/{self.applicant.pk}/', **self.auth(self.applicant))
+
+        self.assertEqual(response.json()['budget'], 777)
+
+    async def test_service_catalog_supports_etag(self):
+        response = await self.async_client.get('/api/services/')
+        cached = await self.async_client.get('/api/services/', headers={'If-None-Match': response['ETag']})
+
+        self.assertEqual(response.json()[0]['name'], 'charchazo')
+        self.assertEqual(cached.status_code, 304)
+
+
+class OrderEventTests(APITestCase):
+    def setUp(self):
+        get_supplier_assigner().reset()
+        get_event_hub.cache_clear()
+        self.applicant = User.objects.create(username='applicant', user_type='applicant', budget=1000)
+        self.recipient = User.objects.create(username='recipient', user_type='recipient')
+        self.supplier = User.objects.create(username='supplier', user_type='supplier')
+        self.outsider = User.objects.create(username='outsider', user_type='applicant')
+        self.service = Service.objects.create(name='charchazo', price=10)
+
+    def place_and_cancel(self):
+        self.client.force_authenticate(self.applicant)
+        with self.captureOnCommitCallbacks(execute=True):
+            order_id = self.client.post('/api/orders/', {
+                'recipient_id': self.recipient.id,
+                'services': [{'service_id': self.service.id, 'quantity': 1}],
+            }, format='json').data['id']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(f'/api/orders/{order_id}/cancel_order/')
+        return order_id
+
+    def test_long_poll_returns_events_scoped_to_user(self):
+        order_id = self.place_and_cancel()
+
+        self.client.force_authenticate(self.supplier)
+        response = self.client.get('/api/orders/events/?timeout=0')
+        self.assertEqual([event['type'] for event in response.data['events']], ['order.created', 'order.cancelled'])
+        self.assertEqual({event['order_id'] for event in response.data['events']}, {order_id})
+
+        following = self.client.get(f"/api/orders/events/?timeout=0&last_event_id={response.data['last_event_id']}")
+        self.assertEqual(following.data['events'], [])
+
+        self.client.force_authenticate(self.outsider)
+        self.assertEqual(self.client.get('/api/orders/events/?timeout=0').data['events'], [])
+
+    def test_wait_wakes_up_on_publish(self):
+        hub = InMemoryEventBackend()
+        timer = threading.Timer(0.05, hub.publish, args=({1}, {'type': 'order.completed'}))
+        timer.start()
+
+        events = hub.wait(1, timeout=5)
+        timer.join()
+
+        self.assertEqual([event['type'] for event in events], ['order.completed'])
+        self.assertEqual(hub.wait(2, timeout=0), [])
+
+    async def test_await_events_wakes_up_from_other_thread(self):
+        hub = InMemoryEventBackend()
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, lambda: threading.Thread(target=hub.publish, args=({1}, {'type': 'order.created'})).start())
+
+        events = await hub.await_events(1, timeout=5)
+
+        self.assertEqual([event['id'] for event in events], [1])
+
+    @override_settings(ROOT_URLCONF='reactions.asgi_urls')
+    async def test_sse_stream_replays_pending_events(self):
+        get_event_hub().publish({self.supplier.pk}, {'type': 'order.created', 'order_id': 1, 'status': 'in_progress'})
+        token = (await asyncio.to_thread(self.supplier.get_token)).access_token
+
+        response = await self.async_client.get('/api/orders/events/stream/', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        await anext(chunks)  # retry
+        event = (await anext(chunks)).decode()
+        await chunks.aclose()
+
+        self.assertTrue(event.startswith('id: 1\nevent: order.created\n'))
+
+
+@skipUnlessDBFeature('has_select_for_update_skip_locked')
+class ConcurrentSkipLockedAssignmentTests(TransactionTestCase):
+    """Solo corre en bases con SKIP LOCKED (perfil postgres); en SQLite se usa el lock del proceso."""
+    holders = 3
+    waiters = 6
+
+    def setUp(self):
+        self.suppliers = [User.objects.create(username=f'supplier{i}', user_type='supplier') for i in range(self.holders)]
+
+    def assign(self, barrier, picks, hold=0):
+        try:
+            with transaction.atomic():
+                picks.append(LockingSupplierAssigner().assign())
+                barrier.wait()
+                time.sleep(hold)  # Mantener la fila bloqueada mientras llegan las demás colocaciones
+        finally:
+            connection.close()
+
+    def test_more_concurrent_placements_than_suppliers(self):
+        locked = threading.Barrier(self.holders + 1)
+        picks = []
+        holders = [threading.Thread(target=self.assign, args=(locked, picks, 0.3)) for _ in range(self.holders)]
+        for thread in holders:
+            thread.start()
+        locked.wait()  # Todas las filas de proveedores están tomadas
+
+        waiters = [threading.Thread(target=self.assign, args=(threading.Barrier(1), picks)) for _ in range(self.waiters)]
+        for thread in waiters:
+            thread.start()
+        for thread in holders + waiters:
+            thread.join()
+
+        self.assertNotIn(None, picks)
+        self.assertEqual(len(picks), self.holders + self.waiters)
+        self.assertEqual(
+            sum(User.objects.filter(user_type='supplier').values_list('order_count', flat=True)),
+            self.holders + self.waiters,
+        )
+
+
+@override_settings(ORDERS_SUPPLIER_ASSIGNER='orders.assignment.LockingSupplierAssigner')
+class ConcurrentPlacementTests(TransactionTestCase):
+    parallel_orders = 24
+
+    def setUp(self):
+        self.applicants = [
+            User.objects.create(username=f'applicant{i}', user_type='applicant', budget=100000)
+            for i in range(self.parallel_orders)
+        ]
+        self.recipient = User.objects.create(username='recipient', user_type='recipient')
+        self.suppliers = [User.objects.create(username=f'supplier{i}', user_type='supplier') for i in range(4)]
+        self.service = Service.objects.create(name='charchazo', price=10)
+
+    def place(self, applicant, barrier, responses, headers=None):
+        client = APIClient()
+        client.force_authenticate(applicant)
+        barrier.wait()
+        try:
+            responses.append(client.post('/api/orders/', {
+                'recipient_id': self.recipient.id,
+                'services': [{'service_id': self.service.id, 'quantity': 1}],
+            }, format='json', headers=headers))
+        finally:
+            connection.close()
+
+    def test_parallel_retries_with_same_key_create_one_order(self):
+        barrier = threading.Barrier(8)
+        responses = []
+        threads = [
+            threading.Thread(target=self.place, args=(self.applicants[0], barrier, responses, {'Idempotency-Key': 'same'}))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([response.status_code for response in responses], [201] * 8)
+        self.assertEqual(len({response.data['id'] for response in responses}), 1)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(User.objects.get(pk=self.applicants[0].pk).budget, 100000 - 10)
+
+    def test_parallel_creates_stay_balanced(self):
+        barrier = threading.Barrier(self.parallel_orders)
+        responses = []
+        threads = [
+            threading.Thread(target=self.place, args=(applicant, barrier, responses))
+            for applicant in self.applicants
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([response.status_code for response in responses], [201] * self.parallel_orders)
+        order_counts = list(User.objects.filter(user_type='supplier').values_list('order_count', flat=True))
+        # Ningún incremento se pierde y la carga queda repartida en partes iguales
+        self.assertEqual(sum(order_counts), self.parallel_orders)
+        self.assertEqual(order_counts, [self.parallel_orders // len(self.suppliers)] * len(self.suppliers))
+        self.assertEqual(Order.objects.values('supplier').distinct().count(), len(self.suppliers))
+
+
+@override_settings(ORDERS_SUPPLIER_ASSIGNER='orders.assignment.LockingSupplierAssigner')
+class ConcurrentCompletionTests(TransactionTestCase):
+    orders_per_supplier = 8
+    attempts_per_order = 2
+
+    def setUp(self):
+        applicant = User.objects.create(username='applicant', user_type='applicant')
+        self.recipients = [User.objects.create(username=f'recipient{i}', user_type='recipient') for i in range(2)]
+        self.suppliers = [User.objects.create(username=f'supplier{i}', user_type='supplier', budget=0) for i in range(3)]
+        self.orders = [
+            Order.objects.create(
+                applicant=applicant, supplier=supplier, recipient=self.recipients[number % 2],
+                status='in_progress', total_price=10 + number,
+            )
+            for supplier in self.suppliers
+            for number in range(self.orders_per_supplier)
+        ]
+
+    def complete(self, order, barrier, statuses):
+        client = APIClient()
+        client.force_authenticate(order.supplier)
+        barrier.wait()
+        try:
+            statuses[order.pk].append(client.put(f'/api/orders/{order.pk}/complete_order/').status_code)
+        finally:
+            connection.close()
+
+    def test_parallel_completions_settle_each_order_once(self):
+        statuses = {order.pk: [] for order in self.orders}
+        barrier = threading.Barrier(len(self.orders) * self.attempts_per_order)
+        threads = [
+            threading.Thread(target=self.complete, args=(order, barrier, statuses))
+            for order in self.orders
+            for _ in range(self.attempts_per_order)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Exactamente un intento gana por pedido; el otro ve el estado nuevo (400) o pierde el UPDATE (409)
+        for codes in statuses.values():
+            self.assertEqual(codes.count(200), 1, codes)
+            self.assertTrue(set(codes) <= {200, 400, 409}, codes)
+        self.assertEqual(Order.objects.filter(status='completed').count(), len(self.orders))
+        for supplier in User.objects.filter(user_type='supplier'):
+            expected = sum(order.total_price for order in self.orders if order.supplier_id == supplier.pk)
+            self.assertEqual((supplier.budget, supplier.completed_count), (expected, self.orders_per_supplier))
+        self.assertEqual(
+            list(User.objects.filter(user_type='recipient').values_list('order_count', flat=True)),
+            [len(self.orders) // 2] * 2,
+        )
+
+    def settle(self, order, method, barrier, outcomes):
+        barrier.wait()
+        try:
+            outcomes[order.pk].append((method, getattr(order, method)()))
+        finally:
+            connection.close()
+
+    def test_complete_races_cancel_on_stale_instances(self):
+        for supplier in self.suppliers:
+            minutes = sum(order.time_estimated for order in self.orders if order.supplier_id == supplier.pk)
+            User.objects.filter(pk=supplier.pk).update(order_count=self.orders_per_supplier, outstanding_minutes=minutes)
+        # Ambas instancias se leen antes de arrancar: las dos pasan la revisión de estado y
+        # solo el UPDATE condicionado decide quién gana
+        attempts = [
+            (Order.objects.get(pk=order.pk), method)
+            for order in self.orders
+            for method in ('complete', 'cancel')
+        ]
+        outcomes = {order.pk: [] for order in self.orders}
+        barrier = threading.Barrier(len(attempts))
+        threads = [threading.Thread(target=self.settle, args=(order, method, barrier, outcomes)) for order, method in attempts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        winners = {}
+        for order_id, results in outcomes.items():
+            self.assertEqual(sorted(won for _method, won in results), [False, True], results)
+            winners[order_id] = next(method for method, won in results if won)
+        statuses = dict(Order.objects.values_list('id', 'status'))
+        self.assertEqual(statuses, {
+            order_id: 'completed' if method == 'complete' else 'cancelled' for order_id, method in winners.items()
+        })
+
+        for supplier in User.objects.filter(user_type='supplier'):
+            own = [order for order in self.orders if order.supplier_id == supplier.pk]
+            completed = [order for order in own if winners[order.pk] == 'complete']
+            self.assertEqual(supplier.budget, sum(order.total_price for order in completed))
+            self.assertEqual(supplier.completed_count, len(completed))
+            self.assertEqual(supplier.order_count, len(completed))  # Solo las canceladas liberan carga
+            self.assertEqual(supplier.outstanding_minutes, 0)
+            stats = UserStats.objects.get(user=supplier)
+            self.assertEqual((stats.assigned_completed, stats.assigned_cancelled), (len(completed), len(own) - len(completed)))
+        self.assertEqual(
+            sum(User.objects.filter(user_type='recipient').values_list('order_count', flat=True)),
+            list(winners.values()).count('complete'),
+        )
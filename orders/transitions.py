@@ -0,0 +1,190 @@
+# orders/transitions.py
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from users.models import User
+from .assignment import get_supplier_assigner
+from .events import publish_order_event
+from .jobs import enqueue
+from .models import Order
+from .placement import _is_id
+
+
+class TransitionError(Exception):
+    """Error de negocio de una transición masiva completa (no de un id en particular)."""
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def _outcome(order_id, status_code, message=None, order_status=None):
+    if message is not None:
+        return {'id': order_id, 'status': status_code, 'error': message}
+    return {'id': order_id, 'status': status_code, 'order_status': order_status}
+
+
+def _clean_ids(order_ids):
+    if not isinstance(order_ids, list) or not order_ids:
+        raise TransitionError("Se requiere una lista de ids de pedidos.")
+    max_size = settings.ORDERS_BATCH_MAX_SIZE
+    if len(order_ids) > max_size:
+        raise TransitionError(f"Se pueden procesar como máximo {max_size} pedidos.")
+    if not all(_is_id(order_id) for order_id in order_ids):
+        raise TransitionError("Los ids de pedidos deben ser números enteros.")
+    # Sin duplicados y en el orden recibido
+    return list(dict.fromkeys(order_ids))
+
+
+def _transition(order_ids, allowed_statuses, check, new_status, **changes):
+    """
+    Esqueleto común: lee y bloquea las órdenes, decide el resultado de cada id con
+    `check(row)` y cambia de estado todas las elegibles con un solo UPDATE
+    condicionado al estado actual. Devuelve `(resultados por id, órdenes cambiadas)`;
+    las órdenes cambiadas son instancias parciales con los campos ya actualizados.
+    """
+    rows = {
+        row['id']: row
+        for row in Order.objects.select_for_update().filter(id__in=order_ids)
+        .values('id', 'status', 'applicant_id', 'supplier_id', 'recipient_id', 'total_price', 'time_estimated', 'created_at')
+    }
+    outcomes = {}
+    eligible = []
+    for order_id in order_ids:
+        row = rows.get(order_id)
+        if row is None:
+            outcomes[order_id] = _outcome(order_id, 404, "El pedido no existe.")
+            continue
+        error = check(row)
+        if error is not None:
+            outcomes[order_id] = _outcome(order_id, *error)
+        else:
+            eligible.append(order_id)
+
+    now = timezone.now()
+    updated = Order.objects.filter(id__in=eligible, status__in=allowed_statuses).update(
+        status=new_status, updated_at=now, **changes,
+    )
+    if updated != len(eligible):
+        # Sin bloqueo de filas (SQLite) otra petición pudo ganar alguna: identificar las propias
+        won = set(Order.objects.filter(id__in=eligible, status=new_status, updated_at=now).values_list('id', flat=True))
+    else:
+        won = set(eligible)
+
+    changed = []
+    for order_id in eligible:
+        if order_id in won:
+            outcomes[order_id] = _outcome(order_id, 200, order_status=new_status)
+            row = rows[order_id]
+            changed.append(Order(
+                pk=order_id, applicant_id=row['applicant_id'], supplier_id=row['supplier_id'],
+                recipient_id=row['recipient_id'], total_price=row['total_price'],
+                time_estimated=row['time_estimated'], created_at=row['created_at'],
+                status=new_status, updated_at=now, **changes,
+            ))
+        else:
+            outcomes[order_id] = _outcome(order_id, 409, "El pedido cambió de estado en otra petición.")
+    return [outcomes[order_id] for order_id in order_ids], changed
+
+
+def _publish(changed, event_type):
+    for order in changed:
+        publish_order_event(order, event_type)
+
+
+def _per_user(deltas):
+    return Case(
+        *[When(pk=user_id, then=Value(delta)) for user_id, delta in deltas.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def settle_completions(orders):
+    """
+    Liquida órdenes que ya quedaron marcadas como completadas: abona a cada
+    proveedor el `total_price` guardado, suma sus pedidos completados y le
+    descuenta sus minutos pendientes, y suma los pedidos recibidos de cada
+    recipient. Son a lo sumo dos UPDATE con `F()`, así que las completaciones
+    simultáneas nunca pisan sus incrementos.
+    """
+    earned = Counter()
+    completed = Counter()
+    minutes = Counter()
+    for order in orders:
+        if order.supplier_id is not None:
+            earned[order.supplier_id] += order.total_price
+            completed[order.supplier_id] += 1
+            minutes[order.supplier_id] += order.time_estimated
+    if completed:
+        User.objects.filter(pk__in=completed).update(
+            budget=F('budget') + _per_user(earned),
+            completed_count=F('completed_count') + _per_user(completed),
+            outstanding_minutes=Greatest(F('outstanding_minutes') - _per_user(minutes), 0),
+        )
+
+    received = Counter(order.recipient_id for order in orders if order.recipient_id is not None)
+    if received:
+        User.objects.filter(pk__in=received).update(order_count=F('order_count') + _per_user(received))
+
+
+def complete_orders(supplier, order_ids):
+    """
+    Marca como completadas varias órdenes del proveedor.
+
+    Equivale a llamar `Order.complete()` en cada una, pero con un número fijo
+    de consultas: un UPDATE de estado y la liquidación de `settle_completions()`.
+    """
+    order_ids = _clean_ids(order_ids)
+
+    def check(row):
+        if row['supplier_id'] != supplier.pk:
+            return 403, "No tienes permiso para completar este pedido."
+        if row['status'] != 'in_progress':
+            return 400, "Solo los pedidos en progreso se pueden completar."
+        return None
+
+    with transaction.atomic():
+        outcomes, changed = _transition(
+            order_ids, ['in_progress'], check, 'completed', completed_at=timezone.now(),
+        )
+        if changed:
+            settle_completions(changed)
+            enqueue('orders.fanout', event='completed', order_ids=[order.pk for order in changed])
+            _publish(changed, 'order.completed')
+    return outcomes
+
+
+def cancel_orders(user, order_ids):
+    """
+    Cancela varias órdenes en las que el usuario es solicitante o proveedor.
+
+    Como `Order.cancel()`, libera la carga de los proveedores con un UPDATE
+    agregado y deja a la cola de trabajos la popularidad de los servicios.
+    """
+    order_ids = _clean_ids(order_ids)
+    cancellable = ['pending', 'in_progress']
+
+    def check(row):
+        if user.pk not in (row['applicant_id'], row['supplier_id']):
+            return 403, "No tienes permiso para cancelar este pedido."
+        if row['status'] not in cancellable:
+            return 400, "Solo se pueden cancelar pedidos pendientes o en progreso."
+        return None
+
+    with transaction.atomic():
+        outcomes, changed = _transition(order_ids, cancellable, check, 'cancelled')
+        if changed:
+            assigned = [order for order in changed if order.supplier_id is not None]
+            minutes = Counter()
+            for order in assigned:
+                minutes[order.supplier_id] += order.time_estimated
+            get_supplier_assigner().release_many(Counter(order.supplier_id for order in assigned), minutes)
+            enqueue('orders.fanout', event='cancelled', order_ids=[order.pk for order in changed])
+            _publish(changed, 'order.cancelled')
+    return outcomes
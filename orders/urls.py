@@ -1,8 +1,20 @@
 # orders/urls.py
+from django.urls import path
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import OrderViewSet
 
 router = DefaultRouter()
 router.register(r'orders', OrderViewSet, basename='orders')
 
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = router.urls
+
+# Lecturas del historial servidas por vistas async en el modo ASGI (ver reactions/asgi_urls.py)
+async_urlpatterns = [
+    path('orders/in_progress_orders/', async_views.in_progress_orders),
+    path('orders/canceled_or_completed_orders/', async_views.canceled_or_completed_orders),
+    path('orders/current_orders/', async_views.current_orders),
+    path('orders/no_current_orders/', async_views.no_current_orders),
+    # Push de cambios de estado; solo tiene sentido bajo ASGI, donde no ocupa un hilo por conexión
+    path('orders/events/stream/', async_views.order_events),
+]
@@ -1,109 +1,116 @@
 # orders/views.py
 
+from django.conf import settings
+from django.db import router
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from reactions.db import ReplicaReadMixin
+from reactions.pagination import OrderHistoryPagination
+from users.authentication import ClaimsUserAuthentication
 from users.permissions import IsSupplier, IsApplicant
-from .models import Order, OrderItem
-from .serializers import OrderSerializer
-from services.models import Service
-from users.models import User
-import random
-
-class OrderViewSet(viewsets.ModelViewSet):
+from .assignment import get_supplier_assigner
+from .events import get_event_hub
+from .export import FORMATS, ExportFilterError, export_lines, export_queryset, iter_orders
+from .idempotency import idempotent
+from .models import Order
+from .placement import place_order, place_order_batch, OrderPlacementError
+from .serializers import OrderRateSerializer, OrderSerializer
+from .transitions import TransitionError, cancel_orders, complete_orders
+
+class OrderViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OrderHistoryPagination
+    # Acciones que solo necesitan el id y el tipo de usuario del token
+    stateless_actions = {'in_progress_orders', 'canceled_or_completed_orders', 'current_orders', 'no_current_orders', 'events'}
+    # Listados de solo lectura que toleran réplicas levemente atrasadas
+    replica_actions = {'list', 'in_progress_orders', 'canceled_or_completed_orders', 'current_orders', 'no_current_orders', 'export'}
+
+    def get_authenticators(self):
+        action = self.action_map.get(self.request.method.lower())
+        if settings.USERS_STATELESS_AUTH and action in self.stateless_actions:
+            return [ClaimsUserAuthentication()]
+        return super().get_authenticators()
+
+    def get_queryset(self):
+        """
+        Todas las acciones (incluidas `list` y `retrieve`) parten del mismo
+        queryset optimizado para OrderSerializer.
+        """
+        return Order.objects.with_details()
+
+    def paginated_response(self, orders):
+        """Serializa una página del historial usando la paginación por cursor del viewset."""
+        page = self.paginate_queryset(orders)
+        serializer = OrderSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     def create(self, request, *args, **kwargs):
         """
         Crear un nuevo pedido.
-        Solo los solicitantes pueden crear pedidos.
+        Solo los solicitantes pueden crear pedidos. Con la cabecera
+        `Idempotency-Key`, los reintentos reciben la respuesta original.
         """
+        return idempotent(request, lambda: self.place(request))
+
+    def place(self, request):
+        if not isinstance(request.data, dict):
+            return Response({"error": "Se espera un objeto con el pedido."}, status=status.HTTP_400_BAD_REQUEST)
         services_data = request.data.get('services', [])
         recipient_id = request.data.get('recipient_id', None)
 
-        if not services_data:
-            return Response({"error": "Se requiere al menos un servicio."}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Validación para asegurarse de que al menos un servicio tenga cantidad > 0
-        if all(service_data.get('quantity', 0) == 0 for service_data in services_data):
-            return Response({"error": "Debe haber al menos un servicio con cantidad mayor que 0."}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Validar el recipient
         try:
-            recipient = User.objects.get(id=recipient_id)
-        except User.DoesNotExist:
-            return Response({"error": "El recipient no existe."}, status=status.HTTP_404_NOT_FOUND)
-
-        # Crear el pedido para el solicitante autenticado
-        order = Order.objects.create(applicant=request.user)
-
-        # Crear los ítems del pedido y calcular el total del precio
-        total_price = 0
-        for service_data in services_data:
-            try:
-                service = Service.objects.get(id=service_data['service_id'])
-            except Service.DoesNotExist:
-                return Response({"error": f"El servicio con id {service_data['service_id']} no existe."}, status=status.HTTP_404_NOT_FOUND)
-
-            quantity = service_data.get('quantity', 1)
-            total_price += service.price * quantity  # Sumar el precio al total
-            OrderItem.objects.create(order=order, service=service, quantity=quantity)
-
-        # Verificar si el solicitante tiene pedidos en múltiplos de 5 para hacer la orden gratis
-        applicant_order_count = request.user.applicant_orders.count()
-        if applicant_order_count % 5 == 0:
-            total_price = 0  # Orden gratis
+            order = place_order(request.user, services_data, recipient_id)
+        except OrderPlacementError as exc:
+            return Response({"error": exc.message}, status=exc.status_code)
 
-        # Validar si el total de la orden supera el presupuesto del usuario
-        if total_price > request.user.budget:
-            return Response({"error": "El precio total excede tu presupuesto disponible."}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Asignar el proveedor con menos demanda (menos órdenes completadas), o aleatoriamente si todos tienen 0
-        available_suppliers = User.objects.filter(user_type='supplier').order_by('order_count')
-
-        if available_suppliers.exists():
-            # Tomar el proveedor con el menor número de órdenes, pero si todos tienen el mismo número de órdenes, seleccionar aleatoriamente
-            min_order_count = available_suppliers.first().order_count
-
-            # Filtrar todos los proveedores que tienen el menor número de órdenes (incluyendo 0)
-            suppliers_with_min_orders = available_suppliers.filter(order_count=min_order_count)
-
-            # Si hay más de uno con el mismo número de órdenes, seleccionamos uno aleatoriamente
-            supplier = random.choice(suppliers_with_min_orders)
-
-        else:
-            return Response({"error": "No hay proveedores disponibles."}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Asignar el proveedor seleccionado al pedido
-        order.supplier = supplier
-        order.total_price = total_price
-        order.save()
+        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
 
-        # Incrementar el número de órdenes del proveedor inmediatamente
-        supplier.order_count += 1
-        supplier.save()
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsApplicant])
+    def batch(self, request):
+        """
+        Crear varios pedidos en una sola petición.
+        Recibe `{"orders": [{"recipient_id": ..., "services": [...]}, ...]}` y
+        responde un resultado por entrada, en el mismo orden. Acepta
+        `Idempotency-Key` igual que `create`.
+        """
+        return idempotent(request, lambda: self.place_batch(request))
 
-        # Actualizar el presupuesto del solicitante y el número de pedidos
-        if total_price > 0:  # Solo actualizar si la orden no es gratis
-            request.user.budget -= total_price
-        request.user.order_count += 1
-        request.user.save()
+    def place_batch(self, request):
+        entries = request.data.get('orders') if isinstance(request.data, dict) else None
+        if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+            return Response({"error": "Se requiere una lista de pedidos."}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+        try:
+            outcomes = place_order_batch(request.user, entries)
+        except OrderPlacementError as exc:
+            return Response({"error": exc.message}, status=exc.status_code)
+
+        orders = [outcome for outcome in outcomes if isinstance(outcome, Order)]
+        serialized = iter(OrderSerializer(orders, many=True).data)
+        results = [
+            {"status": status.HTTP_201_CREATED, "order": next(serialized)} if isinstance(outcome, Order)
+            else {"status": outcome.status_code, "error": outcome.message}
+            for outcome in outcomes
+        ]
+        return Response(
+            {"created": len(orders), "results": results},
+            status=status.HTTP_201_CREATED if orders else status.HTTP_400_BAD_REQUEST,
+        )
 
-    
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsSupplier])
     def in_progress_orders(self, request):
         """
         Obtener las órdenes asignadas al proveedor que están en estado `in_progress`.
         Solo los proveedores pueden acceder a sus órdenes pendientes.
         """
-        orders = Order.objects.filter(supplier=request.user, status='in_progress')
-        serializer = OrderSerializer(orders, many=True)
-        return Response(serializer.data)
+        orders = self.get_queryset().filter(supplier_id=request.user.pk, status='in_progress')
+        return self.paginated_response(orders)
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsSupplier])
     def canceled_or_completed_orders(self, request):
@@ -111,9 +118,8 @@ class OrderViewSet(viewsets.ModelViewSet):
         Obtener las órdenes asignadas al proveedor que están en estado `canceled` o `completed`.
         Solo los proveedores pueden acceder a sus órdenes.
         """
-        orders = Order.objects.filter(supplier=request.user).exclude(status='in_progress')
-        serializer = OrderSerializer(orders, many=True)
-        return Response(serializer.data)
+        orders = self.get_queryset().filter(supplier_id=request.user.pk).exclude(status='in_progress')
+        return self.paginated_response(orders)
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsApplicant])
     def current_orders(self, request):
@@ -121,9 +127,8 @@ class OrderViewSet(viewsets.ModelViewSet):
         Obtener los pedidos vigentes del solicitante.
         Solo los solicitantes pueden acceder a sus pedidos.
         """
-        orders = Order.objects.filter(applicant=request.user, status__in=['in_progress'])
-        serializer = OrderSerializer(orders, many=True)
-        return Response(serializer.data)
+        orders = self.get_queryset().filter(applicant_id=request.user.pk, status__in=['in_progress'])
+        return self.paginated_response(orders)
     
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsApplicant])
     def no_current_orders(self, request):
@@ -131,27 +136,78 @@ class OrderViewSet(viewsets.ModelViewSet):
         Obtener los pedidos vigentes del solicitante.
         Solo los solicitantes pueden acceder a sus pedidos.
         """
-        orders = Order.objects.filter(applicant=request.user).exclude(status='in_progress')
-        serializer = OrderSerializer(orders, many=True)
-        return Response(serializer.data)
+        orders = self.get_queryset().filter(applicant_id=request.user.pk).exclude(status='in_progress')
+        return self.paginated_response(orders)
     
 
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def events(self, request):
+        """
+        Long-poll de cambios de estado de las órdenes del usuario.
+        Responde apenas haya eventos posteriores a `last_event_id` o, si no llega
+        ninguno, al cumplirse `timeout` segundos (acotado por
+        `ORDERS_EVENTS_LONG_POLL_TIMEOUT`) con una lista vacía.
+        """
+        try:
+            last_event_id = int(request.query_params.get('last_event_id', 0))
+            timeout = float(request.query_params.get('timeout', settings.ORDERS_EVENTS_LONG_POLL_TIMEOUT))
+        except ValueError:
+            return Response({'error': 'Parámetros inválidos.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        timeout = min(max(timeout, 0), settings.ORDERS_EVENTS_LONG_POLL_TIMEOUT)
+        events = get_event_hub().wait(request.user.pk, last_event_id, timeout)
+        return Response({
+            'events': events,
+            'last_event_id': events[-1]['id'] if events else last_event_id,
+        })
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdminUser])
+    def export(self, request):
+        """
+        Exportar el historial completo de órdenes con sus ítems (solo staff).
+        Filtros: `created_from`, `created_to`, `status` (separados por coma) y
+        `supplier`; `export_format` es `csv` (por defecto) o `ndjson`. La
+        respuesta se genera por bloques a medida que se envía.
+        """
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in FORMATS:
+            return Response({'error': 'Formato inválido.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            orders = export_queryset(
+                created_from=request.query_params.get('created_from'),
+                created_to=request.query_params.get('created_to'),
+                status=request.query_params.get('status'),
+                supplier=request.query_params.get('supplier'),
+            )
+        except ExportFilterError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        # El stream se consume después de terminar la vista: fijar ya la base (réplica si hay)
+        orders = orders.using(router.db_for_read(Order))
+
+        response = StreamingHttpResponse(export_lines(export_format, iter_orders(orders)), content_type=FORMATS[export_format])
+        filename = f"orders-{timezone.now():%Y%m%d-%H%M%S}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
     @action(detail=True, methods=['put'], permission_classes=[IsAuthenticated])
     def cancel_order(self, request, pk=None):
         """
         Cancelar un pedido.
         Tanto los solicitantes (applicant) como los proveedores (supplier) pueden cancelar sus pedidos.
         """
-        order = self.get_object()
-
-        # Verificar si el usuario es el solicitante o el proveedor asignado
-        if request.user != order.applicant and request.user != order.supplier:
-            return Response({'error': 'No tienes permiso para cancelar este pedido.'}, status=status.HTTP_403_FORBIDDEN)
-
-        # Verificar si el estado de la orden permite la cancelación
-        if order.status not in ['pending', 'in_progress']:
-            return Response({'error': 'Solo se pueden cancelar pedidos pendientes o en progreso.'}, status=status.HTTP_400_BAD_REQUEST)
-        order.cancel()
+        # Como en complete_order, la lectura también va dentro de guard()
+        with get_supplier_assigner().guard():
+            order = self.get_object()
+
+            # Verificar si el usuario es el solicitante o el proveedor asignado
+            if request.user != order.applicant and request.user != order.supplier:
+                return Response({'error': 'No tienes permiso para cancelar este pedido.'}, status=status.HTTP_403_FORBIDDEN)
+
+            # Verificar si el estado de la orden permite la cancelación
+            if order.status not in ['pending', 'in_progress']:
+                return Response({'error': 'Solo se pueden cancelar pedidos pendientes o en progreso.'}, status=status.HTTP_400_BAD_REQUEST)
+            if not order.cancel():
+                return Response({'error': 'El pedido cambió de estado en otra petición.'}, status=status.HTTP_409_CONFLICT)
         return Response(OrderSerializer(order).data, status=status.HTTP_200_OK)
 
 
@@ -161,24 +217,79 @@ class OrderViewSet(viewsets.ModelViewSet):
         Marcar un pedido como completado.
         Solo los proveedores pueden marcar los pedidos como completados.
         """
+        # La lectura también va dentro de guard(): en los motores que serializan escrituras
+        # concurrentes (SQLite sin bloqueo de filas) la completación entera es una sección crítica
+        with get_supplier_assigner().guard():
+            order = self.get_object()
+            if order.supplier != request.user:
+                return Response({'error': 'No tienes permiso para completar este pedido.'}, status=status.HTTP_403_FORBIDDEN)
+
+            if order.status != 'in_progress':
+                return Response({'error': 'Solo los pedidos en progreso se pueden completar.'}, status=status.HTTP_400_BAD_REQUEST)
+
+            if not order.complete():
+                return Response({'error': 'El pedido cambió de estado en otra petición.'}, status=status.HTTP_409_CONFLICT)
+        return Response(OrderSerializer(order).data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['put'], permission_classes=[IsAuthenticated, IsApplicant])
+    def rate_order(self, request, pk=None):
+        """
+        Calificar un pedido completado (de 1 a 5).
+        Solo el solicitante del pedido puede calificarlo, y una sola vez.
+        """
         order = self.get_object()
-        if order.supplier != request.user:
-            return Response({'error': 'No tienes permiso para completar este pedido.'}, status=status.HTTP_403_FORBIDDEN)
+        if order.applicant_id != request.user.pk:
+            return Response({'error': 'No tienes permiso para calificar este pedido.'}, status=status.HTTP_403_FORBIDDEN)
 
-        if order.status != 'in_progress':
-            return Response({'error': 'Solo los pedidos en progreso se pueden completar.'}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = OrderRateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-        order.complete()
+        if order.status != 'completed':
+            return Response({'error': 'Solo los pedidos completados se pueden calificar.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not order.rate(serializer.validated_data['rating']):
+            return Response({'error': 'El pedido ya fue calificado.'}, status=status.HTTP_400_BAD_REQUEST)
         return Response(OrderSerializer(order).data, status=status.HTTP_200_OK)
 
+    def bulk_transition_response(self, transition):
+        """Aplica una transición masiva sobre `ids` y responde el resultado de cada id."""
+        data = self.request.data
+        if not isinstance(data, dict):
+            return Response({'error': 'Se espera un objeto con la lista `ids`.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            results = transition(self.request.user, data.get('ids'))
+        except TransitionError as exc:
+            return Response({'error': exc.message}, status=exc.status_code)
+        return Response({
+            'updated': sum(result['status'] == status.HTTP_200_OK for result in results),
+            'results': results,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsSupplier])
+    def bulk_complete(self, request):
+        """
+        Marcar varios pedidos como completados con `{"ids": [...]}`.
+        Solo los proveedores pueden completar sus pedidos.
+        """
+        return self.bulk_transition_response(complete_orders)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def bulk_cancel(self, request):
+        """
+        Cancelar varios pedidos con `{"ids": [...]}`.
+        Tanto solicitantes como proveedores pueden cancelar sus pedidos.
+        """
+        return self.bulk_transition_response(cancel_orders)
+
     def get_permissions(self):
         """
         Determinar los permisos para diferentes tipos de usuarios en cada acción.
         """
-        if self.action == 'current_orders' or self.action == 'create':
+        if self.action in ('current_orders', 'create', 'batch', 'rate_order'):
             return [IsAuthenticated(), IsApplicant()]
-        elif self.action == 'complete_order' or self.action == 'in_progress_orders' or self.action == 'canceled_or_completed_orders':
+        elif self.action in ('complete_order', 'bulk_complete', 'in_progress_orders', 'canceled_or_completed_orders'):
             return [IsAuthenticated(), IsSupplier()]
+        elif self.action == 'export':
+            return [IsAuthenticated(), IsAdminUser()]
         elif self.action == 'cancel_order':
             return [IsAuthenticated()]
         return [IsAuthenticated()]
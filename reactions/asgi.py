@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'reactions.settings')
+# Bajo ASGI las lecturas del historial y del catálogo usan vistas async nativas
+os.environ.setdefault('REACTIONS_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
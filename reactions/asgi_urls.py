@@ -0,0 +1,15 @@
+"""
+URLconf del modo ASGI. Las lecturas más frecuentes (historial de órdenes,
+usuario autenticado, recipients y catálogo) se resuelven primero con vistas
+async nativas; el resto de la API sigue igual que en reactions/urls.py.
+"""
+from django.urls import include, path
+
+from orders.urls import async_urlpatterns as orders_async_urlpatterns
+from services.urls import async_urlpatterns as services_async_urlpatterns
+from users.urls import async_urlpatterns as users_async_urlpatterns
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/', include(users_async_urlpatterns + services_async_urlpatterns + orders_async_urlpatterns)),
+] + sync_urlpatterns
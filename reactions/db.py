@@ -0,0 +1,159 @@
+# reactions/db.py
+"""
+Perfiles de base de datos elegidos por variables de entorno.
+
+`REACTIONS_DB_PROFILE` selecciona el perfil:
+
+- `sqlite` (por defecto): SQLite en modo WAL, con `busy_timeout`,
+  `synchronous=NORMAL` y transacciones `IMMEDIATE`, aplicados al conectar.
+- `postgres`: PostgreSQL con conexiones persistentes (`CONN_MAX_AGE`) o, con
+  `REACTIONS_DB_POOL=1`, con el pool de conexiones de psycopg.
+
+Con `REACTIONS_DB_REPLICAS` (hosts separados por coma, solo PostgreSQL) se
+agregan réplicas de lectura y `ReplicaRouter` les envía las lecturas marcadas
+con `read_from_replica()`, que usan las acciones GET de listados.
+"""
+import os
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.exceptions import ImproperlyConfigured
+
+PROFILES = ('sqlite', 'postgres')
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def _env(environ, name, default=None):
+    return environ.get(f'REACTIONS_DB_{name}', default)
+
+
+def sqlite_database(base_dir, environ):
+    busy_timeout = int(_env(environ, 'BUSY_TIMEOUT_MS', 5000))
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': _env(environ, 'NAME') or base_dir / 'db.sqlite3',
+        'OPTIONS': {
+            # Los lectores no bloquean al escritor y la espera por el lock la hace SQLite, no un error inmediato
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                f'PRAGMA busy_timeout={busy_timeout};'
+                'PRAGMA temp_store=MEMORY;'
+                'PRAGMA cache_size=-20000'
+            ),
+            # Tomar el lock de escritura al empezar la transacción evita el SQLITE_BUSY al escalar de lectura a escritura
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': busy_timeout / 1000,
+        },
+    }
+
+
+def postgres_database(environ, host=None):
+    database = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': _env(environ, 'NAME', 'reactions'),
+        'USER': _env(environ, 'USER', 'reactions'),
+        'PASSWORD': _env(environ, 'PASSWORD', ''),
+        'HOST': host or _env(environ, 'HOST', 'localhost'),
+        'PORT': _env(environ, 'PORT', '5432'),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+    if _env(environ, 'POOL') == '1':
+        # El pool reemplaza a las conexiones persistentes: Django exige CONN_MAX_AGE=0
+        database['CONN_MAX_AGE'] = 0
+        database['OPTIONS']['pool'] = {
+            'min_size': int(_env(environ, 'POOL_MIN_SIZE', 2)),
+            'max_size': int(_env(environ, 'POOL_MAX_SIZE', 20)),
+            'timeout': int(_env(environ, 'POOL_TIMEOUT', 10)),
+        }
+    else:
+        database['CONN_MAX_AGE'] = int(_env(environ, 'CONN_MAX_AGE', 60))
+    return database
+
+
+def database_settings(base_dir, environ=os.environ):
+    """Arma `DATABASES` según el perfil elegido en el entorno."""
+    profile = database_profile(environ)
+    if profile == 'sqlite':
+        return {'default': sqlite_database(base_dir, environ)}
+
+    databases = {'default': postgres_database(environ)}
+    replicas = [host.strip() for host in _env(environ, 'REPLICAS', '').split(',') if host.strip()]
+    for number, host in enumerate(replicas, start=1):
+        databases[f'replica_{number}'] = {
+            **postgres_database(environ, host=host),
+            # En las pruebas la réplica apunta a la misma base que default
+            'TEST': {'MIRROR': 'default'},
+        }
+    return databases
+
+
+def database_profile(environ=os.environ):
+    profile = _env(environ, 'PROFILE', 'sqlite')
+    if profile not in PROFILES:
+        raise ImproperlyConfigured(f"REACTIONS_DB_PROFILE debe ser uno de {', '.join(PROFILES)}, no {profile!r}.")
+    return profile
+
+
+@contextmanager
+def read_from_replica():
+    """Las lecturas dentro del bloque pueden ir a una réplica (y ver datos levemente atrasados)."""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Envía a una réplica al azar solo las lecturas marcadas con
+    `read_from_replica()`; todo lo demás (escrituras y lecturas dentro de flujos
+    que luego escriben) va a `default`, así nadie lee datos atrasados por accidente.
+    """
+    def __init__(self):
+        from django.conf import settings
+        self.replicas = [alias for alias in settings.DATABASES if alias.startswith('replica_')]
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db in self.replicas:
+            # Los relacionados (p. ej. prefetch) se leen de la misma réplica que la instancia
+            return instance._state.db
+        if self.replicas and _use_replica.get():
+            return random.choice(self.replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Las réplicas se alimentan de la replicación de PostgreSQL, no de migraciones
+        return db == 'default'
+
+
+class ReplicaReadMixin:
+    """
+    Mixin para vistas DRF: las peticiones GET de las acciones listadas en
+    `replica_actions` leen desde una réplica. Las vistas genéricas sin
+    `action` cuentan como `list`.
+    """
+    replica_actions = {'list'}
+
+    def initial(self, request, *args, **kwargs):
+        if request.method == 'GET' and getattr(self, 'action', 'list') in self.replica_actions:
+            self._replica_token = _use_replica.set(True)
+        super().initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            self._replica_token = None
+            _use_replica.reset(token)
+        return super().finalize_response(request, response, *args, **kwargs)
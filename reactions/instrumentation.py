@@ -0,0 +1,216 @@
+# reactions/instrumentation.py
+"""
+Instrumentación por petición: tiempo total, tiempo y cantidad de consultas SQL,
+consultas repetidas (firmas de N+1) y tiempo de serialización. Se activa con
+`INSTRUMENTATION_ENABLED` y mide solo una fracción `INSTRUMENTATION_SAMPLE_RATE`
+de las peticiones; las demás pasan sin costo adicional.
+"""
+import logging
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpResponse
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.signatures = Counter()
+        self._serializer_depth = 0
+
+    @property
+    def query_count(self):
+        return sum(self.signatures.values())
+
+    def duplicates(self):
+        threshold = settings.INSTRUMENTATION_DUPLICATE_THRESHOLD
+        return {sql: count for sql, count in self.signatures.items() if count >= threshold}
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper: el SQL viene con placeholders, así que la firma agrupa
+        # las consultas que solo difieren en sus parámetros
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.signatures[sql] += 1
+
+
+class MetricsRegistry:
+    """Acumula métricas por vista en memoria del proceso, en formato de resumen de Prometheus."""
+    fields = ('wall_seconds', 'db_seconds', 'serializer_seconds', 'queries', 'duplicate_queries')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._totals = defaultdict(lambda: dict.fromkeys(self.fields + ('requests',), 0))
+
+    def observe(self, view, wall, metrics):
+        with self._lock:
+            totals = self._totals[view]
+            totals['requests'] += 1
+            totals['wall_seconds'] += wall
+            totals['db_seconds'] += metrics.db_time
+            totals['serializer_seconds'] += metrics.serializer_time
+            totals['queries'] += metrics.query_count
+            totals['duplicate_queries'] += sum(metrics.duplicates().values())
+
+    def snapshot(self):
+        with self._lock:
+            return {view: dict(totals) for view, totals in self._totals.items()}
+
+    def render(self):
+        lines = [
+            '# HELP reactions_sampled_requests_total Peticiones muestreadas por vista.',
+            '# TYPE reactions_sampled_requests_total counter',
+        ]
+        snapshot = self.snapshot()
+        for view, totals in sorted(snapshot.items()):
+            lines.append(f'reactions_sampled_requests_total{{view="{view}"}} {totals["requests"]}')
+        for field in self.fields:
+            lines.append(f'# TYPE reactions_request_{field}_total counter')
+            for view, totals in sorted(snapshot.items()):
+                lines.append(f'reactions_request_{field}_total{{view="{view}"}} {totals[field]:g}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+@contextmanager
+def serializer_timer():
+    """Suma al tiempo de serialización de la petición actual (si se está midiendo)."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    metrics._serializer_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics._serializer_depth -= 1
+        # Solo se cuenta el serializador más externo para no duplicar tiempos anidados
+        if metrics._serializer_depth == 0:
+            metrics.serializer_time += time.perf_counter() - started
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with serializer_timer():
+            return super().data
+
+
+class TimedSerializerMixin:
+    """
+    Mide el tiempo de `serializer.data`. Para medir también `many=True`, el
+    serializador debe declarar `list_serializer_class = TimedListSerializer`.
+    """
+    @property
+    def data(self):
+        with serializer_timer():
+            return super().data
+
+
+class RequestMetricsMiddleware:
+    """
+    Funciona tanto bajo WSGI como bajo ASGI: con una cadena async no obliga a
+    Django a adaptar la petición a un hilo, así que mientras la instrumentación
+    esté apagada el costo es una comparación por petición.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with self.measure_queries(metrics):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.report(request, response, time.perf_counter() - started, metrics)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        # El ORM async ejecuta las consultas en el hilo thread-sensitive de la petición:
+        # los execute_wrapper se instalan y se quitan en ese mismo hilo
+        stack = await sync_to_async(self.measure_queries)(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current.reset(token)
+        return self.report(request, response, time.perf_counter() - started, metrics)
+
+    @staticmethod
+    def sampled():
+        return settings.INSTRUMENTATION_ENABLED and random.random() < settings.INSTRUMENTATION_SAMPLE_RATE
+
+    @staticmethod
+    def measure_queries(metrics):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics))
+        return stack
+
+    @staticmethod
+    def report(request, response, wall, metrics):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        registry.observe(view, wall, metrics)
+
+        duplicates = metrics.duplicates()
+        if duplicates:
+            response['X-Duplicate-Queries'] = str(sum(duplicates.values()))
+            for sql, count in duplicates.items():
+                logger.warning('Posible N+1 en %s: %d ejecuciones de %s', view, count, sql)
+
+        response['Server-Timing'] = ', '.join([
+            f'total;dur={wall * 1000:.2f}',
+            f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.query_count} queries"',
+            f'serializer;dur={metrics.serializer_time * 1000:.2f}',
+        ])
+        return response
+
+
+def metrics_view(request):
+    """Expone las métricas acumuladas en el formato de texto de Prometheus."""
+    if not settings.INSTRUMENTATION_ENABLED:
+        raise Http404
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4')
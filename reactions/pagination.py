@@ -0,0 +1,101 @@
+# reactions/pagination.py
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class SettingsCursorPagination(CursorPagination):
+    """
+    Paginación por cursor (keyset): cada página filtra a partir de la última
+    posición vista en lugar de usar OFFSET, así que las páginas profundas cuestan
+    lo mismo que la primera mientras exista un índice sobre `ordering`.
+
+    El tamaño de página por defecto se lee del setting `page_size_setting` y el
+    cliente puede pedir otro con `?page_size=` hasta `MAX_PAGE_SIZE`.
+    """
+    page_size_setting = None
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request):
+        self.page_size = getattr(settings, self.page_size_setting)
+        self.max_page_size = settings.MAX_PAGE_SIZE
+        return super().get_page_size(request)
+
+
+class OrderHistoryPagination(SettingsCursorPagination):
+    ordering = ('-created_at', '-id')
+    page_size_setting = 'ORDERS_PAGE_SIZE'
+
+
+class UserPagination(SettingsCursorPagination):
+    ordering = 'id'
+    page_size_setting = 'USERS_PAGE_SIZE'
+
+
+class AsyncCursorPaginationMixin:
+    """
+    Variante async de `CursorPagination.paginate_queryset` para las vistas ASGI:
+    los cursores se leen y se escriben con los mismos `decode_cursor`/`encode_cursor`
+    de DRF (los enlaces son intercambiables con los endpoints sync) y solo la
+    lectura de la página usa iteración async del ORM, sin ocupar un hilo.
+    """
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self._cursor_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        # Se pide un elemento extra para saber si hay una página siguiente
+        results = [item async for item in queryset[self._offset:self._offset + self.page_size + 1]]
+        return self._settle_page(results)
+
+    def _cursor_queryset(self, queryset, request, view):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (self._offset, self._reverse, self._current_position) = (0, False, None)
+        else:
+            (self._offset, self._reverse, self._current_position) = self.cursor
+
+        if self._reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if self._current_position is not None:
+            order = self.ordering[0]
+            lookup = '__lt' if self.cursor.reverse != order.startswith('-') else '__gt'
+            queryset = queryset.filter(**{order.lstrip('-') + lookup: self._current_position})
+        return queryset
+
+    def _settle_page(self, results):
+        """Calcula las posiciones de `next`/`previous` igual que `CursorPagination`."""
+        self.page = results[:self.page_size]
+        has_following_position = len(results) > len(self.page)
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering) if has_following_position else None
+        )
+        has_current_position = (self._current_position is not None) or (self._offset > 0)
+
+        if self._reverse:
+            self.page = list(reversed(self.page))
+            self.has_next, self.has_previous = has_current_position, has_following_position
+            self.next_position, self.previous_position = self._current_position, following_position
+        else:
+            self.has_next, self.has_previous = has_following_position, has_current_position
+            self.next_position, self.previous_position = following_position, self._current_position
+        return self.page
+
+    def get_paginated_data(self, data):
+        return {'next': self.get_next_link(), 'previous': self.get_previous_link(), 'results': data}
+
+
+class AsyncOrderHistoryPagination(AsyncCursorPaginationMixin, OrderHistoryPagination):
+    pass
+
+
+class AsyncUserPagination(AsyncCursorPaginationMixin, UserPagination):
+    pass
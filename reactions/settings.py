@@ -10,9 +10,14 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
+from corsheaders.defaults import default_headers
+
+from .db import database_profile, database_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -47,6 +52,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Métricas por petición (sync y async); no hace nada mientras INSTRUMENTATION_ENABLED sea False
+    'reactions.instrumentation.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -57,11 +64,22 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Instrumentación por petición (ver reactions/instrumentation.py)
+INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', '') == '1'
+# Fracción de peticiones medidas
+INSTRUMENTATION_SAMPLE_RATE = float(os.environ.get('INSTRUMENTATION_SAMPLE_RATE', 0.05))
+# Ejecuciones de una misma consulta a partir de las cuales se reporta un posible N+1
+INSTRUMENTATION_DUPLICATE_THRESHOLD = 3
+
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.environ.get('LOGIN_IP_RATE', '30/min'),
+        'login_username': os.environ.get('LOGIN_USERNAME_RATE', '10/min'),
+    },
     # 'DEFAULT_PERMISSION_CLASSES': (
     #     'rest_framework.permissions.IsAuthenticated',  # Todas las vistas requieren autenticación
     # ),
@@ -72,8 +90,43 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
 }
 
+# Autenticación desde los claims del token (sin consultar el usuario) en los
+# endpoints de solo lectura; ver users/authentication.py
+USERS_STATELESS_AUTH = False
+
+# Tamaños de página por defecto (ver reactions/pagination.py)
+ORDERS_PAGE_SIZE = 20
+USERS_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+# Motor de asignación de proveedores (ver orders/assignment.py). Con varios procesos
+# escribiendo a la vez conviene 'orders.assignment.LockingSupplierAssigner'; para
+# asignar por minutos pendientes en vez de por órdenes, 'orders.assignment.CapacitySupplierAssigner'.
+ORDERS_SUPPLIER_ASSIGNER = 'orders.assignment.LoadIndexSupplierAssigner'
+# Segundos antes de volver a sincronizar el índice en memoria con la base de datos
+ORDERS_SUPPLIER_INDEX_TTL = 300
 
-ROOT_URLCONF = 'reactions.urls'
+# Segundos que se guarda la respuesta de cada Idempotency-Key (purge_idempotency_keys borra las vencidas)
+ORDERS_IDEMPOTENCY_TTL = 24 * 60 * 60
+
+# Máximo de pedidos por petición en /api/orders/batch/
+ORDERS_BATCH_MAX_SIZE = 500
+
+# Órdenes por bloque (con sus ítems precargados) al exportar el historial
+ORDERS_EXPORT_CHUNK_SIZE = 2000
+
+# Eventos de cambio de estado de órdenes (ver orders/events.py)
+ORDERS_EVENT_BACKEND = 'orders.events.InMemoryEventBackend'
+# Eventos recientes que se guardan por usuario
+ORDERS_EVENTS_HISTORY = 100
+# Segundos máximos que espera una petición de long-poll
+ORDERS_EVENTS_LONG_POLL_TIMEOUT = 25
+# Segundos entre comentarios keep-alive del stream SSE
+ORDERS_EVENTS_SSE_KEEPALIVE = 15
+
+
+# reactions/asgi.py activa REACTIONS_ASYNC_VIEWS para servir las lecturas con vistas async
+ROOT_URLCONF = 'reactions.asgi_urls' if os.environ.get('REACTIONS_ASYNC_VIEWS') == '1' else 'reactions.urls'
 
 TEMPLATES = [
     {
@@ -97,13 +150,57 @@ WSGI_APPLICATION = 'reactions.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
+# Perfil elegido con REACTIONS_DB_PROFILE (sqlite o postgres); ver reactions/db.py
+DATABASES = database_settings(BASE_DIR)
+
+DATABASE_ROUTERS = ['reactions.db.ReplicaRouter']
+
+# Las pruebas corren los trabajos en línea: la base de pruebas no es visible desde otros hilos
+TEST_RUNNER = 'reactions.test_runner.TestRunner'
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Con varios procesos conviene un backend compartido (Redis, Memcached) para que la
+# invalidación del catálogo de servicios llegue a todos.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+# Segundos máximos que un proceso reutiliza su copia del catálogo de servicios. Con
+# LocMemCache las invalidaciones no cruzan procesos, así que los precios de los
+# pedidos se leen de la base de datos (ver services/catalog.py).
+SERVICES_CATALOG_TTL = 60
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/5.0/topics/auth/passwords/
+# PASSWORD_HASHER_PROFILE elige el costo por login:
+#   'django'        -> hashers por defecto de Django
+#   'pbkdf2-tuned'  -> PBKDF2 con PASSWORD_PBKDF2_ITERATIONS iteraciones
+#   'argon2'        -> Argon2 (requiere argon2-cffi)
+# Los hashes existentes se actualizan al perfil elegido en el próximo login.
+
+PASSWORD_HASHER_PROFILE = os.environ.get('PASSWORD_HASHER_PROFILE', 'django')
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 200_000))
+
+if PASSWORD_HASHER_PROFILE == 'pbkdf2-tuned':
+    PASSWORD_HASHERS = [
+        'users.hashers.TunedPBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+    ]
+elif PASSWORD_HASHER_PROFILE == 'argon2':
+    PASSWORD_HASHERS = [
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+        'users.hashers.TunedPBKDF2PasswordHasher',
+    ]
+
+# Segundos durante los que un login repetido reutiliza los tokens ya emitidos (0 lo desactiva)
+USERS_LOGIN_TOKEN_REUSE_SECONDS = int(os.environ.get('USERS_LOGIN_TOKEN_REUSE_SECONDS', 30))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -147,3 +244,19 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CORS_ALLOW_ALL_ORIGINS = True
+
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+
+# Cola de efectos secundarios no críticos de las órdenes (ver orders/jobs.py). Con
+# 'orders.jobs.DatabaseJobBackend' los trabajos sobreviven a un reinicio y los ejecuta run_jobs.
+# Por defecto el pool de hilos solo se usa con PostgreSQL: con SQLite (un único escritor)
+# sus hilos competirían con las peticiones por el lock de escritura.
+ORDERS_JOB_BACKEND = os.environ.get('REACTIONS_JOB_BACKEND') or (
+    'orders.jobs.ThreadPoolJobBackend' if database_profile() == 'postgres' else 'orders.jobs.InlineJobBackend'
+)
+# Hilos del ThreadPoolJobBackend
+ORDERS_JOB_WORKERS = 4
+# Reintentos de un trabajo fallido antes de descartarlo (o marcarlo como fallido)
+ORDERS_JOB_RETRIES = 3
+# Segundos de espera antes del primer reintento; se duplica en cada intento
+ORDERS_JOB_BACKOFF = 0.5
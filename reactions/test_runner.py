@@ -0,0 +1,20 @@
+# reactions/test_runner.py
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+INLINE_JOBS = override_settings(ORDERS_JOB_BACKEND='orders.jobs.InlineJobBackend')
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Ejecuta toda la suite con `InlineJobBackend`: los trabajos corren al
+    confirmar la transacción en el mismo hilo, así ningún hilo del pool escribe
+    en la base de pruebas mientras corren las pruebas siguientes.
+    """
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        INLINE_JOBS.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        INLINE_JOBS.disable()
+        super().teardown_test_environment(**kwargs)
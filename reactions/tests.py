@@ -0,0 +1,163 @@
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction
+from django.core.exceptions import ImproperlyConfigured
+from django.db.utils import ConnectionHandler
+from django.http import HttpResponse
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+
+from orders.models import Order
+from users.models import User
+from . import db
+from .instrumentation import RequestMetrics, RequestMetricsMiddleware, registry
+
+
+@override_settings(INSTRUMENTATION_ENABLED=True, INSTRUMENTATION_SAMPLE_RATE=1.0)
+class RequestMetricsMiddlewareTests(APITestCase):
+    def setUp(self):
+        registry.reset()
+        self.supplier = User.objects.create(username='supplier', user_type='supplier')
+        applicant = User.objects.create(username='applicant', user_type='applicant')
+        Order.objects.create(applicant=applicant, supplier=self.supplier)
+        self.client.force_authenticate(self.supplier)
+
+    def test_server_timing_and_registry(self):
+        response = self.client.get('/api/orders/in_progress_orders/')
+
+        timing = response['Server-Timing']
+        self.assertIn('total;dur=', timing)
+        self.assertIn('db;dur=', timing)
+        self.assertIn('serializer;dur=', timing)
+        totals = registry.snapshot()['orders-in-progress-orders']
+        self.assertEqual(totals['requests'], 1)
+        self.assertGreater(totals['queries'], 0)
+        self.assertGreater(totals['serializer_seconds'], 0)
+
+    def test_metrics_endpoint_renders_prometheus_text(self):
+        self.client.get('/api/orders/in_progress_orders/')
+
+        response = self.client.get('/metrics/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('reactions_sampled_requests_total{view="orders-in-progress-orders"} 1', response.content.decode())
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_are_not_measured(self):
+        response = self.client.get('/api/orders/in_progress_orders/')
+
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(registry.snapshot(), {})
+
+    @override_settings(INSTRUMENTATION_ENABLED=False)
+    def test_disabled_hides_metrics_endpoint(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 404)
+
+    @override_settings(ROOT_URLCONF='reactions.asgi_urls')
+    async def test_async_chain_is_measured_without_adapting(self):
+        response = await self.async_client.get(
+            '/api/orders/in_progress_orders/',
+            headers={'Authorization': f'Bearer {self.supplier.get_token().access_token}'},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Server-Timing', response)
+        self.assertGreater(registry.snapshot()['orders.async_views.in_progress_orders']['queries'], 0)
+
+    def test_middleware_follows_the_chain_mode(self):
+        async def async_view(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(RequestMetricsMiddleware(async_view)))
+        self.assertFalse(iscoroutinefunction(RequestMetricsMiddleware(lambda request: HttpResponse())))
+
+    def test_repeated_query_signatures_are_flagged(self):
+        def execute(sql, params, many, context):
+            return None
+
+        metrics = RequestMetrics()
+        for service_id in range(4):
+            metrics(execute, 'SELECT * FROM services_service WHERE id = %s', (service_id,), False, {})
+        metrics(execute, 'SELECT * FROM orders_order', (), False, {})
+
+        self.assertEqual(metrics.query_count, 5)
+        self.assertEqual(metrics.duplicates(), {'SELECT * FROM services_service WHERE id = %s': 4})
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    def test_sqlite_profile_applies_pragmas_on_connect(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Alias propio: SimpleTestCase bloquea las conexiones a 'default'
+            profile = db.database_settings(Path(directory), {})['default']
+            connections = ConnectionHandler({'default': profile, 'profile': profile})
+            connection = connections['profile']
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    journal_mode = cursor.fetchone()[0]
+                    cursor.execute('PRAGMA synchronous')
+                    synchronous = cursor.fetchone()[0]
+            finally:
+                connection.close()
+
+        self.assertEqual(journal_mode, 'wal')
+        self.assertEqual(synchronous, 1)  # NORMAL
+
+    def test_postgres_profile_with_pool_and_replicas(self):
+        databases = db.database_settings(Path('.'), {
+            'REACTIONS_DB_PROFILE': 'postgres',
+            'REACTIONS_DB_POOL': '1',
+            'REACTIONS_DB_REPLICAS': 'replica-a, replica-b',
+        })
+
+        self.assertEqual(sorted(databases), ['default', 'replica_1', 'replica_2'])
+        self.assertEqual(databases['default']['CONN_MAX_AGE'], 0)
+        self.assertEqual(databases['default']['OPTIONS']['pool']['max_size'], 20)
+        self.assertEqual(databases['replica_2']['HOST'], 'replica-b')
+        self.assertEqual(databases['replica_1']['TEST'], {'MIRROR': 'default'})
+
+    def test_persistent_connections_without_pool_and_unknown_profile(self):
+        databases = db.database_settings(Path('.'), {'REACTIONS_DB_PROFILE': 'postgres'})
+
+        self.assertEqual(databases['default']['CONN_MAX_AGE'], 60)
+        with self.assertRaises(ImproperlyConfigured):
+            db.database_settings(Path('.'), {'REACTIONS_DB_PROFILE': 'oracle'})
+
+    def test_router_sends_only_marked_reads_to_replicas(self):
+        router = db.ReplicaRouter()
+        router.replicas = ['replica_1']
+        replica_order = Order()
+        replica_order._state.db = 'replica_1'
+
+        self.assertEqual(router.db_for_read(Order), 'default')
+        with db.read_from_replica():
+            self.assertEqual(router.db_for_read(Order), 'replica_1')
+            self.assertEqual(router.db_for_write(Order), 'default')
+        self.assertEqual(router.db_for_read(Order, instance=replica_order), 'replica_1')
+        self.assertFalse(router.allow_migrate('replica_1', 'orders'))
+
+
+class ReplicaReadMixinTests(APITestCase):
+    def setUp(self):
+        self.supplier = User.objects.create(username='supplier', user_type='supplier')
+        self.client.force_authenticate(self.supplier)
+
+    def test_history_lists_read_from_replica_only_during_request(self):
+        seen = []
+        original = db.ReplicaRouter.db_for_read
+
+        def spy(router, model, **hints):
+            seen.append(db._use_replica.get())
+            return original(router, model, **hints)
+
+        with mock.patch.object(db.ReplicaRouter, 'db_for_read', spy):
+            self.client.get('/api/orders/in_progress_orders/')
+            listed = list(seen)
+            seen.clear()
+            self.client.get(f'/api/users/{self.supplier.pk}/stats/')
+
+        self.assertTrue(listed and all(listed))
+        self.assertFalse(any(seen))
+        self.assertFalse(db._use_replica.get())
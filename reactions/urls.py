@@ -16,10 +16,12 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from reactions.instrumentation import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('users.urls')),
     path('api/', include('services.urls')),
     path('api/', include('orders.urls')),
+    path('metrics/', metrics_view, name='metrics'),
 ]
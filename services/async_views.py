@@ -0,0 +1,22 @@
+# services/async_views.py
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .catalog import aget_catalog
+
+
+async def service_list(request):
+    """
+    Versión async de ServiceListView: mismo catálogo en memoria y mismos
+    encabezados `ETag`/`Last-Modified`.
+    """
+    catalog = await aget_catalog()
+    not_modified = get_conditional_response(request, etag=catalog.etag, last_modified=int(catalog.last_modified))
+    if not_modified is not None:
+        return not_modified
+
+    response = JsonResponse(catalog.data, safe=False)
+    response['ETag'] = catalog.etag
+    response['Last-Modified'] = http_date(catalog.last_modified)
+    return response
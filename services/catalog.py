@@ -0,0 +1,125 @@
+# services/catalog.py
+import threading
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from .models import Service
+
+VERSION_KEY = 'services:catalog:version'
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Copia en memoria del catálogo para una versión concreta."""
+    version: str
+    last_modified: float
+    data: list
+    services: dict = field(repr=False)
+    loaded_at: float = field(default_factory=time.monotonic, repr=False)
+
+    @property
+    def etag(self):
+        return f'"catalog-{self.version}"'
+
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+def shared_cache():
+    """
+    Indica si el backend de caché por defecto es visible para todos los
+    procesos. Con una caché por proceso (LocMemCache) una invalidación hecha
+    por un worker no llega a los demás hasta que vence `SERVICES_CATALOG_TTL`.
+    """
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def _new_version():
+    stamp = time.time()
+    return {'version': str(time.time_ns()), 'last_modified': stamp}
+
+
+def invalidate_catalog():
+    """
+    Publica una nueva versión del catálogo. Las copias en memoria de todos los
+    procesos que compartan el backend de caché se reconstruyen en su próximo uso.
+    """
+    cache.set(VERSION_KEY, _new_version(), settings.SERVICES_CATALOG_TTL)
+
+
+def _current_snapshot(stamp):
+    snapshot = _snapshot
+    if snapshot is None or snapshot.version != stamp['version']:
+        return None
+    # Tope a la antigüedad de la copia aunque la versión publicada no cambie
+    if time.monotonic() - snapshot.loaded_at >= settings.SERVICES_CATALOG_TTL:
+        return None
+    return snapshot
+
+
+def _store_snapshot(stamp, services):
+    global _snapshot
+    from .serializers import ServiceSerializer
+
+    with _lock:
+        _snapshot = CatalogSnapshot(
+            version=stamp['version'],
+            last_modified=stamp['last_modified'],
+            data=ServiceSerializer(services, many=True).data,
+            services={service.pk: service for service in services},
+        )
+        return _snapshot
+
+
+def get_catalog(refresh=False):
+    """
+    Devuelve el catálogo vigente. Mientras la versión publicada en la caché no
+    cambie, no se consulta la base de datos.
+    """
+    stamp = cache.get(VERSION_KEY)
+    if stamp is None:
+        stamp = _new_version()
+        cache.add(VERSION_KEY, stamp, settings.SERVICES_CATALOG_TTL)
+        stamp = cache.get(VERSION_KEY, stamp)
+
+    snapshot = None if refresh else _current_snapshot(stamp)
+    if snapshot is not None:
+        return snapshot
+    return _store_snapshot(stamp, list(Service.objects.order_by('id')))
+
+
+async def aget_catalog():
+    """Versión async de `get_catalog` para las vistas ASGI."""
+    stamp = await cache.aget(VERSION_KEY)
+    if stamp is None:
+        stamp = _new_version()
+        await cache.aadd(VERSION_KEY, stamp, settings.SERVICES_CATALOG_TTL)
+        stamp = await cache.aget(VERSION_KEY, stamp)
+
+    snapshot = _current_snapshot(stamp)
+    if snapshot is not None:
+        return snapshot
+    return _store_snapshot(stamp, [service async for service in Service.objects.order_by('id')])
+
+
+def get_services(service_ids):
+    """
+    Resuelve servicios por id desde el catálogo en memoria. Si falta alguno (por
+    ejemplo, creado por otro proceso) se recarga el catálogo una vez.
+
+    Los precios solo salen de la copia en memoria si la caché es compartida; con
+    una caché por proceso se leen de la base de datos, para no cobrar pedidos
+    con un precio que otro worker ya cambió.
+    """
+    if not shared_cache():
+        return Service.objects.in_bulk(service_ids)
+    catalog = get_catalog()
+    if not set(service_ids) <= catalog.services.keys():
+        catalog = get_catalog(refresh=True)
+    return {service_id: catalog.services[service_id] for service_id in service_ids if service_id in catalog.services}
@@ -0,0 +1,53 @@
+# services/counters.py
+from collections import defaultdict
+
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import Service
+
+
+def usage_from_items(items):
+    """
+    Resume los ítems de un pedido (pares `(service_id, quantity)`) en
+    `{service_id: (pedidos, unidades)}`: cada servicio cuenta una vez por pedido.
+    """
+    quantities = defaultdict(int)
+    for service_id, quantity in items:
+        quantities[service_id] += quantity
+    return {service_id: (1, quantity) for service_id, quantity in quantities.items()}
+
+
+def combine_usage(usages):
+    """Suma varios resúmenes de `usage_from_items` (por ejemplo, los de un lote de pedidos)."""
+    combined = defaultdict(lambda: (0, 0))
+    for usage in usages:
+        for service_id, (orders, quantity) in usage.items():
+            total_orders, total_quantity = combined[service_id]
+            combined[service_id] = (total_orders + orders, total_quantity + quantity)
+    return dict(combined)
+
+
+def units_by_service(usage):
+    """Solo las unidades de un resumen de uso: `{service_id: unidades}`."""
+    return {service_id: quantity for service_id, (_orders, quantity) in usage.items()}
+
+
+def apply_service_usage(usage, sign=1):
+    """
+    Suma (o resta con `sign=-1`) el uso a `order_count` y `quantity_total` de
+    todos los servicios afectados con una sola sentencia UPDATE atómica.
+    """
+    if not usage:
+        return
+
+    def delta(position):
+        return Case(
+            *[When(pk=service_id, then=Value(sign * counts[position])) for service_id, counts in usage.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+
+    Service.objects.filter(pk__in=usage).update(
+        order_count=F('order_count') + delta(0),
+        quantity_total=F('quantity_total') + delta(1),
+    )
@@ -0,0 +1,42 @@
+# services/management/commands/rebuild_service_counters.py
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+
+from orders.models import Order, OrderItem
+from services.models import Service
+
+
+class Command(BaseCommand):
+    help = "Recalcula Service.order_count y Service.quantity_total a partir de OrderItem, por lotes de pedidos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10_000, help="Pedidos por lote.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        totals = defaultdict(lambda: [0, 0])
+        last_order_id = Order.objects.aggregate(last=Max('id'))['last'] or 0
+
+        # Cada lote abarca un rango de pedidos completo, así que el conteo distinto por pedido es exacto
+        for start in range(0, last_order_id + 1, batch_size):
+            rows = (
+                OrderItem.objects
+                .filter(order_id__gte=start, order_id__lt=start + batch_size)
+                .exclude(order__status='cancelled')
+                .values('service_id')
+                .annotate(orders=Count('order_id', distinct=True), quantity=Sum('quantity'))
+            )
+            for row in rows:
+                totals[row['service_id']][0] += row['orders']
+                totals[row['service_id']][1] += row['quantity']
+
+        services = list(Service.objects.all())
+        for service in services:
+            service.order_count, service.quantity_total = totals.get(service.pk, (0, 0))
+        with transaction.atomic():
+            Service.objects.bulk_update(services, ['order_count', 'quantity_total'], batch_size=500)
+
+        self.stdout.write(self.style.SUCCESS(f"Contadores recalculados para {len(services)} servicios."))
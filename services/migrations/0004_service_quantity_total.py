@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0003_remove_service_budget'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='quantity_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -9,7 +9,8 @@ class Service(models.Model):
     name = models.CharField(max_length=50, choices=SERVICE_TYPE_CHOICES)
     description = models.TextField(blank=True, null=True)
     price = models.PositiveIntegerField(default=0)
-    order_count = models.PositiveIntegerField(default=0)
+    order_count = models.PositiveIntegerField(default=0)  # Pedidos vigentes o completados que incluyen el servicio
+    quantity_total = models.PositiveIntegerField(default=0)  # Unidades pedidas en esos pedidos
 
     def __str__(self):
         return self.name
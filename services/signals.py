@@ -0,0 +1,16 @@
+# services/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import invalidate_catalog
+from .models import Service
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def invalidate_catalog_on_change(sender, **kwargs):
+    # Se invalida al momento y de nuevo al confirmar la transacción, para que
+    # ninguna lectura hecha antes del commit quede cacheada como vigente.
+    invalidate_catalog()
+    transaction.on_commit(invalidate_catalog)
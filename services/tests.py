@@ -1,3 +1,129 @@
-from django.test import TestCase
+import tempfile
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from orders.assignment import get_supplier_assigner
+from orders.placement import place_order
+from users.models import User
+from .models import Service
+
+
+class ServicePopularityTests(APITestCase):
+    def setUp(self):
+        get_supplier_assigner().reset()
+        self.applicant = User.objects.create(username='applicant', user_type='applicant', budget=100000)
+        self.recipient = User.objects.create(username='recipient', user_type='recipient')
+        User.objects.create(username='supplier', user_type='supplier')
+        self.charchazo = Service.objects.create(name='charchazo', price=10)
+        self.abrazo = Service.objects.create(name='abrazo', price=5)
+
+    def place(self, *lines):
+        services_data = [{'service_id': service.id, 'quantity': quantity} for service, quantity in lines]
+        # Los contadores se actualizan en la cola de trabajos, al confirmar la transacción
+        with self.captureOnCommitCallbacks(execute=True):
+            return place_order(self.applicant, services_data, self.recipient.id)
+
+    def cancel(self, order):
+        with self.captureOnCommitCallbacks(execute=True):
+            order.cancel()
+
+    def counters(self):
+        return list(Service.objects.order_by('id').values_list('order_count', 'quantity_total'))
+
+    def test_placement_and_cancellation_update_counters(self):
+        self.place((self.charchazo, 2), (self.charchazo, 1), (self.abrazo, 1))
+        order = self.place((self.charchazo, 4))
+        self.assertEqual(self.counters(), [(2, 7), (1, 1)])
+
+        self.cancel(order)
+        self.assertEqual(self.counters(), [(1, 3), (1, 1)])
+
+    def test_rebuild_matches_incremental_counters(self):
+        self.place((self.charchazo, 2), (self.abrazo, 3))
+        self.place((self.abrazo, 1))
+        self.cancel(self.place((self.charchazo, 1)))
+        expected = self.counters()
+        Service.objects.update(order_count=0, quantity_total=0)
+
+        call_command('rebuild_service_counters', batch_size=1, stdout=StringIO())
+
+        self.assertEqual(self.counters(), expected)
+
+    def test_popular_listing_is_sorted_by_counters(self):
+        self.place((self.abrazo, 1))
+        self.client.force_authenticate(self.applicant)
+
+        response = self.client.get('/api/services/popular/')
+
+        self.assertEqual([service['name'] for service in response.data], ['abrazo', 'charchazo'])
+
+
+class ServiceCatalogTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        get_supplier_assigner().reset()
+        self.charchazo = Service.objects.create(name='charchazo', price=10)
+
+    def test_if_none_match_returns_304_without_queries(self):
+        response = self.client.get('/api/services/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response)
+
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.client.get('/api/services/', HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(len(queries), 0)
+
+    def test_service_change_invalidates_catalog(self):
+        etag = self.client.get('/api/services/')['ETag']
+        self.charchazo.price = 20
+        self.charchazo.save()
+
+        response = self.client.get('/api/services/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data[0]['price'], 20)
+
+    def place(self):
+        applicant = User.objects.create(username='applicant', user_type='applicant')
+        recipient = User.objects.create(username='recipient', user_type='recipient')
+        User.objects.create(username='supplier', user_type='supplier')
+        with CaptureQueriesContext(connection) as queries:
+            order = place_order(applicant, [{'service_id': self.charchazo.id, 'quantity': 3}], recipient.id)
+        return order, [query for query in queries if 'FROM "services_service"' in query['sql']]
+
+    def test_order_pricing_reads_catalog_with_shared_cache(self):
+        with tempfile.TemporaryDirectory() as location:
+            shared = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}}
+            with self.settings(CACHES=shared):
+                self.client.get('/api/services/')
+                order, service_queries = self.place()
+
+        self.assertEqual(order.total_price, 30)
+        self.assertFalse(service_queries)
+
+    def test_order_pricing_reads_database_with_per_process_cache(self):
+        self.client.get('/api/services/')
+        # Un cambio que este proceso no ve invalidarse (como uno hecho por otro worker)
+        Service.objects.filter(pk=self.charchazo.pk).update(price=20)
+
+        order, service_queries = self.place()
+
+        self.assertEqual(order.total_price, 60)
+        self.assertEqual(len(service_queries), 1)
+
+    def test_snapshot_expires_after_ttl(self):
+        self.client.get('/api/services/')
+        Service.objects.filter(pk=self.charchazo.pk).update(price=20)
+
+        with self.settings(SERVICES_CATALOG_TTL=0):
+            response = self.client.get('/api/services/')
+
+        self.assertEqual(response.data[0]['price'], 20)
@@ -1,8 +1,15 @@
 # services/urls.py
 
 from django.urls import path
-from .views import ServiceListView
+from . import async_views
+from .views import ServiceListView, PopularServiceListView
 
 urlpatterns = [
     path('services/', ServiceListView.as_view(), name='service-list'),
+    path('services/popular/', PopularServiceListView.as_view(), name='service-popular'),
+]
+
+# Vista async equivalente para el modo ASGI (ver reactions/asgi_urls.py)
+async_urlpatterns = [
+    path('services/', async_views.service_list),
 ]
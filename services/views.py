@@ -1,12 +1,40 @@
 # services/views.py
 
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from rest_framework import generics
+from rest_framework.response import Response
+from .catalog import get_catalog
 from .models import Service
-from .serializers import ServiceSerializer
+from .serializers import ServiceSerializer, ServicePopularitySerializer
 
 class ServiceListView(generics.ListAPIView):
     """
     Vista para listar todos los servicios disponibles (charchazo, abrazo, etc.)
+    Se sirve desde el catálogo en memoria con `ETag`/`Last-Modified`; un
+    `If-None-Match` vigente recibe un 304 sin tocar la base de datos.
     """
     queryset = Service.objects.all()
     serializer_class = ServiceSerializer
+    # El catálogo es público: sin autenticadores no se carga el usuario del token
+    authentication_classes = []
+
+    def list(self, request, *args, **kwargs):
+        catalog = get_catalog()
+        not_modified = get_conditional_response(request, etag=catalog.etag, last_modified=int(catalog.last_modified))
+        if not_modified is not None:
+            return not_modified
+
+        response = Response(catalog.data)
+        response['ETag'] = catalog.etag
+        response['Last-Modified'] = http_date(catalog.last_modified)
+        return response
+
+
+class PopularServiceListView(generics.ListAPIView):
+    """
+    Vista para listar los servicios ordenados por popularidad, usando los
+    contadores desnormalizados en lugar de agregar sobre los ítems de pedidos.
+    """
+    queryset = Service.objects.order_by('-order_count', '-quantity_total', 'id')
+    serializer_class = ServicePopularitySerializer
@@ -0,0 +1,22 @@
+# users/async_views.py
+from django.http import JsonResponse
+from rest_framework.request import Request
+
+from reactions.pagination import AsyncUserPagination
+from .authentication import async_token_required
+from .models import User
+from .serializers import UserSerializer
+
+
+@async_token_required(load_user=True)
+async def user_detail(request, *args, **kwargs):
+    """Versión async de UserDetailView: datos del usuario autenticado."""
+    return JsonResponse(UserSerializer(request.user).data)
+
+
+@async_token_required()
+async def recipient_list(request):
+    """Versión async de RecipientListView."""
+    paginator = AsyncUserPagination()
+    page = await paginator.apaginate_queryset(User.objects.filter(user_type='recipient'), Request(request))
+    return JsonResponse(paginator.get_paginated_data(UserSerializer(page, many=True).data))
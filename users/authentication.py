@@ -0,0 +1,108 @@
+# users/authentication.py
+from functools import wraps
+
+from django.db.models import Model
+from django.http import JsonResponse
+from django.utils.functional import cached_property
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated, PermissionDenied
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+
+class ClaimsUser(TokenUser):
+    """
+    Usuario liviano construido desde los claims del token JWT.
+
+    `id` y `user_type` (incluido por `User.get_token`) se leen del token, así que
+    los permisos `IsSupplier`/`IsApplicant` no tocan la base de datos. Cualquier
+    otro atributo (`budget`, `order_count`, ...) carga la fila completa la
+    primera vez que se usa; también `username`, `is_staff` e `is_superuser`,
+    que `TokenUser` define con valores por defecto y nunca llegarían a `__getattr__`.
+    """
+    @cached_property
+    def id(self):
+        # simplejwt guarda el id como texto; se normaliza al tipo de la clave primaria
+        return User._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def user_type(self):
+        # Los tokens emitidos antes de agregar el claim caen a la fila completa
+        return self.token.get('user_type') or self.user.user_type
+
+    @cached_property
+    def user(self):
+        return User.objects.get(pk=self.id)
+
+    @property
+    def username(self):
+        return self.user.username
+
+    @property
+    def is_staff(self):
+        return self.user.is_staff
+
+    @property
+    def is_superuser(self):
+        return self.user.is_superuser
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self.user, attr)
+
+    def __eq__(self, other):
+        if isinstance(other, Model):
+            return isinstance(other, User) and other.pk == self.id
+        return super().__eq__(other)
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class ClaimsUserAuthentication(JWTStatelessUserAuthentication):
+    """
+    Autenticación JWT sin consulta por petición: devuelve un `ClaimsUser` en vez
+    de cargar el `User`. Pensada para endpoints de solo lectura o que solo
+    necesitan los permisos por tipo de usuario; se activa con
+    `USERS_STATELESS_AUTH`.
+    """
+    def get_user(self, validated_token):
+        # La clase base valida que el token traiga el claim con el id del usuario
+        return ClaimsUser(super().get_user(validated_token).token)
+
+
+def async_token_required(user_type=None, load_user=False):
+    """
+    Decorador para vistas async (fuera de DRF) con el mismo contrato que la
+    autenticación JWT de la API: 401 sin token válido y 403 si `user_type` no
+    coincide. `request.user` queda como `ClaimsUser`, o como el `User` completo
+    (leído con `aget`) cuando `load_user=True`.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            authenticator = ClaimsUserAuthentication()
+            try:
+                authenticated = authenticator.authenticate(Request(request))
+            except AuthenticationFailed as exc:
+                return JsonResponse(exc.detail, status=status.HTTP_401_UNAUTHORIZED, safe=False)
+            if authenticated is None:
+                return JsonResponse({'detail': NotAuthenticated.default_detail}, status=status.HTTP_401_UNAUTHORIZED)
+
+            user = authenticated[0]
+            if user_type is not None and user.user_type != user_type:
+                return JsonResponse({'detail': PermissionDenied.default_detail}, status=status.HTTP_403_FORBIDDEN)
+            if load_user:
+                try:
+                    user = await User.objects.aget(pk=user.id)
+                except User.DoesNotExist:
+                    return JsonResponse({'detail': 'User not found'}, status=status.HTTP_401_UNAUTHORIZED)
+            request.user = user
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
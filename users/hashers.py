@@ -0,0 +1,15 @@
+# users/hashers.py
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 con un número de iteraciones configurable mediante
+    `PASSWORD_PBKDF2_ITERATIONS`. Usa el mismo identificador `pbkdf2_sha256`, así
+    que verifica los hashes existentes y, como `must_update` compara iteraciones,
+    Django los vuelve a hashear con el valor configurado en el próximo login.
+    """
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
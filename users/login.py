@@ -0,0 +1,53 @@
+# users/login.py
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+
+from .models import User
+
+REUSE_KEY_SALT = 'users.login.token-reuse'
+
+
+def _reuse_key(username, password, password_hash):
+    # HMAC con SECRET_KEY: la caché nunca guarda la contraseña ni un hash barato de ella.
+    # El hash guardado entra en la clave, así que cambiar la contraseña invalida la reutilización
+    digest = salted_hmac(REUSE_KEY_SALT, f'{username}\0{password}\0{password_hash}', algorithm='sha256').hexdigest()
+    return f'users:login:{digest}'
+
+
+def issue_login_tokens(username, password):
+    """
+    Autentica al usuario y emite sus tokens JWT. Devuelve None si las
+    credenciales no son válidas.
+
+    Un login repetido con las mismas credenciales dentro de
+    `USERS_LOGIN_TOKEN_REUSE_SECONDS` reutiliza los tokens ya emitidos (que
+    siguen vigentes) sin volver a ejecutar el hasher de contraseñas, lo que
+    acota el costo de CPU de las ráfagas de login. Antes de reutilizar se lee
+    el hash actual de un usuario activo (una consulta por el índice de
+    `username`): una contraseña nueva o una cuenta desactivada no reutilizan.
+    """
+    reuse_seconds = settings.USERS_LOGIN_TOKEN_REUSE_SECONDS
+    if reuse_seconds:
+        password_hash = User.objects.filter(username=username, is_active=True).values_list('password', flat=True).first()
+        if password_hash is not None:
+            issued = cache.get(_reuse_key(username, password, password_hash))
+            if issued is not None:
+                return issued
+
+    user = authenticate(username=username, password=password)
+    if user is None:
+        return None
+
+    refresh = user.get_token()
+    issued = {
+        "username": user.username,
+        "user_type": user.user_type,
+        "access": str(refresh.access_token),
+        "refresh": str(refresh),
+    }
+    if reuse_seconds:
+        # Con el hash ya actualizado si `authenticate` lo recalculó con otro perfil
+        cache.set(_reuse_key(username, password, user.password), issued, reuse_seconds)
+    return issued
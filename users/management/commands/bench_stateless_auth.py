@@ -0,0 +1,42 @@
+# users/management/commands/bench_stateless_auth.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from benchmarks.environment import benchmark_database
+from orders.models import Order
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide peticiones por segundo de /api/orders/in_progress_orders/ con la "
+        "autenticación JWT completa y con USERS_STATELESS_AUTH, sobre una base de "
+        "datos de prueba desechable."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2_000)
+        parser.add_argument('--orders', type=int, default=20, help="Órdenes en progreso del proveedor.")
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            supplier = User.objects.create(username='bench-supplier', user_type='supplier')
+            applicant = User.objects.create(username='bench-applicant', user_type='applicant')
+            Order.objects.bulk_create(Order(applicant=applicant, supplier=supplier) for _ in range(options['orders']))
+            client = Client(HTTP_AUTHORIZATION=f'Bearer {supplier.get_token().access_token}')
+
+            for label, stateless in (('JWTAuthentication', False), ('ClaimsUserAuthentication', True)):
+                with override_settings(USERS_STATELESS_AUTH=stateless):
+                    rps = self.measure(client, options['requests'])
+                self.stdout.write(f'{label}: {rps:.0f} req/s')
+
+    def measure(self, client, requests):
+        url = '/api/orders/in_progress_orders/'
+        client.get(url)  # calentar
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = client.get(url)
+            assert response.status_code == 200, response.status_code
+        return requests / (time.perf_counter() - started)
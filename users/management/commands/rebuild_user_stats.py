@@ -0,0 +1,80 @@
+# users/management/commands/rebuild_user_stats.py
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Sum
+
+from orders.models import Order, OrderItem
+from users.models import UserServiceStats, UserStats
+
+STATUSES = ('in_progress', 'completed', 'cancelled')
+
+
+class Command(BaseCommand):
+    help = "Reconstruye UserStats y UserServiceStats a partir de las órdenes, por lotes de pedidos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10_000, help="Pedidos por lote.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        stats = defaultdict(lambda: defaultdict(int))
+        units = defaultdict(int)
+        last_order_id = Order.objects.aggregate(last=Max('id'))['last'] or 0
+
+        for start in range(0, last_order_id + 1, batch_size):
+            orders = Order.objects.filter(id__gte=start, id__lt=start + batch_size).values_list(
+                'applicant_id', 'supplier_id', 'status', 'total_price', 'created_at', 'completed_at',
+            )
+            for applicant_id, supplier_id, status, total_price, created_at, completed_at in orders:
+                if status not in STATUSES:
+                    continue
+                placed = stats[applicant_id]
+                placed[f'placed_{status}'] += 1
+                placed['total_spent'] += total_price
+                if supplier_id is not None:
+                    assigned = stats[supplier_id]
+                    assigned[f'assigned_{status}'] += 1
+                if status == 'completed' and completed_at is not None:
+                    seconds = int((completed_at - created_at).total_seconds())
+                    placed['placed_completion_seconds'] += seconds
+                    if supplier_id is not None:
+                        assigned['assigned_completion_seconds'] += seconds
+                        assigned['total_earned'] += total_price
+
+            rows = (
+                OrderItem.objects
+                .filter(order_id__gte=start, order_id__lt=start + batch_size)
+                .exclude(order__status='cancelled')
+                .values('order__applicant_id', 'service_id')
+                .annotate(quantity=Sum('quantity'))
+            )
+            for row in rows:
+                units[row['order__applicant_id'], row['service_id']] += row['quantity']
+
+        # El favorito sigue el mismo criterio que la actualización incremental: más unidades, luego menor id
+        favourites = {}
+        for (user_id, service_id), quantity in sorted(units.items(), key=lambda entry: (-entry[1], entry[0][1])):
+            if quantity > 0:
+                favourites.setdefault(user_id, service_id)
+
+        with transaction.atomic():
+            UserServiceStats.objects.all().delete()
+            UserStats.objects.all().delete()
+            UserStats.objects.bulk_create(
+                [
+                    UserStats(user_id=user_id, favourite_service_id=favourites.get(user_id), **fields)
+                    for user_id, fields in stats.items()
+                ],
+                batch_size=500,
+            )
+            UserServiceStats.objects.bulk_create(
+                [
+                    UserServiceStats(user_id=user_id, service_id=service_id, quantity=quantity)
+                    for (user_id, service_id), quantity in units.items()
+                ],
+                batch_size=500,
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Estadísticas reconstruidas para {len(stats)} usuarios."))
@@ -0,0 +1,48 @@
+# users/management/commands/reconcile_ratings.py
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+
+from orders.models import Order
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Recalcula User.rating y User.rating_count de los proveedores a partir de las órdenes calificadas, por lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10_000, help="Pedidos por lote.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        totals = defaultdict(lambda: [0, 0])
+        last_order_id = Order.objects.aggregate(last=Max('id'))['last'] or 0
+
+        # Se acumulan sumas y conteos (no promedios) para que el resultado por lotes sea exacto
+        for start in range(0, last_order_id + 1, batch_size):
+            rows = (
+                Order.objects
+                .filter(id__gte=start, id__lt=start + batch_size, is_rated=True, supplier__isnull=False)
+                .values('supplier_id')
+                .annotate(total=Sum('rating'), count=Count('id'))
+            )
+            for row in rows:
+                totals[row['supplier_id']][0] += row['total']
+                totals[row['supplier_id']][1] += row['count']
+
+        suppliers = list(User.objects.filter(user_type='supplier').only('id', 'rating', 'rating_count'))
+        drifted = []
+        for supplier in suppliers:
+            total, count = totals.get(supplier.pk, (0, 0))
+            rating = total / count if count else None
+            if supplier.rating_count != count or supplier.rating != rating:
+                supplier.rating, supplier.rating_count = rating, count
+                drifted.append(supplier)
+        with transaction.atomic():
+            User.objects.bulk_update(drifted, ['rating', 'rating_count'], batch_size=500)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Calificaciones revisadas para {len(suppliers)} proveedores; {len(drifted)} corregidos."
+        ))
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0004_service_quantity_total'),
+        ('users', '0005_user_type_load_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('placed_in_progress', models.IntegerField(default=0)),
+                ('placed_completed', models.IntegerField(default=0)),
+                ('placed_cancelled', models.IntegerField(default=0)),
+                ('placed_completion_seconds', models.BigIntegerField(default=0)),
+                ('total_spent', models.BigIntegerField(default=0)),
+                ('assigned_in_progress', models.IntegerField(default=0)),
+                ('assigned_completed', models.IntegerField(default=0)),
+                ('assigned_cancelled', models.IntegerField(default=0)),
+                ('assigned_completion_seconds', models.BigIntegerField(default=0)),
+                ('total_earned', models.BigIntegerField(default=0)),
+                ('favourite_service', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='services.service')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserServiceStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(default=0)),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='services.service')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='service_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-quantity'], name='user_service_quantity_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'service'), name='user_service_stats_unique')],
+            },
+        ),
+    ]
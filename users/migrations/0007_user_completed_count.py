@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_user_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='completed_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_completed_count(apps, schema_editor):
+    """Cuenta los pedidos ya completados de cada proveedor con un solo UPDATE."""
+    User = apps.get_model('users', 'User')
+    Order = apps.get_model('orders', 'Order')
+    completed = (
+        Order.objects.filter(supplier_id=OuterRef('pk'), status='completed')
+        .order_by().values('supplier_id').annotate(total=Count('id')).values('total')
+    )
+    User.objects.filter(user_type='supplier').update(
+        completed_count=Coalesce(Subquery(completed, output_field=IntegerField()), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_user_completed_count'),
+        ('orders', '0011_queuedjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_completed_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0008_backfill_completed_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='outstanding_minutes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['user_type', 'outstanding_minutes'], name='user_type_capacity_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+from django.db.models import IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_outstanding_minutes(apps, schema_editor):
+    """Suma el `time_estimated` de los pedidos en progreso de cada proveedor con un solo UPDATE."""
+    User = apps.get_model('users', 'User')
+    Order = apps.get_model('orders', 'Order')
+    outstanding = (
+        Order.objects.filter(supplier_id=OuterRef('pk'), status='in_progress')
+        .order_by().values('supplier_id').annotate(total=Sum('time_estimated')).values('total')
+    )
+    User.objects.filter(user_type='supplier').update(
+        outstanding_minutes=Coalesce(Subquery(outstanding, output_field=IntegerField()), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_user_outstanding_minutes'),
+        ('orders', '0011_queuedjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_outstanding_minutes, migrations.RunPython.noop),
+    ]
@@ -12,9 +12,19 @@ class User(AbstractUser):
     user_type = models.CharField(max_length=10, choices=USER_TYPE_CHOICES)
     budget = models.PositiveIntegerField(default=5000)
     order_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)  # Pedidos completados como proveedor
+    outstanding_minutes = models.PositiveIntegerField(default=0)  # Suma de time_estimated de sus pedidos en progreso
     rating = models.FloatField(null=True, blank=True)
     rating_count = models.PositiveIntegerField(default=0)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Búsqueda del proveedor menos cargado al crear pedidos
+            models.Index(fields=['user_type', 'order_count'], name='user_type_load_idx'),
+            # Búsqueda del proveedor que antes queda libre (CapacitySupplierAssigner)
+            models.Index(fields=['user_type', 'outstanding_minutes'], name='user_type_capacity_idx'),
+        ]
+
     def __str__(self):
         return self.username
     
@@ -25,3 +35,44 @@ class User(AbstractUser):
         refresh = RefreshToken.for_user(self)
         refresh['user_type'] = self.user_type
         return refresh
+
+
+class UserStats(models.Model):
+    """
+    Resumen materializado de la actividad de un usuario para su panel. Se
+    actualiza de forma incremental al crear, completar y cancelar pedidos (ver
+    users/stats.py) y se puede reconstruir con `rebuild_user_stats`.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    # Como solicitante
+    placed_in_progress = models.IntegerField(default=0)
+    placed_completed = models.IntegerField(default=0)
+    placed_cancelled = models.IntegerField(default=0)
+    placed_completion_seconds = models.BigIntegerField(default=0)  # Suma de tiempos de los pedidos completados
+    total_spent = models.BigIntegerField(default=0)
+    favourite_service = models.ForeignKey('services.Service', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    # Como proveedor
+    assigned_in_progress = models.IntegerField(default=0)
+    assigned_completed = models.IntegerField(default=0)
+    assigned_cancelled = models.IntegerField(default=0)
+    assigned_completion_seconds = models.BigIntegerField(default=0)
+    total_earned = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Stats de {self.user_id}"
+
+
+class UserServiceStats(models.Model):
+    """Unidades pedidas de cada servicio por solicitante, para resolver el favorito."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='service_stats')
+    service = models.ForeignKey('services.Service', on_delete=models.CASCADE, related_name='+')
+    quantity = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'service'], name='user_service_stats_unique'),
+        ]
+        indexes = [
+            # El favorito es la primera fila de este índice para el usuario
+            models.Index(fields=['user', '-quantity'], name='user_service_quantity_idx'),
+        ]
@@ -1,6 +1,7 @@
 from rest_framework import serializers
-from django.contrib.auth import authenticate
-from .models import User
+from reactions.instrumentation import TimedListSerializer, TimedSerializerMixin
+from .login import issue_login_tokens
+from .models import User, UserStats
 
 class LoginSerializer(serializers.Serializer):
     username = serializers.CharField()
@@ -11,17 +12,42 @@ class LoginSerializer(serializers.Serializer):
         password = data.get('password')
 
         if username and password:
-            user = authenticate(username=username, password=password)
-            if user is None:
+            tokens = issue_login_tokens(username, password)
+            if tokens is None:
                 raise serializers.ValidationError("Invalid username or password")
         else:
             raise serializers.ValidationError("Both username and password are required")
 
-        data['user'] = user
+        data['tokens'] = tokens
         return data
     
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = ['id', 'username', 'user_type', 'budget', 'order_count', 'rating', 'rating_count']
+        fields = ['id', 'username', 'user_type', 'budget', 'order_count', 'completed_count', 'rating', 'rating_count']
+        list_serializer_class = TimedListSerializer
+
+
+class UserStatsSerializer(serializers.ModelSerializer):
+    favourite_service_name = serializers.ReadOnlyField(source='favourite_service.name', default=None)
+    placed_average_completion_minutes = serializers.SerializerMethodField()
+    assigned_average_completion_minutes = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UserStats
+        fields = [
+            'placed_in_progress', 'placed_completed', 'placed_cancelled', 'total_spent',
+            'placed_average_completion_minutes', 'favourite_service', 'favourite_service_name',
+            'assigned_in_progress', 'assigned_completed', 'assigned_cancelled', 'total_earned',
+            'assigned_average_completion_minutes',
+        ]
+
+    def average_minutes(self, seconds, completed):
+        return round(seconds / completed / 60, 1) if completed else None
+
+    def get_placed_average_completion_minutes(self, stats):
+        return self.average_minutes(stats.placed_completion_seconds, stats.placed_completed)
+
+    def get_assigned_average_completion_minutes(self, stats):
+        return self.average_minutes(stats.assigned_completion_seconds, stats.assigned_completed)
@@ -0,0 +1,101 @@
+# users/stats.py
+from collections import defaultdict
+
+from django.db.models import Case, F, OuterRef, Q, Subquery, Value, When
+
+from .models import UserServiceStats, UserStats
+
+
+def _by_user(deltas, field):
+    return Case(
+        *[When(user_id=user_id, then=Value(fields[field])) for user_id, fields in deltas.items() if field in fields],
+        default=Value(0),
+    )
+
+
+def apply_stats(deltas, service_usage=None):
+    """
+    Aplica variaciones a los resúmenes de varios usuarios con un número fijo de
+    consultas, sin importar cuántos usuarios o pedidos involucre.
+
+    `deltas` es `{user_id: {campo: variación}}` y `service_usage` es
+    `{user_id: {service_id: unidades}}` (negativas al cancelar).
+    """
+    deltas = {user_id: fields for user_id, fields in deltas.items() if user_id is not None and fields}
+    service_usage = {user_id: usage for user_id, usage in (service_usage or {}).items() if usage}
+    users = set(deltas) | set(service_usage)
+    if not users:
+        return
+
+    UserStats.objects.bulk_create([UserStats(user_id=user_id) for user_id in users], ignore_conflicts=True)
+    fields = {field for user_fields in deltas.values() for field in user_fields}
+    if fields:
+        UserStats.objects.filter(user_id__in=deltas).update(
+            **{field: F(field) + _by_user(deltas, field) for field in fields}
+        )
+
+    if service_usage:
+        pairs = {
+            (user_id, service_id): quantity
+            for user_id, usage in service_usage.items()
+            for service_id, quantity in usage.items()
+        }
+        UserServiceStats.objects.bulk_create(
+            [UserServiceStats(user_id=user_id, service_id=service_id) for user_id, service_id in pairs],
+            ignore_conflicts=True,
+        )
+        UserServiceStats.objects.filter(
+            user_id__in=service_usage, service_id__in={service_id for _user_id, service_id in pairs},
+        ).update(quantity=F('quantity') + Case(
+            *[When(Q(user_id=user_id, service_id=service_id), then=Value(quantity)) for (user_id, service_id), quantity in pairs.items()],
+            default=Value(0),
+        ))
+        # El favorito se resuelve con el índice (user, -quantity) y queda guardado en el resumen
+        UserStats.objects.filter(user_id__in=service_usage).update(favourite_service=Subquery(
+            UserServiceStats.objects.filter(user=OuterRef('user'), quantity__gt=0)
+            .order_by('-quantity', 'service_id').values('service_id')[:1]
+        ))
+
+
+def _completion_seconds(order):
+    return int((order.completed_at - order.created_at).total_seconds())
+
+
+def _merge(deltas, user_id, **fields):
+    for field, delta in fields.items():
+        deltas[user_id][field] = deltas[user_id].get(field, 0) + delta
+
+
+def record_placed(orders, service_usage):
+    """Pedidos recién creados; `service_usage` agrupa las unidades por solicitante."""
+    deltas = defaultdict(dict)
+    for order in orders:
+        _merge(deltas, order.applicant_id, placed_in_progress=1, total_spent=order.total_price)
+        _merge(deltas, order.supplier_id, assigned_in_progress=1)
+    apply_stats(deltas, service_usage)
+
+
+def record_completed(orders):
+    """Pedidos que pasaron de en progreso a completados (con `completed_at` ya fijado)."""
+    deltas = defaultdict(dict)
+    for order in orders:
+        seconds = _completion_seconds(order)
+        _merge(deltas, order.applicant_id, placed_in_progress=-1, placed_completed=1, placed_completion_seconds=seconds)
+        _merge(
+            deltas, order.supplier_id,
+            assigned_in_progress=-1, assigned_completed=1, assigned_completion_seconds=seconds,
+            total_earned=order.total_price,
+        )
+    apply_stats(deltas)
+
+
+def record_cancelled(orders, service_usage):
+    """Pedidos cancelados; sus unidades dejan de contar para el servicio favorito."""
+    deltas = defaultdict(dict)
+    for order in orders:
+        _merge(deltas, order.applicant_id, placed_in_progress=-1, placed_cancelled=1)
+        _merge(deltas, order.supplier_id, assigned_in_progress=-1, assigned_cancelled=1)
+    apply_stats(deltas, {
+        user_id: {service_id: -quantity for service_id, quantity in usage.items()}
+        for user_id, usage in service_usage.items()
+    })
@@ -1,3 +1,212 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from orders.assignment import get_supplier_assigner
+from orders.models import Order
+from services.models import Service
+from .authentication import ClaimsUser
+from .models import User, UserStats
+
+
+class RecipientListTests(APITestCase):
+    def setUp(self):
+        self.applicant = User.objects.create(username='applicant', user_type='applicant')
+        self.recipients = [User.objects.create(username=f'recipient{i}', user_type='recipient') for i in range(5)]
+        self.client.force_authenticate(self.applicant)
+
+    @override_settings(USERS_PAGE_SIZE=2)
+    def test_recipients_are_paginated_by_id(self):
+        seen = []
+        url = '/api/recipients/'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [user['id'] for user in response.data['results']]
+            url = response.data['next']
+
+        self.assertEqual(seen, [recipient.id for recipient in self.recipients])
+
+
+class ClaimsUserAuthenticationTests(APITestCase):
+    def setUp(self):
+        self.supplier = User.objects.create(username='supplier', user_type='supplier', budget=1234)
+        self.applicant = User.objects.create(username='applicant', user_type='applicant')
+        Order.objects.create(applicant=self.applicant, supplier=self.supplier)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.supplier.get_token().access_token}')
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+        return len(queries)
+
+    def test_stateless_mode_skips_user_query(self):
+        full = self.count_queries('/api/orders/in_progress_orders/')
+        with self.settings(USERS_STATELESS_AUTH=True):
+            stateless = self.count_queries('/api/orders/in_progress_orders/')
+
+        self.assertEqual(stateless, full - 1)
+
+    @override_settings(USERS_STATELESS_AUTH=True)
+    def test_permissions_use_token_claims(self):
+        response = self.client.get('/api/orders/current_orders/')
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_claims_user_loads_row_lazily(self):
+        user = ClaimsUser(self.supplier.get_token().access_token)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(user.user_type, 'supplier')
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(user.budget, 1234)
+        self.assertEqual(user, self.supplier)
+
+    @override_settings(USERS_STATELESS_AUTH=True)
+    def test_staff_flags_come_from_the_user_row(self):
+        User.objects.filter(pk=self.supplier.pk).update(is_staff=True, is_superuser=True)
+        user = ClaimsUser(self.supplier.get_token().access_token)
+
+        response = self.client.get(f'/api/users/{self.applicant.pk}/stats/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((user.username, user.is_staff, user.is_superuser), ('supplier', True, True))
+
+
+@override_settings(
+    PASSWORD_HASHERS=['users.hashers.TunedPBKDF2PasswordHasher'],
+    PASSWORD_PBKDF2_ITERATIONS=1000,
+    USERS_LOGIN_TOKEN_REUSE_SECONDS=30,
+)
+class LoginTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            username='solicitor@dummymail.com',
+            user_type='applicant',
+            password=PBKDF2PasswordHasher().encode('charchazo', 'somesalt', iterations=2000),
+        )
+
+    def login(self, password='charchazo', username='solicitor@dummymail.com'):
+        return self.client.post('/api/login/', {'username': username, 'password': password}, format='json')
+
+    def test_login_rehashes_with_configured_profile(self):
+        response = self.login()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user_type'], 'applicant')
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_repeated_login_reuses_tokens_without_hashing(self):
+        first = self.login()
+
+        with mock.patch('users.login.authenticate') as authenticate:
+            second = self.login()
+
+        authenticate.assert_not_called()
+        self.assertEqual(second.data['refresh'], first.data['refresh'])
+
+    def test_wrong_password_is_rejected_and_not_reused(self):
+        self.login()
+
+        self.assertEqual(self.login(password='otra').status_code, 400)
+
+    def test_login_is_throttled_per_username(self):
+        rates = {'login_ip': None, 'login_username': '2/min'}
+        with self.settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}):
+            statuses = [self.login(password='otra').status_code for _ in range(3)]
+
+        self.assertEqual(statuses, [400, 400, 429])
+
+    def test_non_object_body_is_rejected(self):
+        for body in (['solicitor@dummymail.com', 'charchazo'], 'charchazo'):
+            self.assertEqual(self.client.post('/api/login/', body, format='json').status_code, 400)
+
+    def test_password_change_and_deactivation_stop_reuse(self):
+        self.login()
+        self.user.refresh_from_db()
+        self.user.set_password('nueva')
+        self.user.save()
+
+        self.assertEqual(self.login().status_code, 400)
+        self.assertEqual(self.login(password='nueva').status_code, 200)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.login(password='nueva').status_code, 400)
+
+
+class UserStatsTests(APITestCase):
+    def setUp(self):
+        get_supplier_assigner().reset()
+        self.applicant = User.objects.create(username='applicant', user_type='applicant', budget=10000)
+        self.recipient = User.objects.create(username='recipient', user_type='recipient')
+        self.supplier = User.objects.create(username='supplier', user_type='supplier')
+        self.charchazo = Service.objects.create(name='charchazo', price=10)
+        self.abrazo = Service.objects.create(name='abrazo', price=5)
+
+    def place(self, *quantities):
+        self.client.force_authenticate(self.applicant)
+        return self.client.post('/api/orders/', {
+            'recipient_id': self.recipient.id,
+            'services': [
+                {'service_id': service.id, 'quantity': quantity}
+                for service, quantity in zip([self.charchazo, self.abrazo], quantities)
+            ],
+        }, format='json').data['id']
+
+    def stats(self, user):
+        self.client.force_authenticate(user)
+        return self.client.get(f'/api/users/{user.pk}/stats/').data
+
+    def exercise(self):
+        # Las estadísticas se actualizan en la cola de trabajos, al confirmar cada transacción
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.place(1, 5)
+            second = self.place(3, 1)
+            self.place(1, 0)
+            Order.objects.get(pk=first).cancel()
+            self.client.force_authenticate(self.supplier)
+            self.client.put(f'/api/orders/{second}/complete_order/')
+
+    def test_hooks_keep_summary_current(self):
+        self.exercise()
+
+        applicant, supplier = self.stats(self.applicant), self.stats(self.supplier)
+        self.assertEqual(
+            (applicant['placed_in_progress'], applicant['placed_completed'], applicant['placed_cancelled']), (1, 1, 1),
+        )
+        self.assertEqual(applicant['total_spent'], 35 + 35 + 10)
+        # Sin el pedido cancelado, charchazo suma 4 unidades y abrazo 1
+        self.assertEqual(applicant['favourite_service_name'], 'charchazo')
+        self.assertEqual((supplier['assigned_completed'], supplier['total_earned']), (1, 35))
+        self.assertIsNotNone(supplier['assigned_average_completion_minutes'])
+
+    def test_rebuild_matches_incremental_summary(self):
+        self.exercise()
+        incremental = [self.stats(self.applicant), self.stats(self.supplier)]
+        UserStats.objects.all().delete()
+
+        call_command('rebuild_user_stats', batch_size=1, stdout=StringIO())
+
+        self.assertEqual([self.stats(self.applicant), self.stats(self.supplier)], incremental)
+
+    def test_single_query_and_owner_only(self):
+        self.exercise()
+        self.client.force_authenticate(self.applicant)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f'/api/users/{self.applicant.pk}/stats/')
+        self.assertEqual(len(queries), 1)
+
+        forbidden = self.client.get(f'/api/users/{self.supplier.pk}/stats/')
+        self.assertEqual(forbidden.status_code, 403)
@@ -0,0 +1,32 @@
+# users/throttling.py
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginRateThrottle(SimpleRateThrottle):
+    """
+    Lee la tasa de `DEFAULT_THROTTLE_RATES` en cada petición (y no al importar),
+    para que se pueda ajustar o desactivar con `override_settings`.
+    """
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+
+class LoginIPRateThrottle(LoginRateThrottle):
+    """Limita los intentos de login por IP de origen."""
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginUsernameRateThrottle(LoginRateThrottle):
+    """Limita los intentos de login por nombre de usuario, venga de la IP que venga."""
+    scope = 'login_username'
+
+    def get_cache_key(self, request, view):
+        # Un cuerpo que no es un objeto JSON no trae usuario: solo aplica el límite por IP
+        username = request.data.get('username') if isinstance(request.data, dict) else None
+        if not username:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': str(username).strip().lower()}
@@ -1,9 +1,17 @@
 from django.urls import path
-from .views import LoginView, UserListView, UserDetailView, RecipientListView
+from . import async_views
+from .views import LoginView, UserListView, UserDetailView, UserStatsView, RecipientListView
 
 urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),
     path('users/', UserListView.as_view(), name='users'),
     path('users/<int:pk>/', UserDetailView.as_view(), name='user-detail'),
+    path('users/<int:pk>/stats/', UserStatsView.as_view(), name='user-stats'),
     path('recipients/', RecipientListView.as_view(), name='recipients-list'),
 ]
+
+# Vistas async equivalentes para el modo ASGI (ver reactions/asgi_urls.py)
+async_urlpatterns = [
+    path('users/<int:pk>/', async_views.user_detail),
+    path('recipients/', async_views.recipient_list),
+]
@@ -1,32 +1,37 @@
+from django.conf import settings
 from rest_framework import status, generics, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from .serializers import LoginSerializer, UserSerializer
-from .models import User
+from reactions.db import ReplicaReadMixin
+from reactions.pagination import UserPagination
+from .authentication import ClaimsUserAuthentication
+from .serializers import LoginSerializer, UserSerializer, UserStatsSerializer
+from .throttling import LoginIPRateThrottle, LoginUsernameRateThrottle
+from .models import User, UserStats
 
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
 
 
 class LoginView(APIView):
+    # El login es público: el throttling corre antes de verificar la contraseña
+    authentication_classes = []
+    throttle_classes = [LoginIPRateThrottle, LoginUsernameRateThrottle]
+
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.validated_data['user']
-            refresh = user.get_token()
             return Response({
                 "message": "Login successful",
-                "username": user.username,
-                "user_type": user.user_type,
-                "access": str(refresh.access_token),
-                "refresh": str(refresh),
+                **serializer.validated_data['tokens'],
             }, status=status.HTTP_200_OK)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class UserListView(generics.ListAPIView):
+class UserListView(ReplicaReadMixin, generics.ListAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    pagination_class = UserPagination
     
 class UserDetailView(APIView):
     """
@@ -43,8 +48,39 @@ class UserDetailView(APIView):
         except User.DoesNotExist:
             return Response({"error": "User not found."}, status=status.HTTP_404_NOT_FOUND)
 
-class RecipientListView(generics.ListAPIView):
+class RecipientListView(ReplicaReadMixin, generics.ListAPIView):
     queryset = User.objects.filter(user_type='recipient')
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = UserPagination
+
+    def get_authenticators(self):
+        if settings.USERS_STATELESS_AUTH:
+            return [ClaimsUserAuthentication()]
+        return super().get_authenticators()
+
+
+
+class UserStatsView(APIView):
+    """
+    Vista con los números del panel del usuario, servidos desde su resumen
+    materializado: una sola lectura por clave primaria, sin importar el largo
+    del historial. Cada usuario solo puede ver sus propias estadísticas.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_authenticators(self):
+        # Solo se necesita el id del token, así que en modo stateless no se lee la fila del usuario
+        if settings.USERS_STATELESS_AUTH:
+            return [ClaimsUserAuthentication()]
+        return super().get_authenticators()
+
+    def get(self, request, pk):
+        if request.user.pk != pk and not request.user.is_staff:
+            return Response({"error": "No tienes permiso para ver estas estadísticas."}, status=status.HTTP_403_FORBIDDEN)
 
+        stats = UserStats.objects.select_related('favourite_service').filter(user_id=pk).first()
+        if stats is None:
+            # Sin actividad todavía: todos los contadores en cero
+            stats = UserStats(user_id=pk)
+        return Response(UserStatsSerializer(stats).data, status=status.HTTP_200_OK)